@@ -0,0 +1,1231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        benchmark.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Compare optimized code paths against their reference implementations.
+# Usage:       python benchmark.py shortest_paths [--assets 150] [--pairs 600] [--processes 4]
+#              python benchmark.py resample [--symbols 500] [--ticks 200] [--interval 1min] [--steady_ticks 20]
+#              python benchmark.py screen [--symbols 500]
+#              python benchmark.py indicators [--symbols 100] [--ticks 20]
+#              python benchmark.py renko [--symbols 300] [--charts 200]
+#              python benchmark.py clean [--symbols 2000] [--rows 1500]
+#              python benchmark.py klines [--symbols 200] [--period 2880]
+#              python benchmark.py download [--symbols 20] [--period 1000] [--limit 100] [--workers 4] [--port 8766]
+#              python benchmark.py conversion [--assets 150] [--pairs 600] [--rows 300]
+#              python benchmark.py convert [--assets 150] [--pairs 600] [--ticks 20]
+#              python benchmark.py snapshot [--assets 600] [--pairs 2000]
+#              python benchmark.py imports [--top 15]
+#              python benchmark.py ring [--symbols 1000] [--ticks 50] [--buffer_size 60]
+#              python benchmark.py merge [--symbols 2000] [--ticks 100] [--buffer_size 3000]
+#              python benchmark.py cascade [--symbols 500] [--ticks 200]
+#              python benchmark.py signals [--symbols 100] [--sets 10] [--port 5556] [--poll_interval 1]
+#              python benchmark.py publication [--symbols 500] [--writes 200] [--fsync interval]
+#              python benchmark.py writer [--symbols 200] [--rows 300] [--ticks 20] [--fetch 0.1]
+#              python benchmark.py pipeline [--symbols 2000] [--ticks 30] [--fetch 0.2] [--publish 0.05]
+#              python benchmark.py ssh [--symbols 100] [--polls 60] [--change 0.2] [--latency 0.02] [--bandwidth 1] [--poll_interval 0.5]
+#              python benchmark.py stream [--symbols 200] [--frames 50] [--port 8765] [--max_age 2]
+
+# Library imports.
+from typing import Callable, Dict, List, Optional, Tuple
+from os.path import abspath, dirname, exists, join
+from tempfile import TemporaryDirectory
+from tqdm import tqdm
+from utils.background_writer import Background_writer
+from utils.conversion import get_assets_from_pair
+from utils.conversion import convert_price, get_price_converter, get_shortest_pair_path_between_assets
+from utils.conversion import precompute_shortest_paths
+from utils.crypto_logger_cascade import Crypto_logger_cascade
+from utils.crypto_logger_input import Crypto_logger_input
+from utils.conversion_ohlcv import convert_ohlcvs, convert_ohlcvs_from_pairs_to_assets
+from utils.incremental_merge import Incremental_merge
+from utils.indicator_state import Indicator_engine, get_default_indicators
+from utils.indicators import filter_in_market, screen_all, screen_one
+from utils.kline_cache import Kline_cache
+from utils.kline_downloader import Kline_downloader
+from utils.indicators import get_positive_JMA_trigger, get_positive_JMA_triggers
+from utils.indicators import get_positive_momentum_trigger, get_positive_momentum_triggers
+from utils.indicators import get_positive_RSI_trigger, get_positive_RSI_triggers
+from utils.indicators import get_RSI_reversal_trigger, get_RSI_reversal_triggers
+from utils.ohlcv import fix_DST_bug, klines_to_df
+from utils.ohlcv_cleaning import clean_data
+from utils.renko import Renko, Renko_brick_cache, build_renko, get_renko_trigger, get_renko_triggers
+from utils.replay import Kline_replay_server, Ticker_replay_server
+from utils.pipeline import Pipeline
+from utils.publication import Log_publisher, Log_reader
+from utils.resample import resample, resample_next
+from utils.ring_buffer import Ring_buffer
+from utils.signals import Signal_publisher, Signal_subscriber
+from utils.snapshot import Startup_snapshot
+from utils.symbol_index import Symbol_index
+from utils.ticker_stream import Ticker_stream
+from utils.trader.ssh import Ssh
+from io import BytesIO
+from urllib.parse import urlencode
+from urllib.request import urlopen
+from types import SimpleNamespace
+from datetime import datetime
+import argparse
+import json
+import pickle
+import random
+import subprocess
+import sys
+import threading
+import time
+import warnings
+import os
+import numpy as np
+import pandas as pd
+
+# Class definitions.
+class Local_sftp_client:
+    def __init__(self, directory: str, latency: float = 0.0, bandwidth: float = float('inf')):
+        """
+        Stand-in for paramiko.SFTPClient serving the files of a local directory, with every
+        request delayed by a round trip and every byte by the bandwidth (in bytes per second).
+        """
+        self.directory = directory
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def wait(self, size: int = 0) -> None:
+        time.sleep(self.latency + size / self.bandwidth)
+
+    def stat(self, path: str) -> SimpleNamespace:
+        self.wait()
+        stat = os.stat(join(self.directory, path))
+        # SFTP only has whole seconds.
+        return SimpleNamespace(st_size=stat.st_size, st_mtime=int(stat.st_mtime))
+
+    def open(self, path: str, mode: str = 'r') -> 'Local_sftp_file':
+        self.wait()
+        return Local_sftp_file(self, open(join(self.directory, path), mode))
+
+class Local_sftp_file:
+    def __init__(self, client: Local_sftp_client, f):
+        self.client = client
+        self.f = f
+
+    def seek(self, offset: int) -> None:
+        self.f.seek(offset)
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        self.client.wait(len(data))
+        return data
+
+    def __enter__(self) -> 'Local_sftp_file':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.f.close()
+
+class Local_ssh_client:
+    def __init__(self, directory: str, latency: float = 0.0, bandwidth: float = float('inf')):
+        """Stand-in for paramiko.SSHClient, only knowing how to cat files from a local directory."""
+        self.sftp = Local_sftp_client(directory, latency=latency, bandwidth=bandwidth)
+
+    def open_sftp(self) -> Local_sftp_client:
+        # Opening the session is a round trip, once.
+        self.sftp.wait()
+        return self.sftp
+
+    def exec_command(self, command: str) -> Tuple[None, BytesIO, None]:
+        path = command.split(' ', 1)[1].replace('~/', '', 1)
+        # A new channel per command: one round trip to open it, one for the output.
+        self.sftp.wait()
+        with self.sftp.open(path, 'rb') as f:
+            return None, BytesIO(f.read()), None
+
+class Download_interrupted(BaseException):
+    """Stands for the process being killed: not an Exception, so requests are not retried."""
+
+class Replay_client:
+    def __init__(self, url: str, interrupt_after: Optional[int] = None):
+        """
+        Stand-in for binance.client.Client requesting klines from a Kline_replay_server over
+        HTTP, interrupted (see Download_interrupted) after interrupt_after requests.
+        """
+        self.url = url
+        self.interrupt_after = interrupt_after
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def get_klines(self, **parameters) -> List[List[object]]:
+        with self.lock:
+            self.requests += 1
+            if self.interrupt_after is not None and self.requests > self.interrupt_after:
+                raise Download_interrupted()
+        with urlopen('{}/v3/klines?{}'.format(self.url, urlencode(parameters))) as response:
+            return json.load(response)
+
+# Function definitions.
+def get_exchange_info(assets: int = 150, 
+                      pairs: int = 600, 
+                      seed: int = 0) -> pd.DataFrame:
+    """Return the cached exchange information if there is one, else a random exchange."""
+    info_path = join('crypto_logs', 'crypto_exchange_info.txt')
+    if exists(info_path):
+        return pd.read_csv(info_path, index_col=0)
+    generator = random.Random(seed)
+    quote_assets = ['USDT', 'BTC', 'BUSD', 'ETH', 'BNB', 'BRL', 'AUD', 'EUR', 'TRY']
+    base_assets = ['ASSET{}'.format(i) for i in range(assets)]
+    listed = [(quote_asset, 'USDT') for quote_asset in quote_assets[1:]]
+    listed += [(base_asset, generator.choice(quote_assets)) for base_asset in base_assets]
+    while len(listed) < pairs:
+        base_asset = generator.choice(base_assets + quote_assets)
+        quote_asset = generator.choice(quote_assets)
+        if base_asset != quote_asset and (base_asset, quote_asset) not in listed \
+                and (quote_asset, base_asset) not in listed:
+            listed.append((base_asset, quote_asset))
+    exchange_info = pd.DataFrame(listed, columns=['base_asset', 'quote_asset'])
+    exchange_info['symbol'] = exchange_info['base_asset'] + exchange_info['quote_asset']
+    exchange_info['tick_size'] = [generator.choice(['0.01', '0.0001', '0.00000001']) for _ in listed]
+    exchange_info['step_size'] = '0.001'
+    exchange_info['quote_precision'] = 8
+    return exchange_info
+
+def time_function(function: Callable, *args, **kwargs) -> Tuple[object, float]:
+    start_time = time.time()
+    result = function(*args, **kwargs)
+    return result, time.time() - start_time
+
+def precompute_shortest_paths_reference(exchange_info: pd.DataFrame, priority: str) \
+        -> Dict[str, Dict[str, List[Tuple[str, str]]]]:
+    """Previous precompute_shortest_paths loop: one BFS over exchange_info per asset pair."""
+    shortest_paths = {}
+    base_assets = exchange_info['base_asset'].tolist()
+    quote_assets = exchange_info['quote_asset'].tolist()
+    assets = list(set(base_assets + quote_assets))
+    for from_asset in tqdm(assets, unit='asset'):
+        shortest_paths[from_asset] = {}
+        for to_asset in assets:
+            if from_asset != to_asset:
+                precomputed_pair_path = None
+                if shortest_paths.get(to_asset, None) is not None:
+                    precomputed_pair_path = shortest_paths[to_asset].get(from_asset, None)
+                if precomputed_pair_path is None:
+                    shortest_paths[from_asset][to_asset] = \
+                        get_shortest_pair_path_between_assets(
+                            from_asset=from_asset, to_asset=to_asset, 
+                            exchange_info=exchange_info, priority=priority)
+                else:
+                    shortest_paths[from_asset][to_asset] = precomputed_pair_path[::-1]
+    return shortest_paths
+
+def benchmark_shortest_paths(args: argparse.Namespace) -> None:
+    exchange_info = get_exchange_info(assets=args.assets, pairs=args.pairs)
+    print('{} pairs, {} assets.'.format(
+        len(exchange_info), len(set(exchange_info['base_asset']) | set(exchange_info['quote_asset']))))
+    with TemporaryDirectory() as directory:
+        shortest_paths, new_time = time_function(
+            precompute_shortest_paths, exchange_info, priority=None, 
+            shortest_paths_file=join(directory, 'shortest_paths.pkl'), 
+            processes=args.processes)
+    print('Asset graph: {:.3f} s for 3 priorities.'.format(new_time))
+    reference, reference_time = time_function(
+        precompute_shortest_paths_reference, exchange_info, priority='accuracy')
+    print('Reference: {:.3f} s for 1 priority.'.format(reference_time))
+    print('Identical paths: {}'.format(reference == shortest_paths['accuracy']))
+
+def get_ohlcv(rows: int = 200, 
+              symbols: int = 500, 
+              frequency: str = '5s', 
+              seed: int = 0) -> pd.DataFrame:
+    """Return random (symbol, feature) bars, some symbols listed late or with gaps."""
+    generator = np.random.RandomState(seed)
+    features = ['open', 'high', 'low', 'close', 'base_volume', 'quote_volume', 
+                'rolling_base_volume', 'rolling_quote_volume']
+    index = pd.date_range('2022-01-01', periods=rows, freq=frequency, name='date')
+    columns = pd.MultiIndex.from_product([['SYMBOL{}'.format(i) for i in range(symbols)], features], 
+                                         names=['symbol', 'feature'])
+    values = np.exp(generator.randn(rows, len(columns)) * 0.01).cumprod(axis=0)
+    values = values.reshape(rows, symbols, len(features))
+    values[:rows // 3, 1::4] = np.nan
+    values[generator.rand(rows, symbols) < 0.1] = np.nan
+    return pd.DataFrame(values.reshape(rows, -1), index=index, columns=columns)
+
+def resample_reference(old_dataset: pd.DataFrame, 
+                       dataset: pd.DataFrame, 
+                       interval: str) -> pd.DataFrame:
+    """Previous Crypto_logger_base.get_and_put_next: resample the whole buffer every time."""
+    if old_dataset is not None:
+        dataset = pd.concat([old_dataset, dataset], axis='index', join='outer')
+    dataset = dataset.copy().reset_index()
+    dataset = dataset.drop_duplicates(keep='last', ignore_index=True)
+    dataset = dataset.set_index('date')
+    return resample(dataset, interval)
+
+def benchmark_resample(args: argparse.Namespace) -> None:
+    dataset = get_ohlcv(rows=args.ticks, symbols=args.symbols, frequency=args.frequency)
+    reference, new = None, None
+    reference_time, new_time, identical = 0, 0, True
+    for tick in tqdm(range(2, dataset.shape[0] + 1), unit='tick'):
+        # Each tick brings the last two input rows, as the loggers do.
+        rows = dataset.iloc[tick - 2:tick]
+        reference, elapsed = time_function(resample_reference, reference, rows.copy(), args.interval)
+        reference = reference.tail(args.buffer_size)
+        reference_time += elapsed
+        new, elapsed = time_function(resample_next, new, rows.copy(), args.interval)
+        new = new.tail(args.buffer_size)
+        new_time += elapsed
+        identical &= reference.index.equals(new.index) and reference.columns.equals(new.columns) \
+            and np.allclose(reference.to_numpy(), new.to_numpy(), rtol=1e-12, atol=0, equal_nan=True)
+    print('{} ticks of {} symbols, {} to {}.'.format(
+        dataset.shape[0], args.symbols, args.frequency, args.interval))
+    print('Incremental: {:.3f} s, reference: {:.3f} s.'.format(new_time, reference_time))
+    print('Identical datasets: {}'.format(identical))
+    # Steady state of the next level: the whole (full) 1min buffer resampled to 30min every tick.
+    dataset = get_ohlcv(rows=1500 + args.steady_ticks, symbols=args.symbols, frequency='1min')
+    reference = resample(dataset.iloc[:1500].copy(), '30min').tail(args.buffer_size)
+    new = reference.copy()
+    reference_time, new_time, identical = 0, 0, True
+    for tick in tqdm(range(1, args.steady_ticks + 1), unit='tick'):
+        rows = dataset.iloc[tick:tick + 1500]
+        reference, elapsed = time_function(resample_reference, reference, rows.copy(), '30min')
+        reference = reference.tail(args.buffer_size)
+        reference_time += elapsed
+        new, elapsed = time_function(resample_next, new, rows.copy(), '30min')
+        new = new.tail(args.buffer_size)
+        new_time += elapsed
+        identical &= reference.index.equals(new.index) and reference.columns.equals(new.columns) \
+            and np.allclose(reference.to_numpy(), new.to_numpy(), rtol=1e-12, atol=0, equal_nan=True)
+    print('{} ticks of a full 1500 row 1min buffer of {} symbols to 30min ({} rows kept).'.format(
+        args.steady_ticks, args.symbols, args.buffer_size))
+    print('Incremental: {:.3f} s, reference: {:.3f} s.'.format(new_time, reference_time))
+    print('Identical datasets: {}'.format(identical))
+
+def benchmark_screen(args: argparse.Namespace) -> None:
+    generator = np.random.RandomState(0)
+    for (frequency, rows) in [('5s', 60), ('1min', 1500), ('30min', 60), ('1h', 60), ('1d', 60)]:
+        dataset = get_ohlcv(rows=rows, symbols=args.symbols, frequency=frequency)
+        symbols = dataset.columns.get_level_values(0).unique()
+        # Square waves (flat or alternating prices) and volumes around the daily minimum.
+        for symbol in symbols[::7]:
+            dataset[(symbol, 'close')] = 1.0 + (np.arange(rows) % 2) * generator.randint(0, 2)
+        for symbol in symbols:
+            dataset[(symbol, 'rolling_base_volume')] *= generator.uniform(0.5, 1.5) * 1000000
+        reference, reference_time = time_function(filter_in_market, screen_one, dataset)
+        new, new_time = time_function(screen_all, dataset)
+        print('{}: batched {:.3f} s, per symbol {:.3f} s, {} of {} symbols kept, identical: {}'.format(
+            frequency, new_time, reference_time, len(new), len(symbols), reference.tolist() == new.tolist()))
+
+def get_triggers_reference(dataset: pd.DataFrame) -> np.ndarray:
+    """Per symbol pandas_ta triggers, recomputed over the whole buffer."""
+    triggers = []
+    for symbol in dataset.columns.get_level_values(0).unique():
+        data = dataset[symbol].copy()
+        data['volume'] = data['base_volume'].copy()
+        triggers.append([get_positive_RSI_trigger(data), get_positive_momentum_trigger(data), 
+                         get_positive_JMA_trigger(data), get_RSI_reversal_trigger(data)])
+    return np.array(triggers, dtype=bool).T
+
+def get_triggers(engine: Indicator_engine, dataset: pd.DataFrame) -> np.ndarray:
+    values = engine.update(dataset)
+    close = dataset.xs('close', axis='columns', level=1).reindex(columns=engine.symbols).to_numpy()[-1]
+    return np.array([get_positive_RSI_triggers(values), get_positive_momentum_triggers(values), 
+                     get_positive_JMA_triggers(values, close), get_RSI_reversal_triggers(values)])
+
+def benchmark_indicators(args: argparse.Namespace) -> None:
+    dataset = get_ohlcv(rows=args.buffer_size + args.ticks, symbols=args.symbols, frequency='1min')
+    dataset = dataset.fillna(method='pad').fillna(method='backfill')
+    engine = Indicator_engine(get_default_indicators())
+    reference_time, new_time, agreement = 0, 0, []
+    # Both start from the same bars: the engine state then carries on past the buffer.
+    for tick in tqdm(range(args.ticks), unit='tick'):
+        buffer = dataset.iloc[tick:tick + args.buffer_size]
+        reference, elapsed = time_function(get_triggers_reference, buffer)
+        reference_time += elapsed
+        new, elapsed = time_function(get_triggers, engine, buffer)
+        new_time += elapsed
+        agreement.append((reference == new).mean())
+    print('{} ticks of {} symbols: engine {:.3f} s ({} full recomputes), pandas_ta {:.3f} s.'.format(
+        args.ticks, args.symbols, new_time, engine.recomputes, reference_time))
+    print('Trigger agreement: {:.2%} (minimum over ticks {:.2%}).'.format(np.mean(agreement), np.min(agreement)))
+
+def build_renko_reference(prices: pd.Series, brick_sizes: np.ndarray) -> List[Dict[str, float]]:
+    """Previous scoring: one Renko object and its full history per brick size."""
+    evaluations = []
+    for brick_size in brick_sizes:
+        renko = Renko()
+        renko.set_brick_size(auto=False, brick_size=brick_size)
+        renko.build_history(prices=prices)
+        evaluation = renko.evaluate()
+        evaluation['count'] = len(renko.get_renko_prices())
+        evaluation['direction'] = renko.get_renko_directions()[-1]
+        evaluations.append(evaluation)
+    return evaluations
+
+def benchmark_renko(args: argparse.Namespace) -> None:
+    generator = np.random.RandomState(0)
+    reference_time, new_time, identical = 0, 0, True
+    for chart in range(args.charts):
+        prices = pd.Series(np.exp(generator.randn(60).cumsum() * 0.02) * 100)
+        brick_sizes = generator.uniform(0.05, 5, 16)
+        reference, elapsed = time_function(build_renko_reference, prices, brick_sizes)
+        reference_time += elapsed
+        new, elapsed = time_function(build_renko, prices.to_numpy(), brick_sizes)
+        new_time += elapsed
+        for (i, evaluation) in enumerate(reference):
+            identical &= all([evaluation['score'] == new['score'][i], 
+                              evaluation['balance'] == new['balance'][i], 
+                              evaluation['sign_changes:'] == new['sign_changes'][i], 
+                              evaluation['count'] == new['count'][i], 
+                              evaluation['direction'] == new['direction'][i]])
+    print('{} charts x 16 brick sizes: batched {:.3f} s, Renko objects {:.3f} s, identical: {}'.format(
+        args.charts, new_time, reference_time, identical))
+    dataset = get_ohlcv(rows=60, symbols=args.symbols, frequency='30min')
+    dataset = dataset.fillna(method='pad').fillna(method='backfill')
+    symbols = dataset.columns.get_level_values(0).unique()
+    _, reference_time = time_function(lambda: [get_renko_trigger(dataset[symbol].copy(), method='brent') 
+                                               for symbol in symbols])
+    brick_cache = Renko_brick_cache()
+    _, new_time = time_function(get_renko_triggers, dataset, brick_cache)
+    _, cached_time = time_function(get_renko_triggers, dataset, brick_cache)
+    print('{} symbols: per symbol brent {:.3f} s, batched grid {:.3f} s, with cached brick sizes {:.3f} s.'.format(
+        len(symbols), reference_time, new_time, cached_time))
+
+def clean_data_reference(data: pd.DataFrame) -> pd.DataFrame:
+    """Previous clean_data: clean one ticker at a time and concatenate it back."""
+    def clean_ticker(data, main_ticker, volume_columns, rolling_volume_columns):
+        df = data[main_ticker].copy()
+        data = data.sort_index(axis='columns')
+        data = data.drop(columns=[main_ticker])
+        if len(volume_columns) > 0:
+            df[volume_columns] = df[volume_columns].fillna(value=0.0)
+        if len(rolling_volume_columns) > 0:
+            df[rolling_volume_columns] = \
+                df[rolling_volume_columns].fillna(method='pad').fillna(method='backfill')
+        s = pd.concat([df['open'], df['close']])
+        s = s.sort_index(kind='merge')
+        s = s.fillna(method='pad')
+        s = s.fillna(method='backfill')
+        df['open'] = s.iloc[0::2]
+        df['close'] = s.iloc[1::2]
+        df.loc[df['high'].isna(),'high'] = \
+            df.loc[df['high'].isna(),['open', 'high', 'low', 'close']].max(axis='columns')
+        df.loc[df['low'].isna(),'low'] = \
+            df.loc[df['low'].isna(),['open', 'high', 'low', 'close']].min(axis='columns')
+        df.columns = pd.MultiIndex.from_tuples([(main_ticker, column) for column in df.columns], 
+                                               names=['symbol', 'feature'])
+        return pd.concat([data, df], axis='columns')
+    data.columns = data.columns.set_names(['symbol', 'feature'])
+    columns = data.columns.tolist()
+    features = data.columns.get_level_values('feature').unique().tolist()
+    volume_columns = [feature for feature in features if feature.endswith('volume')]
+    rolling_volume_columns = [feature for feature in volume_columns if feature.startswith('rolling_')]
+    volume_columns = [feature for feature in volume_columns if not feature.startswith('rolling_')]
+    for main_ticker in tqdm(data.columns.get_level_values('symbol').unique(), unit=' pair'):
+        data = clean_ticker(data, main_ticker, volume_columns, rolling_volume_columns)
+    return data[columns]
+
+def benchmark_clean(args: argparse.Namespace) -> None:
+    dataset = get_ohlcv(rows=args.rows, symbols=args.symbols, frequency='1min')
+    reference, reference_time = time_function(clean_data_reference, dataset.copy())
+    new, new_time = time_function(clean_data, dataset.copy())
+    identical = reference.columns.equals(new.columns) and reference.index.equals(new.index) \
+        and np.array_equal(reference.to_numpy(), new.to_numpy(), equal_nan=True)
+    print('{} rows of {} symbols.'.format(args.rows, args.symbols))
+    print('Vectorized: {:.3f} s, per ticker: {:.3f} s.'.format(new_time, reference_time))
+    print('Identical datasets: {}'.format(identical))
+
+def klines_to_df_reference(data: List[List[object]], offset_s: float = 0) -> pd.DataFrame:
+    """Previous ohlcv.download_pair parsing: one Python call per date and per cell."""
+    data = pd.DataFrame(data, columns=['date', 'open', 'high', 'low', 'close', 
+                                       'base_volume', 'close_time', 'quote_volume', 
+                                       'n_trades', 'taker_buy_base_volume', 
+                                       'taker_buy_quote_volume', 'ignore'])
+    data['date'] = data['date'].apply(lambda timestamp: \
+                                      datetime.fromtimestamp((timestamp / 1000) + int(offset_s)))
+    data = data.drop(columns=['close_time', 'ignore']).set_index('date')
+    data[['open', 'high', 'low', 'close', 'base_volume', 'quote_volume', 
+          'taker_buy_base_volume', 'taker_buy_quote_volume']] = \
+        data[['open', 'high', 'low', 'close', 'base_volume', 'quote_volume', 
+              'taker_buy_base_volume', 'taker_buy_quote_volume']].applymap(
+            lambda entry: entry.rstrip('0').rstrip('.'))
+    data = data.astype(float)
+    data['n_trades'] = data['n_trades'].astype(int)
+    return fix_DST_bug(data)
+
+def benchmark_klines(args: argparse.Namespace) -> None:
+    server = Kline_replay_server()
+    end_ms = int(time.time() * 1000) // 60000 * 60000
+    payloads = [[server.get_kline('SYMBOL{}'.format(i), end_ms - 60000 * period, 60000) 
+                 for period in range(args.period, 0, -1)] for i in range(args.symbols)]
+    offset_s = 3600
+    reference, reference_time = time_function(
+        lambda: [klines_to_df_reference(payload, offset_s=offset_s) for payload in payloads])
+    new, new_time = time_function(
+        lambda: [klines_to_df(payload, offset_s=offset_s) for payload in payloads])
+    identical = all(old.equals(df) and old.index.equals(df.index) and old.dtypes.equals(df.dtypes) 
+                    for (old, df) in zip(reference, new))
+    print('{} payloads of {} klines.'.format(args.symbols, args.period))
+    print('Bulk: {:.3f} s, per cell: {:.3f} s.'.format(new_time, reference_time))
+    print('Identical DataFrames: {}'.format(identical))
+
+def benchmark_download(args: argparse.Namespace) -> None:
+    now_ms = int(time.time() * 1000)
+    # SYMBOL0 was listed in the middle of the window.
+    server = Kline_replay_server(port=args.port, weight_per_minute=0, 
+                                 listings={'SYMBOL0': now_ms - args.period * 60000 // 2}).start()
+    symbols = ['SYMBOL{}'.format(i) for i in range(args.symbols)]
+    settings = {'workers': args.workers, 'limit': args.limit, 'weight_per_minute': 60000}
+    try:
+        with TemporaryDirectory() as directory:
+            cache = Kline_cache(directory=directory, interval='1m')
+            # A range already cached in the middle of the window leaves a gap on each side.
+            (start_ms, end_ms) = cache.get_window(args.period)
+            (middle_start_ms, middle_end_ms) = ((start_ms + end_ms) // 2, (start_ms + end_ms) // 2 + 100 * 60000)
+            for symbol in symbols[1::2]:
+                klines = server.get_klines({'symbol': symbol, 'interval': '1m', 'limit': 1000, 
+                                            'startTime': middle_start_ms, 'endTime': middle_end_ms})
+                cache.put(symbol, klines, middle_start_ms, middle_end_ms)
+            requests = args.symbols * -(-args.period // args.limit)
+            interrupted_client = Replay_client(server.url, interrupt_after=requests // 3)
+            try:
+                Kline_downloader(interrupted_client, cache=cache, **settings).download_pairs(
+                    symbols, period=args.period)
+                interrupted = False
+            except Download_interrupted:
+                interrupted = True
+            resumed_client = Replay_client(server.url)
+            resumed = Kline_downloader(resumed_client, cache=cache, **settings).download_pairs(
+                symbols, period=args.period)
+            plain_client = Replay_client(server.url)
+            plain_downloader = Kline_downloader(plain_client, **settings)
+            plain = [plain_downloader.download_pair(symbol, period=args.period) for symbol in symbols]
+    finally:
+        server.stop()
+    identical = True
+    for (old, new) in zip(plain, resumed):
+        # Both windows end when they were downloaded, a minute may have passed in between.
+        common = old.index.intersection(new.index)
+        identical &= old.loc[common].equals(new.loc[common]) and \
+            len(common) >= max(len(old), len(new)) - 1
+    print('{} symbols of {} klines, {} per request.'.format(args.symbols, args.period, args.limit))
+    print('Interrupted after {} requests: {}'.format(requests // 3, interrupted))
+    print('Resumed with {} requests, plain download_pair: {} requests.'.format(
+        resumed_client.requests, plain_client.requests))
+    print('Identical DataFrames: {}'.format(identical))
+
+def convert_ohlcvs_from_pairs_to_assets_reference(conversion_table: pd.DataFrame, 
+                                                  exchange_info: pd.DataFrame, 
+                                                  shortest_paths: Dict[str, Dict[str, Dict[str, 
+                                                      List[Tuple[str, str]]]]]) -> pd.DataFrame:
+    """Previous convert_ohlcvs_from_pairs_to_assets: 4-level frames built one pair at a time."""
+    symbol_index = Symbol_index(exchange_info)
+    def named_pairs_to_4dim_df(symbols, pairs, inverted):
+        df = pd.DataFrame()
+        for (symbol, pair) in zip(symbols, pairs):
+            (base_asset, quote_asset) = get_assets_from_pair(symbol, exchange_info, symbol_index=symbol_index)
+            if inverted:
+                columns = [('inverted', quote_asset, quote_asset + base_asset, column) 
+                           for column in pair.columns]
+            else:
+                columns = [('not_inverted', base_asset, symbol, column) for column in pair.columns]
+            pair.columns = pd.MultiIndex.from_tuples(
+                columns, names=['is_inverted', 'asset', 'symbol', 'feature'])
+            df = pd.concat([df, pair], axis='columns')
+        return df
+    def add_asset_level(df, inverted):
+        df = df.astype(float).copy()
+        symbols = df.columns.get_level_values(0).unique().tolist()
+        return named_pairs_to_4dim_df(symbols, [df[symbol] for symbol in symbols], inverted)
+    def invert_pairs(conversion_table):
+        conversion_table_swapped = conversion_table.copy()
+        conversion_table_swapped.columns = conversion_table_swapped.columns.swaplevel(0, 1)
+        conversion_table_swapped.loc[:, ['open', 'high', 'low', 'close', 
+                                         'base_volume', 'quote_volume']] = \
+            conversion_table_swapped.loc[:, ['open', 'high', 'low', 'close', 
+                                             'quote_volume', 'base_volume']].values
+        conversion_table_swapped.loc[:, ['open', 'high', 'low', 'close']] = \
+            1 / conversion_table_swapped.loc[:, ['open', 'high', 'low', 'close']]
+        conversion_table_swapped.columns = conversion_table_swapped.columns.swaplevel(0, 1)
+        return add_asset_level(conversion_table_swapped, inverted=True)
+    conversion_table = convert_ohlcvs('USDT', conversion_table, exchange_info, shortest_paths=shortest_paths)
+    conversion_table_swapped = invert_pairs(conversion_table)
+    conversion_table = add_asset_level(conversion_table, inverted=False)
+    conversion_table_mixed = pd.concat([conversion_table, conversion_table_swapped], 
+                                       join='outer', axis='columns')
+    conversion_table_mixed = conversion_table_mixed.sort_index(axis='columns')
+    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 3)
+    conversion_table_mixed = conversion_table_mixed[['open', 'high', 'low', 'close', 
+                                                     'base_volume', 'quote_volume']]
+    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 3)
+    conversion_table_mixed = conversion_table_mixed[['not_inverted', 'inverted']]
+    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 3)
+    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 1)
+    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(1, 2)
+    assets = conversion_table_mixed.columns.get_level_values(0).unique().tolist()
+    new_columns = []
+    for asset in tqdm(assets, unit=' asset'):
+        symbols = conversion_table_mixed[asset].columns.get_level_values(0)
+        trading_base_volume = \
+            conversion_table_mixed.loc[:, (asset, slice(None), 'base_volume')].sum(axis='columns')
+        trading_quote_volume = \
+            conversion_table_mixed.loc[:, (asset, slice(None), 'quote_volume')].sum(axis='columns')
+        new_columns.append(symbols[0])
+        for symbol in symbols:
+            # Newer pandas no longer broadcasts a Series over the matching columns.
+            for (feature, volume) in [('base_volume', trading_base_volume), 
+                                      ('quote_volume', trading_quote_volume)]:
+                key = (asset, symbol, feature)
+                conversion_table_mixed.loc[:, key] = np.repeat(volume.to_numpy()[:, np.newaxis], 
+                                                               conversion_table_mixed.loc[:, key].shape[1], 
+                                                               axis=1)
+    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 1)
+    conversion_table_mixed = conversion_table_mixed[new_columns]
+    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 3)
+    conversion_table_mixed.columns = conversion_table_mixed.columns.droplevel(3)
+    conversion_table_mixed = conversion_table_mixed['not_inverted']
+    conversion_table_mixed.columns.names = ['symbol', 'feature']
+    return conversion_table_mixed
+
+def benchmark_conversion(args: argparse.Namespace) -> None:
+    exchange_info = get_exchange_info(assets=args.assets, pairs=args.pairs)
+    with TemporaryDirectory() as directory:
+        shortest_paths = precompute_shortest_paths(exchange_info, priority='accuracy', 
+                                                   shortest_paths_file=join(directory, 'shortest_paths.pkl'))
+    generator = np.random.RandomState(0)
+    features = ['open', 'high', 'low', 'close', 'base_volume', 'quote_volume']
+    columns = pd.MultiIndex.from_product([exchange_info['symbol'], features], names=['symbol', 'feature'])
+    values = np.exp(generator.randn(args.rows, len(columns)) * 0.01).cumprod(axis=0)
+    values[generator.rand(args.rows, len(columns)) < 0.1] = np.nan
+    index = pd.date_range('2022-01-01', periods=args.rows, freq='1min', name='date')
+    conversion_table = clean_data(pd.DataFrame(values, index=index, columns=columns))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', pd.errors.PerformanceWarning)
+        reference, reference_time = time_function(convert_ohlcvs_from_pairs_to_assets_reference, 
+                                                  conversion_table.copy(), exchange_info, shortest_paths)
+    new, new_time = time_function(convert_ohlcvs_from_pairs_to_assets, 
+                                  conversion_table.copy(), exchange_info, shortest_paths=shortest_paths)
+    identical = reference.columns.equals(new.columns) and reference.index.equals(new.index) \
+        and np.array_equal(reference.to_numpy(), new.to_numpy(), equal_nan=True)
+    print('{} rows of {} pairs, {} assets out.'.format(args.rows, len(exchange_info), new.shape[1] // 6))
+    print('Array pipeline: {:.3f} s, reference: {:.3f} s.'.format(new_time, reference_time))
+    print('Identical datasets: {}'.format(identical))
+
+def benchmark_convert(args: argparse.Namespace) -> None:
+    exchange_info = get_exchange_info(assets=args.assets, pairs=args.pairs)
+    with TemporaryDirectory() as directory:
+        shortest_paths = precompute_shortest_paths(exchange_info, priority='accuracy', 
+                                                   shortest_paths_file=join(directory, 'shortest_paths.pkl'))
+    generator = np.random.RandomState(0)
+    assets = sorted(set(exchange_info['base_asset']) | set(exchange_info['quote_asset']))
+    sizes = generator.uniform(0, 1000, len(assets)).tolist()
+    reference_time, new_time, identical = 0, 0, True
+    symbol_index = Symbol_index(exchange_info)
+    converter = get_price_converter(exchange_info, priority='accuracy', shortest_paths=shortest_paths, 
+                                    symbol_index=symbol_index)
+    for tick in tqdm(range(args.ticks), unit='tick'):
+        conversion_table = pd.DataFrame({'symbol': exchange_info['symbol'], 
+                                         'close': generator.uniform(0.01, 100, len(exchange_info))})
+        reference, elapsed = time_function(
+            lambda: [convert_price(size, from_asset, 'USDT', conversion_table, exchange_info, 
+                                   shortest_path=shortest_paths, symbol_index=symbol_index) 
+                     for (size, from_asset) in zip(sizes, assets)])
+        reference_time += elapsed
+        new, elapsed = time_function(converter.convert, sizes, assets, 'USDT', conversion_table)
+        new_time += elapsed
+        identical &= reference == new
+    print('{} ticks converting {} assets.'.format(args.ticks, len(assets)))
+    print('Batched: {:.3f} s, per asset: {:.3f} s.'.format(new_time, reference_time))
+    print('Identical sizes: {}'.format(identical))
+    # A converter only serves the exchange_info it was built over, never a frame derived from it.
+    derived = get_price_converter(exchange_info.iloc[::2], priority='accuracy', 
+                                  shortest_paths=shortest_paths, converter=converter)
+    kept = get_price_converter(exchange_info, priority='accuracy', 
+                               shortest_paths=shortest_paths, converter=converter)
+    print('Derived frame converted separately: {}'.format(derived is not converter and kept is converter))
+
+def benchmark_snapshot(args: argparse.Namespace) -> None:
+    exchange_info = get_exchange_info(assets=args.assets, pairs=args.pairs)
+    with TemporaryDirectory() as directory:
+        exchange_info_path = join(directory, 'crypto_exchange_info.txt')
+        shortest_paths_path = join(directory, 'shortest_paths.pkl')
+        exchange_info.to_csv(exchange_info_path)
+        precompute_shortest_paths(exchange_info, priority=None, shortest_paths_file=shortest_paths_path)
+        def load_reference() -> Tuple[pd.DataFrame, Dict[str, Dict[str, Dict[str, List[Tuple[str, str]]]]]]:
+            with open(shortest_paths_path, 'rb') as f:
+                return pd.read_csv(exchange_info_path, index_col=0), pickle.load(f)
+        (reference_info, reference_paths), reference_time = time_function(load_reference)
+        snapshot = Startup_snapshot(directory=join(directory, 'snapshot'), 
+                                    exchange_info_path=exchange_info_path, 
+                                    shortest_paths_path=shortest_paths_path)
+        _, save_time = time_function(snapshot.save, reference_info, reference_paths)
+        (new_info, new_paths), new_time = time_function(snapshot.load)
+        identical = reference_info.equals(new_info) and \
+            list(reference_info.dtypes) == list(new_info.dtypes) and \
+            list(reference_paths) == list(new_paths)
+        for (priority, paths) in reference_paths.items():
+            for (from_asset, from_paths) in paths.items():
+                identical &= sorted(from_paths) == sorted(new_paths[priority][from_asset])
+                for (to_asset, path) in from_paths.items():
+                    identical &= path == new_paths[priority][from_asset][to_asset]
+    print('{} pairs, {} priorities.'.format(len(exchange_info), len(reference_paths)))
+    print('Snapshot: {:.3f} s (saved in {:.3f} s), CSV and pickle: {:.3f} s.'.format(
+        new_time, save_time, reference_time))
+    print('Identical state: {}'.format(identical))
+
+def get_import_times(modules: List[str]) -> Dict[str, Tuple[int, int]]:
+    """(self, cumulative) time in us of every module loaded by importing modules in a new interpreter."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + ', '.join(modules)], 
+                            cwd=dirname(abspath(__file__)), capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and not line.endswith('imported package'):
+            (self_us, cumulative_us, module) = line[len('import time:'):].split('|')
+            times[module.strip()] = (int(self_us), int(cumulative_us))
+    if result.returncode != 0:
+        print('Import failed: {}'.format(result.stderr.strip().splitlines()[-1]))
+    return times
+
+def benchmark_imports(args: argparse.Namespace) -> None:
+    entry_points = {'crypto_logger_5s.py': ['crypto_logger_5s'], 
+                    # crypto_trader.py starts trading when imported.
+                    'crypto_trader.py': ['utils.trader.context', 'utils.trader.trade']}
+    heavy_packages = ['scipy', 'matplotlib', 'pandas_ta', 'talib', 'paramiko', 'binance']
+    for (entry_point, modules) in entry_points.items():
+        times = get_import_times(modules)
+        packages = {}
+        for (module, (self_us, _)) in times.items():
+            package = module.split('.')[0]
+            packages[package] = packages.get(package, 0) + self_us
+        print('{}: {:.3f} s, {} modules.'.format(entry_point, sum(packages.values()) / 1e6, len(times)))
+        for (package, self_us) in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print('    {:<32} {:8.3f} s'.format(package, self_us / 1e6))
+        utils_modules = sorted([(module, cumulative_us) for (module, (_, cumulative_us)) in times.items() 
+                                if module.startswith('utils.')], key=lambda item: -item[1])
+        for (module, cumulative_us) in utils_modules[:args.top]:
+            print('    {:<32} {:8.3f} s cumulative'.format(module, cumulative_us / 1e6))
+        print('    Heavy packages loaded: {}'.format(
+            ', '.join(package for package in heavy_packages if package in packages) or 'none'))
+
+def benchmark_ring(args: argparse.Namespace) -> None:
+    dataset = get_ohlcv(rows=args.buffer_size + args.ticks, symbols=args.symbols, frequency='5s')
+    csv_time, full_time, new_time, identical = 0, 0, 0, True
+    with TemporaryDirectory() as directory:
+        producer = Ring_buffer(join(directory, 'producer_ring'), capacity=args.buffer_size)
+        consumer = Ring_buffer(producer.path, readonly=True)
+        for tick in tqdm(range(args.ticks), unit='tick'):
+            published = dataset.iloc[tick:tick + args.buffer_size]
+            producer.update(published)
+            published.to_csv(join(directory, 'producer.txt'))
+            reference, elapsed = time_function(pd.read_csv, join(directory, 'producer.txt'), 
+                                               header=[0, 1], index_col=0)
+            csv_time += elapsed
+            full, elapsed = time_function(lambda: Ring_buffer(producer.path, readonly=True).to_frame())
+            full_time += elapsed
+            new, elapsed = time_function(consumer.read_latest)
+            new_time += elapsed
+            identical &= new.equals(full) and new.columns.equals(full.columns)
+    print('{} ticks of {} symbols ({} rows kept).'.format(args.ticks, args.symbols, args.buffer_size))
+    print('New rows: {:.3f} s, all rows: {:.3f} s, CSV: {:.3f} s.'.format(new_time, full_time, csv_time))
+    print('Identical datasets: {}'.format(identical))
+
+def merge_reference(old_dataset: pd.DataFrame, dataset: pd.DataFrame, buffer_size: int) -> pd.DataFrame:
+    """Previous raw Crypto_logger_base.get_and_put_next merge, over the whole buffer."""
+    if old_dataset is not None:
+        dataset = pd.concat([old_dataset, dataset], axis='index', join='outer')
+    dataset = dataset.copy().reset_index()
+    dataset = dataset.drop_duplicates(subset=['symbol', 'count'], keep='first', ignore_index=True)
+    dataset = dataset.set_index('date')
+    return dataset.tail(buffer_size)
+
+def get_tickers(symbols: int, tick: int, counts: np.ndarray, generator: np.random.RandomState) -> pd.DataFrame:
+    """Raw ticker rows of one tick, only some symbols having traded since the previous one."""
+    counts += generator.rand(symbols) < 0.3
+    date = pd.Timestamp('2022-01-01') + pd.Timedelta(seconds=5 * tick)
+    return pd.DataFrame({'symbol': ['SYMBOL{}'.format(i) for i in range(symbols)], 
+                         'close': generator.uniform(0.01, 100, symbols), 
+                         'count': counts.copy()}, 
+                        index=pd.DatetimeIndex([date] * symbols, name='date'))
+
+def benchmark_merge(args: argparse.Namespace) -> None:
+    generator = np.random.RandomState(0)
+    counts = np.zeros(args.symbols, dtype=np.int64)
+    merge = Incremental_merge(key=['symbol', 'count'], size=args.buffer_size)
+    (reference, new) = (None, None)
+    reference_time, new_time, identical = 0, 0, True
+    for tick in tqdm(range(args.ticks), unit='tick'):
+        tickers = get_tickers(args.symbols, tick, counts, generator)
+        reference, elapsed = time_function(merge_reference, reference, tickers, args.buffer_size)
+        reference_time += elapsed
+        new, elapsed = time_function(merge.merge, new, tickers)
+        new_time += elapsed
+        identical &= reference.equals(new) and reference.index.equals(new.index)
+    print('{} ticks of {} symbols ({} rows kept).'.format(args.ticks, args.symbols, args.buffer_size))
+    print('Incremental: {:.3f} s, whole buffer: {:.3f} s.'.format(new_time, reference_time))
+    print('Identical datasets: {}'.format(identical))
+
+def benchmark_pipeline(args: argparse.Namespace) -> None:
+    results = {}
+    times = {}
+    for method in ['sequential', 'pipelined']:
+        generator = np.random.RandomState(0)
+        counts = np.zeros(args.symbols, dtype=np.int64)
+        merge = Incremental_merge(key=['symbol', 'count'], size=args.buffer_size)
+        ticks = iter(range(args.ticks))
+        window = None
+        results[method] = []
+        # Same stages as loop_loggers, fetching and publishing being waits on the network and disk.
+        def fetch() -> object:
+            time.sleep(args.fetch)
+            return next(ticks, Pipeline.done)
+        def normalize(tick: int) -> pd.DataFrame:
+            return get_tickers(args.symbols, tick, counts, generator)
+        def merge_next(tickers: pd.DataFrame) -> pd.DataFrame:
+            nonlocal window
+            window = merge.merge(window, tickers)
+            return window
+        def screen(dataset: pd.DataFrame) -> pd.DataFrame:
+            closes = dataset.groupby('symbol')['close'].agg(['first', 'last'])
+            moves = (100 * (closes['last'] / closes['first'] - 1)).abs()
+            return moves[moves > args.price_percent].sort_values(ascending=False).to_frame(name='last_price_move')
+        def publish(screened: pd.DataFrame) -> None:
+            time.sleep(args.publish)
+            results[method].append(screened)
+        stages = [('fetch', fetch), ('normalize', normalize), ('merge', merge_next), 
+                  ('screen', screen), ('publish', publish)]
+        start_time = time.time()
+        if method == 'sequential':
+            for _ in range(args.ticks):
+                result = fetch()
+                for (name, function) in stages[1:]:
+                    result = function(result)
+        else:
+            pipeline = Pipeline(stages=stages, maxsize=1)
+            pipeline.start().join()
+            timings = pipeline.get_timings()
+        times[method] = time.time() - start_time
+    identical = len(results['sequential']) == len(results['pipelined']) and \
+                all(reference.equals(new) for (reference, new) in zip(results['sequential'], results['pipelined']))
+    print('{} ticks of {} symbols ({} rows kept).'.format(args.ticks, args.symbols, args.buffer_size))
+    print('Time per stage: {}.'.format(', '.join('{} {:.3f} s'.format(name, elapsed) 
+                                                 for (name, elapsed) in timings.items())))
+    for (method, elapsed) in times.items():
+        print('{}: {:.3f} s per tick.'.format(method.capitalize(), elapsed / args.ticks))
+    print('Identical screened sets: {}'.format(identical))
+
+def benchmark_cascade(args: argparse.Namespace) -> None:
+    levels = {'5s alone': [('5s', 60)], 
+              'cascade': [('5s', 60), ('1min', 1500), ('30min', 60), ('1h', 60), ('1d', 60)]}
+    times = {}
+    directory = os.getcwd()
+    with TemporaryDirectory() as temporary_directory:
+        # The loggers keep their logs under ./crypto_logs.
+        os.chdir(temporary_directory)
+        try:
+            for (name, intervals) in levels.items():
+                generator = np.random.RandomState(0)
+                counts = np.zeros(args.symbols, dtype=np.int64)
+                merge = Incremental_merge(key=['symbol', 'count'], size=args.buffer_size)
+                cascade = Crypto_logger_cascade(intervals=intervals, interval_input='5s', 
+                                                input_log_name='input', log_format='csv')
+                # Every level starts from a full buffer ending before the first tick, as in steady state.
+                for (interval, buffer_size) in intervals:
+                    history = get_ohlcv(rows=buffer_size, symbols=args.symbols, frequency=interval)
+                    history.index = history.index - (history.index[-1] - pd.Timestamp('2022-01-01')) - \
+                        pd.Timedelta(interval)
+                    cascade.datasets[interval] = history
+                (window, times[name]) = (None, 0.0)
+                for tick in tqdm(range(args.ticks), unit='tick', desc=name):
+                    tickers = get_tickers(args.symbols, tick, counts, generator)
+                    tickers['rolling_base_volume'] = counts * 10.0
+                    tickers['rolling_quote_volume'] = counts * tickers['close']
+                    window = merge.merge(window, tickers)
+                    # The first level is resampled from the raw window once it spans a few bars.
+                    if tick >= 3:
+                        (_, elapsed) = time_function(cascade.get_and_put_next, dataset=window)
+                        times[name] += elapsed
+        finally:
+            os.chdir(directory)
+    print('{} ticks of {} symbols.'.format(args.ticks, args.symbols))
+    for (name, elapsed) in times.items():
+        print('{}: {:.4f} s per tick.'.format(name.capitalize(), elapsed / (args.ticks - 3)))
+    print('Cascade / 5s alone: {:.2f}'.format(times['cascade'] / times['5s alone']))
+
+def get_screened(symbols: int, generator: np.random.RandomState) -> pd.DataFrame:
+    """Random screened set, as logged by Crypto_logger_input.filter_movers."""
+    symbols = generator.choice(symbols, generator.randint(1, symbols), replace=False)
+    return pd.DataFrame({'symbol': ['SYMBOL{}'.format(i) for i in symbols], 
+                         'close': generator.uniform(0.01, 100, symbols.size), 
+                         'count': generator.randint(0, 100000, symbols.size), 
+                         'last_price_move': generator.uniform(0, 20, symbols.size), 
+                         'last_volume_move': generator.uniform(0, 20, symbols.size)}, 
+                        index=pd.DatetimeIndex([pd.Timestamp.now().floor('s')] * symbols.size, name='date'))
+
+def get_decision(tradable_pairs: pd.DataFrame) -> str:
+    """Asset choose_to_asset would test first."""
+    return tradable_pairs.sort_values(by='last_price_move', ascending=False)['symbol'].iat[0]
+
+def benchmark_signals(args: argparse.Namespace) -> None:
+    generator = np.random.RandomState(0)
+    sets = [get_screened(args.symbols, generator) for _ in range(args.sets)]
+    latencies = {'push': [], 'poll': []}
+    done = threading.Event()
+    with TemporaryDirectory() as directory:
+        path = join(directory, 'crypto_output_log_1min_screened.txt')
+        publisher = Signal_publisher(url='tcp://127.0.0.1:{}'.format(args.port))
+        subscriber = Signal_subscriber(url='tcp://127.0.0.1:{}'.format(args.port))
+        published = {}
+        def push() -> None:
+            """Trader loop on the channel: decide as soon as a set arrives."""
+            while not done.is_set():
+                tradable_pairs = subscriber.receive(timeout=0.1)
+                if tradable_pairs is not None and subscriber.sequence in published:
+                    get_decision(tradable_pairs)
+                    latencies['push'].append(time.time() - published.pop(subscriber.sequence))
+        def poll() -> None:
+            """Previous trader loop: read the whole log every second (without the SSH round trip)."""
+            seen = None
+            while not done.is_set():
+                try:
+                    tradable_pairs = pd.read_csv(path, index_col=0)
+                    if seen != tradable_pairs['count'].sum():
+                        seen = tradable_pairs['count'].sum()
+                        get_decision(tradable_pairs)
+                        latencies['poll'].append(time.time() - written)
+                except (FileNotFoundError, pd.errors.EmptyDataError, IndexError):
+                    pass
+                time.sleep(args.poll_interval)
+        # Let the subscription reach the publisher.
+        time.sleep(0.5)
+        threads = [threading.Thread(target=push), threading.Thread(target=poll)]
+        for thread in threads:
+            thread.start()
+        for screened in tqdm(sets, unit='set'):
+            written = time.time()
+            screened.to_csv(path)
+            published[publisher.sequence + 1] = time.time()
+            publisher.publish(screened)
+            time.sleep(args.poll_interval * generator.uniform(1, 2))
+        done.set()
+        for thread in threads:
+            thread.join()
+        # Once the publisher is gone, the trader must notice and go back to polling.
+        subscriber.max_age = args.poll_interval
+        publisher.publish(sets[-1])
+        subscriber.receive(timeout=args.poll_interval)
+        silent_before = subscriber.is_silent()
+        publisher.close()
+        time.sleep(args.poll_interval)
+        subscriber.receive(timeout=0.1)
+        silent_after = subscriber.is_silent()
+        subscriber.close()
+    print('{} screened sets of at most {} symbols.'.format(args.sets, args.symbols))
+    for (path_name, values) in latencies.items():
+        print('{}: {} decisions, latency median {:.4f} s, max {:.4f} s.'.format(
+            path_name.capitalize(), len(values), np.median(values), np.max(values)))
+    print('Silent channel detected after max_age: {}'.format(not silent_before and silent_after))
+
+def benchmark_ssh(args: argparse.Namespace) -> None:
+    generator = np.random.RandomState(0)
+    screened = get_screened(args.symbols, generator)
+    with TemporaryDirectory() as directory:
+        logs = ['~/crypto_output_log_1min_screened.txt', '~/crypto_output_log_1min.txt']
+        paths = [join(directory, log[2:]) for log in logs]
+        publisher = Log_publisher(paths[0], fsync='never')
+        publisher.publish(screened)
+        screened.to_csv(paths[1])
+        clients = {'cat': Ssh(incremental=False, ssh=Local_ssh_client(
+                              directory, latency=args.latency, bandwidth=args.bandwidth * 1e6)), 
+                   'incremental': Ssh(incremental=True, ssh=Local_ssh_client(
+                              directory, latency=args.latency, bandwidth=args.bandwidth * 1e6))}
+        times = {name: 0.0 for name in clients}
+        identical = True
+        for _ in tqdm(range(args.polls), unit='poll'):
+            if generator.uniform() < args.change:
+                # The screened log is published again, the other one is appended to.
+                screened = get_screened(args.symbols, generator)
+                publisher.publish(screened)
+                get_screened(args.symbols, generator).to_csv(paths[1], mode='a', header=False)
+            frames = {}
+            for (name, ssh) in clients.items():
+                start_time = time.time()
+                frames[name] = [ssh.get_logs_from_server(server_log=log) for log in logs]
+                times[name] += time.time() - start_time
+            identical &= all(reference.equals(new) for (reference, new) in 
+                             zip(frames['cat'], frames['incremental']))
+            time.sleep(args.poll_interval)
+    print('{} polls of 2 logs, {:.0%} of them after a change.'.format(args.polls, args.change))
+    for (name, ssh) in clients.items():
+        print('{}: {:.1f} kB transferred, {:.4f} s per poll.'.format(
+            name.capitalize(), ssh.transferred / 1e3, times[name] / args.polls))
+    print('Identical datasets: {}'.format(identical))
+
+def get_ticker_frames(symbols: int, 
+                      frames: int, 
+                      generator: np.random.RandomState) -> Tuple[List[str], Dict[str, Dict[str, object]]]:
+    """!ticker@arr frames of the symbols that changed, and the table they add up to."""
+    start_ms = int(time.time() * 1000)
+    (messages, table) = ([], {})
+    for i in range(frames):
+        frame = []
+        for j in np.flatnonzero(generator.rand(symbols) < 0.5):
+            ticker = {key: '{:.8f}'.format(generator.uniform(0.01, 100)) for key in Ticker_stream.fields}
+            ticker.update({'e': '24hrTicker', 'E': start_ms + 1000 * i, 's': 'SYMBOL{}'.format(j), 
+                           'O': start_ms - 86400000, 'C': start_ms + 1000 * i, 'F': 0, 'L': i, 'n': i})
+            frame.append(ticker)
+            table[ticker['s']] = {name: ticker[key] for (key, name) in Ticker_stream.fields.items()}
+        messages.append(json.dumps(frame))
+    return messages, table
+
+def benchmark_stream(args: argparse.Namespace) -> None:
+    generator = np.random.RandomState(0)
+    (frames, table) = get_ticker_frames(args.symbols, args.frames, generator)
+    rest_tickers = [{'symbol': 'REST'}]
+    client = SimpleNamespace(get_ticker=lambda: rest_tickers)
+    with TemporaryDirectory() as directory:
+        frames_path = join(directory, 'ticker_frames.txt')
+        with open(frames_path, 'w') as f:
+            f.write('\n'.join(frames) + '\n')
+        server = Ticker_replay_server(frames_path, port=args.port, speed=0, loop_frames=False).start()
+        stream = Ticker_stream(url=server.url, max_age=args.max_age).start()
+        deadline = time.time() + 10
+        while stream.frame_count < len(frames) and time.time() < deadline:
+            time.sleep(0.01)
+        # Read before the stream reconnects and replays the frames again.
+        tickers = stream.get_ticker(timeout=1.0)
+        identical = sorted(tickers, key=lambda ticker: ticker['symbol']) == \
+            [table[symbol] for symbol in sorted(table)]
+        server.stop()
+        time.sleep(args.max_age + 0.5)
+        try:
+            stream.get_ticker(timeout=1.0)
+            stale = False
+        except TimeoutError:
+            stale = True
+        # The logger falls back to the API for the ticks the stream can't serve.
+        logger = SimpleNamespace(ticker_stream=stream, interval='1s', client=client)
+        fallback = Crypto_logger_input.fetch(logger) is rest_tickers
+        stream.stop()
+        never_connected = Ticker_stream(url='ws://localhost:{}'.format(args.port), 
+                                        max_age=args.max_age).start()
+        try:
+            never_connected.get_ticker(timeout=0.5)
+            silent = False
+        except TimeoutError:
+            silent = True
+        logger.ticker_stream = never_connected
+        fallback &= Crypto_logger_input.fetch(logger) is rest_tickers
+        never_connected.stop()
+    print('{} frames of at most {} symbols replayed.'.format(args.frames, args.symbols))
+    print('Streamed table identical: {}'.format(identical))
+    print('Stale stream detected after max_age: {}'.format(stale))
+    print('Stream never connected detected: {}'.format(silent))
+    print('Fell back to client.get_ticker(): {}'.format(fallback))
+
+def benchmark_publication(args: argparse.Namespace) -> None:
+    generator = np.random.RandomState(0)
+    sets = [get_screened(args.symbols, generator) for _ in range(8)]
+    counts = {}
+    with TemporaryDirectory() as directory:
+        for method in ['to_csv', 'publish']:
+            path = join(directory, method + '.txt')
+            publisher = Log_publisher(path, fsync=args.fsync)
+            done = threading.Event()
+            def write() -> None:
+                for i in range(args.writes + 1):
+                    if method == 'to_csv':
+                        sets[i % len(sets)].to_csv(path)
+                    else:
+                        publisher.publish(sets[i % len(sets)])
+                    time.sleep(args.write_interval)
+                done.set()
+            counts[method] = {'reads': 0, 'parsed': 0, 'torn': 0, 'time': 0.0}
+            reader = Log_reader(path)
+            thread = threading.Thread(target=write)
+            thread.start()
+            while not exists(path):
+                time.sleep(args.read_interval)
+            while not done.is_set():
+                read_time = time.time()
+                try:
+                    if method == 'to_csv':
+                        dataset = pd.read_csv(path, index_col=0)
+                        counts[method]['parsed'] += 1
+                    else:
+                        version = reader.version
+                        dataset = reader.read(index_col=0)
+                        counts[method]['parsed'] += reader.version != version
+                    # Every set written has its count column summing to a known value.
+                    if not any(dataset['count'].sum() == screened['count'].sum() for screened in sets):
+                        counts[method]['torn'] += 1
+                except (pd.errors.EmptyDataError, IndexError, KeyError):
+                    counts[method]['torn'] += 1
+                counts[method]['reads'] += 1
+                counts[method]['time'] += time.time() - read_time
+                time.sleep(args.read_interval)
+            thread.join()
+    print('{} writes of screened sets of at most {} symbols, read every {} s.'.format(
+        args.writes, args.symbols, args.read_interval))
+    for (method, count) in counts.items():
+        print('{}: {} reads, {} parsed, {} torn, {:.2f} ms per read.'.format(
+            method, count['reads'], count['parsed'], count['torn'], 
+            1000 * count['time'] / count['reads']))
+
+def benchmark_writer(args: argparse.Namespace) -> None:
+    generator = np.random.RandomState(0)
+    columns = pd.MultiIndex.from_product([['SYMBOL{}'.format(i) for i in range(args.symbols)], 
+                                          ['open', 'high', 'low', 'close', 'volume']])
+    dates = pd.date_range('2021-01-01', periods=args.rows + args.ticks, freq='5s', name='date')
+    values = generator.uniform(0.01, 100, (args.rows + args.ticks, len(columns)))
+    loop_times = {}
+    identical = True
+    with TemporaryDirectory() as directory:
+        for method in ['inline', 'background']:
+            publishers = [Log_publisher(join(directory, '{}_{}.txt'.format(method, i)), fsync='never') 
+                          for i in range(2)]
+            writer = Background_writer(max_pending=16) if method == 'background' else None
+            loop_times[method] = []
+            for tick in tqdm(range(args.ticks), unit='tick', desc=method):
+                start_time = time.time()
+                # Fetch and compute, then log (as in loop_loggers).
+                time.sleep(args.fetch)
+                datasets = [pd.DataFrame(values[tick:tick + args.rows], index=dates[tick:tick + args.rows], 
+                                         columns=columns), 
+                            pd.DataFrame(values[tick:tick + args.rows // 10], 
+                                         index=dates[tick:tick + args.rows // 10], columns=columns)]
+                for (publisher, dataset) in zip(publishers, datasets):
+                    if writer is None:
+                        publisher.publish(dataset)
+                    else:
+                        writer.submit(publisher.path, publisher.publish, dataset)
+                loop_times[method].append(time.time() - start_time)
+            if writer is not None:
+                writer.close()
+                coalesced = writer.coalesced
+            for (publisher, dataset) in zip(publishers, datasets):
+                identical &= np.allclose(pd.read_csv(publisher.path, header=[0, 1], index_col=0).to_numpy(), 
+                                         dataset.to_numpy())
+    print('{} ticks of {} rows of {} symbols, fetched in {} s.'.format(
+        args.ticks, args.rows, args.symbols, args.fetch))
+    for (method, times) in loop_times.items():
+        print('{}: {:.3f} s per loop.'.format(method.capitalize(), np.mean(times)))
+    print('Writes coalesced: {}'.format(coalesced))
+    print('Latest logs identical: {}'.format(identical))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    subparser = subparsers.add_parser('shortest_paths')
+    subparser.add_argument('--assets', type=int, default=150)
+    subparser.add_argument('--pairs', type=int, default=600)
+    subparser.add_argument('--processes', type=int, default=1)
+    subparser.set_defaults(function=benchmark_shortest_paths)
+    subparser = subparsers.add_parser('resample')
+    subparser.add_argument('--symbols', type=int, default=500)
+    subparser.add_argument('--ticks', type=int, default=200)
+    subparser.add_argument('--frequency', default='5s')
+    subparser.add_argument('--interval', default='1min')
+    subparser.add_argument('--buffer_size', type=int, default=60)
+    subparser.add_argument('--steady_ticks', type=int, default=20)
+    subparser.set_defaults(function=benchmark_resample)
+    subparser = subparsers.add_parser('screen')
+    subparser.add_argument('--symbols', type=int, default=500)
+    subparser.set_defaults(function=benchmark_screen)
+    subparser = subparsers.add_parser('indicators')
+    subparser.add_argument('--symbols', type=int, default=100)
+    subparser.add_argument('--ticks', type=int, default=20)
+    subparser.add_argument('--buffer_size', type=int, default=300)
+    subparser.set_defaults(function=benchmark_indicators)
+    subparser = subparsers.add_parser('renko')
+    subparser.add_argument('--symbols', type=int, default=300)
+    subparser.add_argument('--charts', type=int, default=200)
+    subparser.set_defaults(function=benchmark_renko)
+    subparser = subparsers.add_parser('clean')
+    subparser.add_argument('--symbols', type=int, default=2000)
+    subparser.add_argument('--rows', type=int, default=1500)
+    subparser.set_defaults(function=benchmark_clean)
+    subparser = subparsers.add_parser('klines')
+    subparser.add_argument('--symbols', type=int, default=200)
+    subparser.add_argument('--period', type=int, default=2880)
+    subparser.set_defaults(function=benchmark_klines)
+    subparser = subparsers.add_parser('download')
+    subparser.add_argument('--symbols', type=int, default=20)
+    subparser.add_argument('--period', type=int, default=1000)
+    subparser.add_argument('--limit', type=int, default=100)
+    subparser.add_argument('--workers', type=int, default=4)
+    subparser.add_argument('--port', type=int, default=8766)
+    subparser.set_defaults(function=benchmark_download)
+    subparser = subparsers.add_parser('conversion')
+    subparser.add_argument('--assets', type=int, default=150)
+    subparser.add_argument('--pairs', type=int, default=600)
+    subparser.add_argument('--rows', type=int, default=300)
+    subparser.set_defaults(function=benchmark_conversion)
+    subparser = subparsers.add_parser('convert')
+    subparser.add_argument('--assets', type=int, default=150)
+    subparser.add_argument('--pairs', type=int, default=600)
+    subparser.add_argument('--ticks', type=int, default=20)
+    subparser.set_defaults(function=benchmark_convert)
+    subparser = subparsers.add_parser('snapshot')
+    subparser.add_argument('--assets', type=int, default=600)
+    subparser.add_argument('--pairs', type=int, default=2000)
+    subparser.set_defaults(function=benchmark_snapshot)
+    subparser = subparsers.add_parser('imports')
+    subparser.add_argument('--top', type=int, default=15)
+    subparser.set_defaults(function=benchmark_imports)
+    subparser = subparsers.add_parser('ring')
+    subparser.add_argument('--symbols', type=int, default=1000)
+    subparser.add_argument('--ticks', type=int, default=50)
+    subparser.add_argument('--buffer_size', type=int, default=60)
+    subparser.set_defaults(function=benchmark_ring)
+    subparser = subparsers.add_parser('merge')
+    subparser.add_argument('--symbols', type=int, default=2000)
+    subparser.add_argument('--ticks', type=int, default=100)
+    subparser.add_argument('--buffer_size', type=int, default=3000)
+    subparser.set_defaults(function=benchmark_merge)
+    subparser = subparsers.add_parser('cascade')
+    subparser.add_argument('--symbols', type=int, default=500)
+    subparser.add_argument('--ticks', type=int, default=200)
+    subparser.add_argument('--buffer_size', type=int, default=3000)
+    subparser.set_defaults(function=benchmark_cascade)
+    subparser = subparsers.add_parser('signals')
+    subparser.add_argument('--symbols', type=int, default=100)
+    subparser.add_argument('--sets', type=int, default=10)
+    subparser.add_argument('--port', type=int, default=5556)
+    subparser.add_argument('--poll_interval', type=float, default=1.0)
+    subparser.set_defaults(function=benchmark_signals)
+    subparser = subparsers.add_parser('publication')
+    subparser.add_argument('--symbols', type=int, default=500)
+    subparser.add_argument('--writes', type=int, default=200)
+    subparser.add_argument('--write_interval', type=float, default=0.02)
+    subparser.add_argument('--read_interval', type=float, default=0.001)
+    subparser.add_argument('--fsync', default='interval')
+    subparser.set_defaults(function=benchmark_publication)
+    subparser = subparsers.add_parser('writer')
+    subparser.add_argument('--symbols', type=int, default=200)
+    subparser.add_argument('--rows', type=int, default=300)
+    subparser.add_argument('--ticks', type=int, default=20)
+    subparser.add_argument('--fetch', type=float, default=0.1)
+    subparser.set_defaults(function=benchmark_writer)
+    subparser = subparsers.add_parser('pipeline')
+    subparser.add_argument('--symbols', type=int, default=2000)
+    subparser.add_argument('--ticks', type=int, default=30)
+    subparser.add_argument('--buffer_size', type=int, default=30000)
+    subparser.add_argument('--fetch', type=float, default=0.2)
+    subparser.add_argument('--publish', type=float, default=0.05)
+    subparser.add_argument('--price_percent', type=float, default=5.0)
+    subparser.set_defaults(function=benchmark_pipeline)
+    subparser = subparsers.add_parser('ssh')
+    subparser.add_argument('--symbols', type=int, default=100)
+    subparser.add_argument('--polls', type=int, default=60)
+    subparser.add_argument('--change', type=float, default=0.2)
+    subparser.add_argument('--latency', type=float, default=0.02)
+    subparser.add_argument('--bandwidth', type=float, default=1.0)
+    subparser.add_argument('--poll_interval', type=float, default=0.5)
+    subparser.set_defaults(function=benchmark_ssh)
+    subparser = subparsers.add_parser('stream')
+    subparser.add_argument('--symbols', type=int, default=200)
+    subparser.add_argument('--frames', type=int, default=50)
+    subparser.add_argument('--port', type=int, default=8765)
+    subparser.add_argument('--max_age', type=float, default=2.0)
+    subparser.set_defaults(function=benchmark_stream)
+    args = parser.parse_args()
+    args.function(args)
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,7 @@ from utils.exchange import Cryptocurrency_exchange
 from utils.conversion import get_timezone_offset_in_seconds
 from utils.conversion import precompute_shortest_paths
 from utils.conversion_table import get_conversion_table, get_new_tickers
+from utils.kline_cache import Kline_cache
 from utils.ohlcvs import download_pairs_bootstrapped
 from utils.bootstrap import bootstrap_loggers
 import os
@@ -60,9 +61,11 @@ def download_pairs_1min(
         -> List[pd.DataFrame]:
     global downloaded_pairs_1min
     print('Started downloaded_pairs_1min thread.')
+    kline_cache = Kline_cache(directory='crypto_klines', interval='1m', retention='7d')
+    kline_cache.compact()
     downloaded_pairs_1min = download_pairs_bootstrapped(
         client=client, assets=assets, interval='1m', 
-        offset_s=offset_s)
+        offset_s=offset_s, cache=kline_cache)
     print('Finished downloaded_pairs_1min thread.')
 
 def main():
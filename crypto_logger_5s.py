@@ -19,12 +19,19 @@
 # $ python -m cProfile -o crypto_logger.prof crypto_logger.py
 
 # Library imports.
-from typing import Dict, Union
+from typing import Dict, Tuple, Union
 from utils.crypto_logger_input import Crypto_logger_input
-from utils.crypto_logger_output import Crypto_logger_output
+from utils.crypto_logger_cascade import Crypto_logger_cascade
+from utils.background_writer import Background_writer
+from utils.pipeline import Pipeline
 import time
+import pandas as pd
 
-def init_loggers() -> Dict[str, Union[Crypto_logger_input, Crypto_logger_output]]:
+# (interval, buffer_size) of every output level, each one resampled from the previous one.
+# This is the only process logging them (the 1min level was crypto_output_logger_1min.py).
+intervals = [('5s', 60), ('1min', 1500), ('30min', 60), ('1h', 60), ('1d', 60)]
+
+def init_loggers() -> Dict[str, Union[Crypto_logger_input, Crypto_logger_cascade]]:
     """Main logger initialization."""
     #crypto_logger_input_5s = Crypto_logger_input(interval='5s', buffer_size=3000, 
     #                                             price_percent=5.0, volume_percent=0.0, 
@@ -32,168 +39,79 @@ def init_loggers() -> Dict[str, Union[Crypto_logger_input, Crypto_logger_output]
     crypto_logger_input_5s = Crypto_logger_input(interval='5s', buffer_size=3000, 
                                                  price_percent=10.0, volume_percent=0.0, 
                                                  as_pair=False, append=True, roll=10)
-    crypto_logger_output_5s = Crypto_logger_output(interval_input='5s', 
-                                                   interval='5s', 
-                                                   buffer_size=60, 
-                                                   input_log_name='input', 
-                                                   append=False, 
-                                                   roll=1000)
-    #crypto_logger_output_1min = Crypto_logger_output(interval_input='5s', 
-    #                                                 interval='1min', 
-    #                                                 buffer_size=1500, 
-    #                                                 input_log_name='output', 
-    #                                                 append=False, 
-    #                                                 roll=1000)
-    #crypto_logger_output_30min = Crypto_logger_output(interval_input='1min', 
-    #                                                  interval='30min', 
-    #                                                  buffer_size=60, 
-    #                                                  input_log_name='output', 
-    #                                                  append=False, 
-    #                                                  roll=1000)
-    #crypto_logger_output_1h = Crypto_logger_output(interval_input='30min', 
-    #                                               interval='1h', 
-    #                                               buffer_size=60, 
-    #                                               input_log_name='output', 
-    #                                               append=False, 
-    #                                               roll=1000)
-    #crypto_logger_output_1h = Crypto_logger_output(interval_input='1min', 
-    #                                               interval='1h', 
-    #                                               buffer_size=60, 
-    #                                               input_log_name='output', 
-    #                                               append=False, 
-    #                                               roll=1000)
-    #crypto_logger_output_1d = Crypto_logger_output(interval_input='1h', 
-    #                                               interval='1d', 
-    #                                               buffer_size=60, 
-    #                                               input_log_name='output', 
-    #                                               append=False, 
-    #                                               roll=1000)
+    crypto_logger_output = Crypto_logger_cascade(intervals=intervals, 
+                                                 interval_input='5s', 
+                                                 input_log_name='input', 
+                                                 append=False, 
+                                                 roll=1000, 
+                                                 publish_urls={'1min': 'tcp://*:5556'})
+    # Logs are written by one thread while the next tick is fetched.
+    writer = Background_writer(max_pending=16)
+    crypto_logger_input_5s.writer = writer
+    for logger in crypto_logger_output.loggers.values():
+        logger.writer = writer
     crypto_loggers = {
         'input_5s': crypto_logger_input_5s, 
-        'output_5s': crypto_logger_output_5s, 
-        #'output_1min': crypto_logger_output_1min, 
-        #'output_30min': crypto_logger_output_30min, 
-        #'output_1h': crypto_logger_output_1h, 
-        #'output_1d': crypto_logger_output_1d
+        'output': crypto_logger_output
     }
     return crypto_loggers
 
-def loop_loggers(crypto_loggers: Dict[str, Union[Crypto_logger_input, Crypto_logger_output]]) -> None:
-    """Main logger loop."""
+def loop_loggers(crypto_loggers: Dict[str, Union[Crypto_logger_input, Crypto_logger_cascade]]) -> None:
+    """Main logger loop: fetch, normalize, merge/resample, screen and publish run concurrently, one tick apart."""
     print('Starting crypto loggers.')
-    input_5s = crypto_loggers['input_5s'].maybe_get_from_file(dataset=None, inputs=False, screened=False)
-    output_5s = crypto_loggers['output_5s'].maybe_get_from_file(dataset=None, inputs=False, screened=False)
-    #output_1min = crypto_loggers['output_1min'].maybe_get_from_file(dataset=None, inputs=False, screened=False)
-    #output_30min = crypto_loggers['output_30min'].maybe_get_from_file(dataset=None, inputs=False, screened=False)
-    #output_1h = crypto_loggers['output_1h'].maybe_get_from_file(dataset=None, inputs=False, screened=False)
-    #output_1d = crypto_loggers['output_1d'].maybe_get_from_file(dataset=None, inputs=False, screened=False)
-    input_5s_screened = crypto_loggers['input_5s'].maybe_get_from_file(dataset=None, inputs=False, screened=True)
-    output_5s_screened = crypto_loggers['output_5s'].maybe_get_from_file(dataset=None, inputs=False, screened=True)
-    #output_1min_screened = crypto_loggers['output_1min'].maybe_get_from_file(dataset=None, inputs=False, screened=True)
-    #output_30min_screened = crypto_loggers['output_30min'].maybe_get_from_file(dataset=None, inputs=False, screened=True)
-    #output_1h_screened = crypto_loggers['output_1h'].maybe_get_from_file(dataset=None, inputs=False, screened=True)
-    #output_1d_screened = crypto_loggers['output_1d'].maybe_get_from_file(dataset=None, inputs=False, screened=True)
+    input_logger = crypto_loggers['input_5s']
+    output_logger = crypto_loggers['output']
+    input_5s = input_logger.maybe_get_from_file(dataset=None, inputs=False, screened=False)
+    input_5s_screened = input_logger.maybe_get_from_file(dataset=None, inputs=False, screened=True)
+    output_logger.maybe_get_from_file()
+    published = time.time()
+
+    # Every stage gets what the previous one returned for the same tick.
+    def merge(dataset: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+        nonlocal input_5s
+        input_5s = input_logger.get_and_put_next(old_dataset=input_5s, dataset=dataset)
+        return input_5s, dict(output_logger.get_and_put_next(dataset=input_5s))
+
+    def screen(merged: Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]) \
+            -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]]:
+        nonlocal input_5s_screened
+        (dataset, datasets) = merged
+        input_5s_screened, live_filtered = \
+            input_logger.screen_next(old_dataset_screened=input_5s_screened, dataset_screened=None, 
+                                     dataset=dataset, live_filtered=None)
+        datasets_screened = output_logger.screen_next(dataset_screened=input_5s_screened, 
+                                                      live_filtered=live_filtered, datasets=datasets)
+        return dataset, input_5s_screened, datasets, dict(datasets_screened)
+
+    def publish(screened: Tuple[pd.DataFrame, pd.DataFrame, Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]]) -> None:
+        nonlocal published
+        (dataset, dataset_screened, datasets, datasets_screened) = screened
+        input_logger.log_next(dataset=dataset, dataset_screened=dataset_screened)
+        output_logger.log_next(dataset=True, dataset_screened=True, 
+                               datasets=datasets, datasets_screened=datasets_screened)
+        (t1, published) = (published, time.time())
+        print('Time spent for one loop:', published - t1)
+        print('Time spent per stage:', ', '.join('{} {:.3f}'.format(name, elapsed) 
+                                                   for (name, elapsed) in pipeline.get_timings(latest=True).items()))
+
+    pipeline = Pipeline(stages=[('fetch', input_logger.fetch), 
+                                ('normalize', input_logger.normalize), 
+                                ('merge', merge), 
+                                ('screen', screen), 
+                                ('publish', publish)], maxsize=1)
     try:
-        t2 = time.time()
-        while True:
-            t1 = t2
-            t2 = time.time()
-            print('Time spent for one loop:', t2 - t1)
-            input_5s = crypto_loggers['input_5s'].get_and_put_next(old_dataset=input_5s, dataset=None)
-            output_5s = crypto_loggers['output_5s'].get_and_put_next(old_dataset=output_5s, dataset=input_5s)
-            #output_1min = crypto_loggers['output_1min'].get_and_put_next(old_dataset=output_1min, dataset=output_5s)
-            #output_30min = crypto_loggers['output_30min'].get_and_put_next(old_dataset=output_30min, dataset=output_1min)
-            #output_1h = crypto_loggers['output_1h'].get_and_put_next(old_dataset=output_1h, dataset=output_30min)
-            #output_1h = crypto_loggers['output_1h'].get_and_put_next(old_dataset=output_1h, dataset=output_1min)
-            #output_1d = crypto_loggers['output_1d'].get_and_put_next(old_dataset=output_1d, dataset=output_1h)
-            #input_5s = crypto_loggers['input_5s'].get_and_put_next(old_dataset=input_5s, dataset=None)
-            input_5s_screened, live_filtered = \
-                crypto_loggers['input_5s'].screen_next(old_dataset_screened=input_5s_screened, dataset_screened=None, 
-                                                       dataset=input_5s, live_filtered=None)
-            output_5s_screened, _ = \
-                crypto_loggers['output_5s'].screen_next(old_dataset_screened=output_5s_screened, 
-                                                        dataset_screened=input_5s_screened, 
-                                                        dataset=output_5s, live_filtered=live_filtered)
-            #output_1min_screened, _ = \
-            #    crypto_loggers['output_1min'].screen_next(old_dataset_screened=output_1min_screened, 
-            #                                              dataset_screened=output_5s_screened, 
-            #                                              dataset=output_1min, live_filtered=None)
-            #output_30min_screened, _ = \
-            #    crypto_loggers['output_30min'].screen_next(old_dataset_screened=output_30min_screened, 
-            #                                               dataset_screened=output_1min_screened, 
-            #                                               dataset=output_30min, live_filtered=None)
-            #output_1h_screened, _ = \
-            #    crypto_loggers['output_1h'].screen_next(old_dataset_screened=output_1h_screened, 
-            #                                            dataset_screened=output_30min_screened, 
-            #                                            dataset=output_1h, live_filtered=None)
-            #output_1h_screened, _ = \
-            #    crypto_loggers['output_1h'].screen_next(old_dataset_screened=output_1h_screened, 
-            #                                            dataset_screened=output_1min_screened, 
-            #                                            dataset=output_1h, live_filtered=None)
-            #output_1d_screened, _ = \
-            #    crypto_loggers['output_1d'].screen_next(old_dataset_screened=output_1d_screened, 
-            #                                            dataset_screened=output_1h_screened, 
-            #                                            dataset=output_1d, live_filtered=None)
-            crypto_loggers['input_5s'].log_next(dataset=input_5s, dataset_screened=input_5s_screened)
-            #crypto_loggers['output_5s'].log_next(dataset=None, dataset_screened=output_5s_screened)
-            crypto_loggers['output_5s'].log_next(dataset=output_5s, dataset_screened=output_5s_screened)
-            #crypto_loggers['output_1min'].log_next(dataset=None, dataset_screened=output_1min_screened)
-            #crypto_loggers['output_30min'].log_next(dataset=None, dataset_screened=output_30min_screened)
-            #crypto_loggers['output_1h'].log_next(dataset=None, dataset_screened=output_1h_screened)
-            #crypto_loggers['output_1d'].log_next(dataset=None, dataset_screened=output_1d_screened)
+        pipeline.start().join()
     except (KeyboardInterrupt, SystemExit):
         print('Saving latest complete dataset...')
-        input_5s = crypto_loggers['input_5s'].get_and_put_next(old_dataset=input_5s, dataset=None)
-        output_5s = crypto_loggers['output_5s'].get_and_put_next(old_dataset=output_5s, dataset=input_5s)
-        #output_1min = crypto_loggers['output_1min'].get_and_put_next(old_dataset=output_1min, dataset=output_5s)
-        #output_30min = crypto_loggers['output_30min'].get_and_put_next(old_dataset=output_30min, dataset=output_1min)
-        #output_1h = crypto_loggers['output_1h'].get_and_put_next(old_dataset=output_1h, dataset=output_30min)
-        #output_1h = crypto_loggers['output_1h'].get_and_put_next(old_dataset=output_1h, dataset=output_1min)
-        #output_1d = crypto_loggers['output_1d'].get_and_put_next(old_dataset=output_1d, dataset=output_1h)
-        crypto_loggers['input_5s'].log_next(dataset=input_5s, dataset_screened=None)
-        crypto_loggers['output_5s'].log_next(dataset=output_5s, dataset_screened=None)
-        #crypto_loggers['output_1min'].log_next(dataset=output_1min, dataset_screened=None)
-        #crypto_loggers['output_30min'].log_next(dataset=output_30min, dataset_screened=None)
-        #crypto_loggers['output_1h'].log_next(dataset=output_1h, dataset_screened=None)
-        #crypto_loggers['output_1d'].log_next(dataset=output_1d, dataset_screened=None)
-        input_5s_screened, live_filtered = \
-            crypto_loggers['input_5s'].screen_next(old_dataset_screened=input_5s_screened, dataset_screened=None, 
-                                                   dataset=input_5s, live_filtered=None)
-        output_5s_screened, _ = \
-            crypto_loggers['output_5s'].screen_next(old_dataset_screened=output_5s_screened, 
-                                                    dataset_screened=input_5s_screened, 
-                                                    dataset=output_5s, live_filtered=live_filtered)
-        #output_1min_screened, _ = \
-        #    crypto_loggers['output_1min'].screen_next(old_dataset_screened=output_1min_screened, 
-        #                                              dataset_screened=output_5s_screened, 
-        #                                              dataset=output_1min, live_filtered=None)
-        #output_30min_screened, _ = \
-        #    crypto_loggers['output_30min'].screen_next(old_dataset_screened=output_30min_screened, 
-        #                                               dataset_screened=output_1min_screened, 
-        #                                               dataset=output_30min, live_filtered=None)
-        #output_1h_screened, _ = \
-        #    crypto_loggers['output_1h'].screen_next(old_dataset_screened=output_1h_screened, 
-        #                                            dataset_screened=output_30min_screened, 
-        #                                            dataset=output_1h, live_filtered=None)
-        #output_1h_screened, _ = \
-        #    crypto_loggers['output_1h'].screen_next(old_dataset_screened=output_1h_screened, 
-        #                                            dataset_screened=output_1min_screened, 
-        #                                            dataset=output_1h, live_filtered=None)
-        #output_1d_screened, _ = \
-        #    crypto_loggers['output_1d'].screen_next(old_dataset_screened=output_1d_screened, 
-        #                                            dataset_screened=output_1h_screened, 
-        #                                            dataset=output_1d, live_filtered=None)
-        crypto_loggers['input_5s'].log_next(dataset=None, dataset_screened=input_5s_screened)
-        crypto_loggers['output_5s'].log_next(dataset=None, dataset_screened=output_5s_screened)
-        #crypto_loggers['output_1min'].log_next(dataset=None, dataset_screened=output_1min_screened)
-        #crypto_loggers['output_30min'].log_next(dataset=None, dataset_screened=output_30min_screened)
-        #crypto_loggers['output_1h'].log_next(dataset=None, dataset_screened=output_1h_screened)
-        #crypto_loggers['output_1d'].log_next(dataset=None, dataset_screened=output_1d_screened)
+        # The ticks already fetched still go through every stage.
+        pipeline.stop()
         print('User terminated crypto logger process.')
     except Exception as e:
         print(e)
     finally:
         # Release resources.
+        print('Writing pending logs...')
+        input_logger.writer.close()
         print('Crypto logger processes done.')
 
 def main() -> None:
@@ -51,12 +51,6 @@ setup(
                 language="c++", 
             ), 
         [
-            Extension(
-                name="crypto_output_logger_1min", 
-                sources=["crypto_output_logger_1min.py"], 
-                extra_compile_args=extra_compile_args, 
-                language="c++", 
-            ), 
             Extension(
                 name="crypto_trader", 
                 sources=["crypto_trader.py"], 
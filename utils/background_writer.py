@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/background_writer.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Thread writing the logs off the logger loop, keeping only the latest write per file.
+
+# Library imports.
+from typing import Callable, Hashable, Optional
+from collections import OrderedDict
+import threading
+import time
+
+# Class definition.
+class Background_writer:
+    def __init__(self, max_pending: int = 16):
+        """
+        Writes run one at a time on a thread, in the order they were submitted. A write
+        submitted for a file that is still waiting replaces the queued one (the older
+        snapshot is superseded anyway), so a slow disk never makes the loop wait, unless
+        max_pending different files are waiting.
+
+        :param max_pending: number of files that can wait to be written.
+        """
+        self.max_pending = max_pending
+        self.pending = OrderedDict()
+        self.condition = threading.Condition()
+        self.busy = False
+        self.closed = False
+        self.error = None
+        self.written = 0
+        self.coalesced = 0
+        self.write_time = 0.0
+        self.thread = threading.Thread(target=self.run, name='background_writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, key: Hashable, function: Callable, *args) -> None:
+        """
+        Queue function(*args) as the next write of key (e.g. a file name). The arguments
+        must not be modified afterwards: loggers replace their datasets at every tick.
+        """
+        with self.condition:
+            self.raise_error()
+            if self.closed:
+                raise RuntimeError('Background_writer is closed.')
+            if key in self.pending:
+                self.coalesced += 1
+            else:
+                while len(self.pending) >= self.max_pending:
+                    self.condition.wait()
+                    self.raise_error()
+            # Replacing a key keeps its place in the queue.
+            self.pending[key] = (function, args)
+            self.condition.notify_all()
+
+    def raise_error(self) -> None:
+        """Raise the exception of the last failed write in the submitting thread (once)."""
+        if self.error is not None:
+            (error, self.error) = (self.error, None)
+            raise error
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                (key, (function, args)) = self.pending.popitem(last=False)
+                self.busy = True
+                self.condition.notify_all()
+            start_time = time.time()
+            try:
+                function(*args)
+            except Exception as e:
+                with self.condition:
+                    self.error = e
+            with self.condition:
+                self.busy = False
+                self.written += 1
+                self.write_time += time.time() - start_time
+                self.condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued write is done, return whether they are."""
+        with self.condition:
+            done = self.condition.wait_for(lambda: not self.pending and not self.busy, 
+                                           timeout=timeout)
+        return done
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Finish the queued writes and stop the thread."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join(timeout=timeout)
+        with self.condition:
+            self.raise_error()
@@ -10,55 +10,168 @@
 from typing import Dict, List, Tuple, Optional, Union
 from os.path import exists
 from decimal import Decimal
+from functools import partial
+from multiprocessing import Pool
 from tqdm import tqdm
 from .timezone import get_timezone_offset_in_seconds
+from .symbol_index import Symbol_index, get_symbol_index
 import pickle
+import numpy as np
 import pandas as pd
 
+# Class definition.
+class Batch_price_converter:
+    def __init__(self, 
+                 exchange_info: pd.DataFrame, 
+                 priority: str = 'accuracy', 
+                 shortest_paths: Optional[Dict[str, Dict[str, Dict[str, List[Tuple[str, str]]]]]] = None, 
+                 max_plans: int = 64, 
+                 symbol_index: Optional[Symbol_index] = None):
+        """
+        Same as convert_price for many assets at once. The path of every asset is compiled once 
+        into positions in a price array indexed like the symbol index, so that every tick only 
+        gathers prices from the conversion table and takes one array step per path hop.
+
+        :param exchange_info: exchange information on all tickers (see Cryptocurrency_exchange).
+        :param priority: paths to follow (see get_asset_graph).
+        :param shortest_paths: precomputed paths (see precompute_shortest_paths), else searched once per asset.
+        :param max_plans: number of compiled asset lists kept between ticks.
+        :param symbol_index: index over exchange_info (see get_symbol_index), else built.
+        """
+        self.exchange_info = exchange_info
+        self.symbol_index = get_symbol_index(exchange_info, symbol_index)
+        self.priority = priority
+        self.shortest_paths = shortest_paths
+        self.max_plans = max_plans
+        self.steps = {}
+        self.plans = {}
+        self.table = None
+
+    def get_steps(self, from_asset: str, to_asset: str) -> List[Tuple[int, bool]]:
+        """(symbol position, multiply or divide) of every hop from from_asset to to_asset."""
+        steps = self.steps.get((from_asset, to_asset), None)
+        if steps is None:
+            if from_asset == to_asset:
+                shortest_path = []
+            elif self.shortest_paths is None:
+                shortest_path = get_shortest_pair_path_between_assets(
+                    from_asset=from_asset, to_asset=to_asset, 
+                    exchange_info=self.exchange_info, priority=self.priority)
+            else:
+                shortest_path = self.shortest_paths[self.priority][from_asset][to_asset]
+            steps = []
+            asset = from_asset
+            for (base_asset, quote_asset) in shortest_path:
+                steps.append((self.symbol_index.get_positions([base_asset + quote_asset])[0], 
+                              base_asset == asset))
+                asset = quote_asset if asset == base_asset else base_asset
+            self.steps[(from_asset, to_asset)] = steps
+        return steps
+
+    def compile(self, from_assets: List[str], to_asset: str) -> Dict[str, np.ndarray]:
+        """Padded (asset x hop) positions and directions, with the rounding of every last pair."""
+        key = (tuple(from_assets), to_asset)
+        plan = self.plans.get(key, None)
+        if plan is None:
+            steps = [self.get_steps(from_asset, to_asset) for from_asset in from_assets]
+            depth = max([len(asset_steps) for asset_steps in steps] + [0])
+            # Padding points past the listed symbols, at a price of 1.
+            positions = np.full((len(steps), depth), len(self.symbol_index.symbols), dtype=int)
+            multiply = np.ones((len(steps), depth), dtype=bool)
+            for (i, asset_steps) in enumerate(steps):
+                for (j, (position, multiply_step)) in enumerate(asset_steps):
+                    positions[i, j] = position
+                    multiply[i, j] = multiply_step
+            last_pairs = [self.symbol_index.symbols[asset_steps[-1][0]] if asset_steps[-1][0] >= 0 else '' 
+                          for asset_steps in steps if len(asset_steps) > 0]
+            plan = {'positions': positions, 
+                    'multiply': multiply, 
+                    'converted': np.array([len(asset_steps) > 0 for asset_steps in steps], dtype=bool), 
+                    'tick_sizes': self.symbol_index.map(last_pairs, 'tick_size'), 
+                    'precisions': self.symbol_index.map(last_pairs, 'quote_precision')}
+            if len(self.plans) >= self.max_plans:
+                self.plans.clear()
+            self.plans[key] = plan
+        return plan
+
+    def get_prices(self, conversion_table: pd.DataFrame, key: str = 'close') -> np.ndarray:
+        """
+        Price of every listed symbol (first row if duplicated, NaN if not in the table), then 1 
+        for padding and NaN for pairs that are not listed (position -1).
+        """
+        symbols = conversion_table['symbol'].to_numpy()
+        table = self.table
+        if table is None or not np.array_equal(table[0], symbols):
+            positions = self.symbol_index.get_positions(symbols)
+            (_, rows) = np.unique(positions, return_index=True)
+            rows = rows[positions[rows] >= 0]
+            table = (symbols, rows, positions[rows])
+            self.table = table
+        prices = np.full(len(self.symbol_index.symbols) + 2, np.nan)
+        prices[table[2]] = conversion_table[key].to_numpy(dtype=float)[table[1]]
+        prices[-2] = 1.0
+        return prices
+
+    def convert(self, 
+                sizes: List[Union[float, str]], 
+                from_assets: List[str], 
+                to_asset: str, 
+                conversion_table: pd.DataFrame, 
+                key: str = 'close', 
+                tradable: bool = True) -> List[Union[str, float]]:
+        """
+        Same as [convert_price(size, from_asset, to_asset, ...) for ...], where a missing pair 
+        gives NaN. Sizes that need no conversion are returned as they are.
+        """
+        plan = self.compile(from_assets, to_asset)
+        prices = self.get_prices(conversion_table, key=key)
+        converted_sizes = np.array([float(size) for size in sizes])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for j in range(plan['positions'].shape[1]):
+                price = prices[plan['positions'][:, j]]
+                converted_sizes = np.where(plan['multiply'][:, j], converted_sizes * price, 
+                                           converted_sizes / price)
+        converted = converted_sizes[plan['converted']]
+        if tradable:
+            converted = make_tradable_quantities(converted, plan['tick_sizes'], plan['precisions'])
+        converted = iter(converted)
+        return [next(converted) if is_converted else size 
+                for (size, is_converted) in zip(sizes, plan['converted'])]
+
 # Function definitions.
-def get_assets_from_pair(pair: str, exchange_info: pd.DataFrame) -> Optional[List[str]]:
-     try:
-         pair_info = exchange_info[exchange_info['symbol'] == pair]
-         base_asset = pair_info['base_asset'].iat[-1]
-         quote_asset = pair_info['quote_asset'].iat[-1]
-         return base_asset, quote_asset
-     except Exception as e:
-         print(e)
-         print(pair_info)
-     return None
-
-def get_base_asset_from_pair(pair: str, exchange_info: pd.DataFrame) -> Optional[str]:
-    asset = get_assets_from_pair(pair, exchange_info=exchange_info)
+def get_assets_from_pair(pair: str, 
+                         exchange_info: pd.DataFrame, 
+                         symbol_index: Optional[Symbol_index] = None) -> Optional[List[str]]:
+    assets = get_symbol_index(exchange_info, symbol_index).get_assets(pair)
+    if assets is None:
+        print('{} not found in exchange_info.'.format(pair))
+    return assets
+
+def get_base_asset_from_pair(pair: str, 
+                             exchange_info: pd.DataFrame, 
+                             symbol_index: Optional[Symbol_index] = None) -> Optional[str]:
+    asset = get_assets_from_pair(pair, exchange_info=exchange_info, symbol_index=symbol_index)
     base_asset = None
     if asset is not None:
         base_asset, quote_asset = asset
     return base_asset
 
-def get_quote_asset_from_pair(pair: str, exchange_info: pd.DataFrame) -> Optional[str]:
-    asset = get_assets_from_pair(pair, exchange_info=exchange_info)
+def get_quote_asset_from_pair(pair: str, 
+                              exchange_info: pd.DataFrame, 
+                              symbol_index: Optional[Symbol_index] = None) -> Optional[str]:
+    asset = get_assets_from_pair(pair, exchange_info=exchange_info, symbol_index=symbol_index)
     quote_asset = None
     if asset is not None:
         base_asset, quote_asset = asset
     return quote_asset
 
-def get_connected_assets(asset: str, exchange_info: pd.DataFrame, priority: str = 'accuracy') -> List[str]:
-    """Return a list of all assets connected to a given asset.
+def reorder_assets(connected_assets: List[str], priority: str = 'accuracy') -> List[str]:
+    """Sort the prioritized assets among themselves, leaving the others in place.
     
     Keyword arguments:
-    asset -- The asset to find all connected assets to.
-    exchange_info -- A pandas DataFrame containing the exchange info.
+    connected_assets -- The assets to reorder.
     priority -- The order in which to prioritize assets.
     """
-    def reorder(connected_assets: List[str], priority: str) -> List[str]:
-        prioritized = \
-            [asset for asset in priority if asset in connected_assets]
-        order = {asset: i for i, asset in enumerate(prioritized)}
-        connected_assets_items = \
-            [asset for asset in connected_assets if asset in order]
-        connected_assets_items.sort(key=order.get)
-        connected_assets_iter = iter(connected_assets_items)
-        return [next(connected_assets_iter) if asset in order 
-                else asset for asset in connected_assets]
     if priority == 'accuracy':
         priority = ['USDT', 'BTC', 'BUSD', 'ETH', 'BNB']
     elif priority == 'fees':
@@ -66,6 +179,24 @@ def get_connected_assets(asset: str, exchange_info: pd.DataFrame, priority: str
     elif priority == 'wallet':
         priority = ['BTC', 'ETH', 'BUSD', 'BNB', 'USDT']
     priority += ['BRL', 'AUD']
+    prioritized = \
+        [asset for asset in priority if asset in connected_assets]
+    order = {asset: i for i, asset in enumerate(prioritized)}
+    connected_assets_items = \
+        [asset for asset in connected_assets if asset in order]
+    connected_assets_items.sort(key=order.get)
+    connected_assets_iter = iter(connected_assets_items)
+    return [next(connected_assets_iter) if asset in order 
+            else asset for asset in connected_assets]
+
+def get_connected_assets(asset: str, exchange_info: pd.DataFrame, priority: str = 'accuracy') -> List[str]:
+    """Return a list of all assets connected to a given asset.
+    
+    Keyword arguments:
+    asset -- The asset to find all connected assets to.
+    exchange_info -- A pandas DataFrame containing the exchange info.
+    priority -- The order in which to prioritize assets.
+    """
     connected_base_assets = exchange_info['quote_asset'] == asset
     connected_base_assets = exchange_info[connected_base_assets]
     connected_base_assets = connected_base_assets['base_asset'].tolist()
@@ -73,7 +204,7 @@ def get_connected_assets(asset: str, exchange_info: pd.DataFrame, priority: str
     connected_quote_assets = exchange_info[connected_quote_assets]
     connected_quote_assets = connected_quote_assets['quote_asset'].tolist()
     connected_assets = list(set(connected_base_assets + connected_quote_assets))
-    connected_assets = reorder(connected_assets, priority=priority)
+    connected_assets = reorder_assets(connected_assets, priority=priority)
     return connected_assets
 
 def select_pair_with_highest_quote_volume_from_base_asset(base_asset: str, 
@@ -141,9 +272,58 @@ def get_shortest_pair_path_between_assets(from_asset: str,
         shortest_path = shortest_path[1:]
     return pairs
 
+def get_asset_graph(exchange_info: pd.DataFrame, priority: str = 'accuracy') -> Dict[str, List[str]]:
+    """Return the adjacency list of every asset, in the order given by get_connected_assets.
+    
+    Keyword arguments:
+    exchange_info -- A pandas DataFrame containing the exchange info.
+    priority -- The order in which to prioritize assets.
+    """
+    connected_base_assets = {}
+    connected_quote_assets = {}
+    for (base_asset, quote_asset) in zip(exchange_info['base_asset'], 
+                                         exchange_info['quote_asset']):
+        connected_base_assets.setdefault(quote_asset, []).append(base_asset)
+        connected_quote_assets.setdefault(base_asset, []).append(quote_asset)
+    assets = set(connected_base_assets) | set(connected_quote_assets)
+    # Same list(set(...)) construction as get_connected_assets, for the same neighbour order.
+    return {asset: reorder_assets(list(set(connected_base_assets.get(asset, []) + 
+                                           connected_quote_assets.get(asset, []))), 
+                                  priority=priority) for asset in assets}
+
+def get_pairs_from_assets(exchange_info: pd.DataFrame) -> Dict[Tuple[str, str], Tuple[str, str]]:
+    """Map both (base_asset, quote_asset) and (quote_asset, base_asset) to the first listed pair."""
+    pairs = {}
+    for (base_asset, quote_asset) in zip(exchange_info['base_asset'], 
+                                         exchange_info['quote_asset']):
+        pairs.setdefault((base_asset, quote_asset), (base_asset, quote_asset))
+        pairs.setdefault((quote_asset, base_asset), (base_asset, quote_asset))
+    return pairs
+
+def get_shortest_pair_paths_from_asset(from_asset: str, 
+                                       asset_graph: Dict[str, List[str]], 
+                                       pairs: Dict[Tuple[str, str], Tuple[str, str]]) \
+        -> Dict[str, List[Tuple[str, str]]]:
+    """Breadth-first search tree from from_asset, giving the same paths as 
+    get_shortest_pair_path_between_assets for every reachable asset at once."""
+    parents = {from_asset: None}
+    queue = [from_asset]
+    for asset in queue:
+        for next_asset in asset_graph.get(asset, []):
+            if next_asset not in parents:
+                parents[next_asset] = asset
+                queue.append(next_asset)
+    shortest_paths = {}
+    for to_asset in queue[1:]:
+        parent = parents[to_asset]
+        shortest_paths[to_asset] = shortest_paths.get(parent, []) + \
+            [pairs[(parent, to_asset)]]
+    return shortest_paths
+
 def precompute_shortest_paths(exchange_info: pd.DataFrame, 
                               priority: Optional[str] = None, 
-                              shortest_paths_file: Optional[str] = 'crypto_logs/shortest_paths.pkl') \
+                              shortest_paths_file: Optional[str] = 'crypto_logs/shortest_paths.pkl', 
+                              processes: int = 1) \
         -> Dict[str, Dict[str, Dict[str, List[Tuple[str, str]]]]]:
     if exists(shortest_paths_file):
         with open(shortest_paths_file, 'rb') as f:
@@ -153,38 +333,41 @@ def precompute_shortest_paths(exchange_info: pd.DataFrame,
         base_assets = exchange_info['base_asset'].tolist()
         quote_assets = exchange_info['quote_asset'].tolist()
         assets = list(set(base_assets + quote_assets))
+        pairs = get_pairs_from_assets(exchange_info)
         priorities = ['accuracy', 'fees', 'wallet'] if priority is None else [priority]
         for priority in priorities:
+            asset_graph = get_asset_graph(exchange_info, priority=priority)
+            search = partial(get_shortest_pair_paths_from_asset, 
+                             asset_graph=asset_graph, pairs=pairs)
+            if processes > 1:
+                with Pool(processes) as pool:
+                    trees = pool.map(search, assets, 
+                                     chunksize=max(1, len(assets) // (4 * processes)))
+            else:
+                trees = map(search, assets)
             shortest_paths[priority] = {}
-            for from_asset in tqdm(assets, unit='asset'):
+            for (i, (from_asset, tree)) in enumerate(tqdm(zip(assets, trees), 
+                                                          total=len(assets), 
+                                                          unit='asset')):
                 shortest_paths[priority][from_asset] = {}
-                for to_asset in assets:
-                    if from_asset != to_asset:
-                        precomputed_pair_path = None
-                        if shortest_paths[priority].get(to_asset, None) is not None:
-                            precomputed_pair_path = \
-                                shortest_paths[priority][to_asset].get(from_asset, None)
-                        if precomputed_pair_path is None:
-                            shortest_paths[priority][from_asset][to_asset] = \
-                                get_shortest_pair_path_between_assets(
-                                    from_asset=from_asset, 
-                                    to_asset=to_asset, 
-                                    exchange_info=exchange_info, 
-                                    priority=priority)
-                        else:
-                            precomputed_pair_path_reversed = \
-                                precomputed_pair_path.copy()
-                            precomputed_pair_path_reversed.reverse()
-                            shortest_paths[priority][from_asset][to_asset] = \
-                                precomputed_pair_path_reversed
+                for (j, to_asset) in enumerate(assets):
+                    if j < i:
+                        # Paths already computed in the other direction are reused reversed.
+                        precomputed_pair_path_reversed = \
+                            shortest_paths[priority][to_asset][from_asset].copy()
+                        precomputed_pair_path_reversed.reverse()
+                        shortest_paths[priority][from_asset][to_asset] = \
+                            precomputed_pair_path_reversed
+                    elif j > i:
+                        shortest_paths[priority][from_asset][to_asset] = \
+                            tree.get(to_asset, [])
         with open(shortest_paths_file, 'wb') as f:
             pickle.dump(shortest_paths, f)
     return shortest_paths
 
-def make_tradable_quantity(pair: str, 
-                           coins_available: Union[float, str], 
-                           exchange_info: pd.DataFrame, 
-                           subtract: float = 0) -> float:
+def make_tradable_quantities(quantities: List[Union[float, str]], 
+                             tick_sizes: List[float], 
+                             precisions: List[int]) -> List[Union[str, float]]:
     def compact_float_string(number: Union[str, float], precision: int) -> str:
         return "{:0.0{}f}".format(number, precision).rstrip('0').rstrip('.')
     def round_step_size(quantity: Union[float, Decimal], 
@@ -196,13 +379,25 @@ def make_tradable_quantity(pair: str,
         """
         quantity = Decimal(str(quantity))
         return float(quantity - quantity % Decimal(str(step_size)))
-    pair_exchange_info = exchange_info[exchange_info['symbol'] == pair].iloc[0]
-    tick_size = float(pair_exchange_info['tick_size'])
-    step_size = float(pair_exchange_info['step_size'])
-    precision = pair_exchange_info['quote_precision']
+    tradable_quantities = []
+    for (quantity, tick_size, precision) in zip(quantities, tick_sizes, precisions):
+        if np.isfinite(float(quantity)) and np.isfinite(float(tick_size)):
+            quantity = round_step_size(quantity=quantity, step_size=tick_size)
+            tradable_quantities.append(compact_float_string(float(quantity), int(precision)))
+        else:
+            tradable_quantities.append(np.nan)
+    return tradable_quantities
+
+def make_tradable_quantity(pair: str, 
+                           coins_available: Union[float, str], 
+                           exchange_info: pd.DataFrame, 
+                           subtract: float = 0, 
+                           symbol_index: Optional[Symbol_index] = None) -> float:
+    symbol_index = get_symbol_index(exchange_info, symbol_index)
+    tick_size = symbol_index.get(pair, 'tick_size')
+    precision = symbol_index.get(pair, 'quote_precision')
     coins_available = float(coins_available) - subtract * tick_size
-    quantity = round_step_size(quantity=coins_available, step_size=tick_size)
-    return compact_float_string(float(quantity), precision)
+    return make_tradable_quantities([coins_available], [tick_size], [precision])[0]
 
 def convert_price(size: Union[float, str], 
                   from_asset: str, 
@@ -213,7 +408,8 @@ def convert_price(size: Union[float, str],
                   priority: str = 'accuracy', 
                   shortest_path: Union[List[Tuple[str, str]], 
                                        Dict[str, Dict[str, Dict[str, List[Tuple[str, str]]]]], 
-                                       None] = None) -> str:
+                                       None] = None, 
+                  symbol_index: Optional[Symbol_index] = None) -> str:
     if from_asset != to_asset:
         size = float(size)
         if shortest_path is None:
@@ -230,6 +426,40 @@ def convert_price(size: Union[float, str],
             size = size * price if base_asset == from_asset else size / price
             from_asset = to_asset
         size = make_tradable_quantity(pair, float(size), subtract=0, 
-                                      exchange_info=exchange_info)
+                                      exchange_info=exchange_info, symbol_index=symbol_index)
     return size
 
+
+def convert_prices(from_assets: List[str], 
+                   to_asset: str, 
+                   conversion_table: pd.DataFrame, 
+                   exchange_info: pd.DataFrame, 
+                   key: str = 'close', 
+                   priority: str = 'accuracy', 
+                   shortest_paths: Optional[Dict[str, Dict[str, Dict[str, List[Tuple[str, str]]]]]] = None, 
+                   converter: Optional[Batch_price_converter] = None) \
+        -> List[Union[str, int, float]]:
+    """
+    Same as convert_price(size=1, ...) for every asset in from_assets, with converter if it 
+    converts on the same terms (see get_price_converter).
+    """
+    converter = get_price_converter(exchange_info, priority=priority, shortest_paths=shortest_paths, 
+                                    converter=converter)
+    return converter.convert([1] * len(from_assets), from_assets, to_asset, conversion_table, key=key)
+
+def get_price_converter(exchange_info: pd.DataFrame, 
+                        priority: str = 'accuracy', 
+                        shortest_paths: Optional[Dict[str, Dict[str, Dict[str, List[Tuple[str, str]]]]]] = None, 
+                        converter: Optional[Batch_price_converter] = None, 
+                        symbol_index: Optional[Symbol_index] = None) \
+        -> Batch_price_converter:
+    """
+    Return converter if it converts over this very exchange_info with the same priority and 
+    paths, else a new one. Converters are kept by their owner (see Trader_context) and passed 
+    along, their compiled paths then last from one call to the next.
+    """
+    if converter is None or converter.exchange_info is not exchange_info or \
+            converter.priority != priority or converter.shortest_paths is not shortest_paths:
+        converter = Batch_price_converter(exchange_info, priority=priority, shortest_paths=shortest_paths, 
+                                          symbol_index=symbol_index)
+    return converter
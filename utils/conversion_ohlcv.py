@@ -7,11 +7,14 @@
 # Description: Binance asset conversion.
 
 # Library imports.
-from .conversion import get_assets_from_pair, get_base_asset_from_pair
-from .conversion import get_quote_asset_from_pair, get_shortest_pair_path_between_assets
+from typing import Dict, List, Optional, Tuple
+from .conversion import get_base_asset_from_pair
+from .conversion import get_shortest_pair_path_between_assets
 from .ohlcvs import named_pairs_to_df
-from .ohlcv_cleaning import clean_data
+from .ohlcv_cleaning import clean_array, clean_data
+from .symbol_index import Symbol_index, get_symbol_index
 from tqdm import tqdm
+import numpy as np
 import pandas as pd
 
 # Function definitions.
@@ -119,6 +122,7 @@ def convert_ohlcv(from_asset, to_asset, conversion_table, exchange_info, shortes
 '''
 
 def convert_ohlcvs(to_asset, conversion_table, exchange_info, shortest_paths=None):
+    symbol_index = Symbol_index(exchange_info)
     def convert_ohlcv_prices(from_asset, to_asset, conversion_table, exchange_info, shortest_paths=None):
         if shortest_paths is None:
             shortest_path = get_shortest_pair_path_between_assets(from_asset=from_asset, 
@@ -149,7 +153,7 @@ def convert_ohlcvs(to_asset, conversion_table, exchange_info, shortest_paths=Non
         return size
     def convert_ohlcv_volumes(symbol, price_conversion_table, 
                               volume_conversion_table, exchange_info):
-        from_asset = get_base_asset_from_pair(symbol, exchange_info)
+        from_asset = get_base_asset_from_pair(symbol, exchange_info, symbol_index=symbol_index)
         price_size = price_conversion_table[symbol].copy()
         volume_size = volume_conversion_table[symbol].copy()
         volume_size['quote_volume'] = volume_size['quote_volume'] / volume_size['close']
@@ -161,7 +165,7 @@ def convert_ohlcvs(to_asset, conversion_table, exchange_info, shortest_paths=Non
         #return price_size.fillna(method='pad')
         return price_size
     def convert_ohlcv_prices_helper(symbol, size, shortest_paths=None):
-        from_asset = get_base_asset_from_pair(symbol, exchange_info)
+        from_asset = get_base_asset_from_pair(symbol, exchange_info, symbol_index=symbol_index)
         if from_asset == to_asset:
             size = size[symbol].copy()
         else:
@@ -185,102 +189,99 @@ def convert_ohlcvs(to_asset, conversion_table, exchange_info, shortest_paths=Non
     volume_conversion_table = clean_data(volume_conversion_table)
     return volume_conversion_table
 
-def convert_ohlcvs_from_pairs_to_assets(conversion_table, exchange_info, shortest_paths=None):
-    # Statically-typed python function.
-    def add_base_asset_level_to_pairs(df, exchange_info):
-        # Statically-typed python function.
-        def named_pairs_to_5dim_df(symbols, pairs):
-            df = pd.DataFrame()
-            column_names = pairs[0].columns.tolist()
-            for (symbol, pair) in tqdm(zip(symbols, pairs), unit=' named pair'):
-                columns = [('not_inverted', get_base_asset_from_pair(symbol, exchange_info), 
-                            symbol, column) for column in column_names]
-                pair.columns = pd.MultiIndex.from_tuples(
-                    columns, names=['is_inverted', 'asset', 'symbol', 'feature']
-                )
-                df = pd.concat([df, pair], axis='columns')
-            return df
-        df = df.astype(float).copy()
-        symbols = df.columns.get_level_values(0).unique().tolist()
-        df = [df[symbol] for symbol in tqdm(symbols, unit=' pair')]
-        return named_pairs_to_5dim_df(symbols, df)
-    # Statically-typed python.
-    def add_quote_asset_level_to_pairs_and_reverse(df, exchange_info):
-        # Statically-typed python.
-        def invert_symbol(symbol, exchange_info):
-            base_asset, quote_asset = get_assets_from_pair(symbol, exchange_info)
-            return quote_asset + base_asset
-        # Statically-typed python.
-        def named_pairs_to_5dim_df(symbols, pairs):
-            df = pd.DataFrame()
-            column_names = pairs[0].columns.tolist()
-            for (symbol, pair) in tqdm(zip(symbols, pairs), unit=' named pair'):
-                columns = [('inverted', get_quote_asset_from_pair(symbol, exchange_info), 
-                            invert_symbol(symbol, exchange_info), column) 
-                           for column in column_names]
-                pair.columns = pd.MultiIndex.from_tuples(
-                    columns, names=['is_inverted', 'asset', 'symbol', 'feature']
-                )
-                df = pd.concat([df, pair], axis='columns')
-            return df
-        df = df.astype(float).copy()
-        symbols = df.columns.get_level_values(0).unique().tolist()
-        df = [df[symbol] for symbol in tqdm(symbols, unit=' pair')]
-        return named_pairs_to_5dim_df(symbols, df)
-    # Statically-typed python.
-    def invert_pairs(conversion_table, exchange_info):
-        # Statically-typed python.
-        def invert_symbol(symbol, exchange_info):
-            base_asset, quote_asset = get_assets_from_pair(symbol, exchange_info)
-            return quote_asset + base_asset
-        conversion_table_swapped = conversion_table.copy()
-        conversion_table_swapped.columns = \
-            conversion_table_swapped.columns.swaplevel(0, 1)
-        conversion_table_swapped.loc[:, ['open', 'high', 'low', 'close', 
-                                         'base_volume', 'quote_volume']] = \
-            conversion_table_swapped.loc[:, ['open', 'high', 'low', 'close', 
-                                             'quote_volume', 'base_volume']].values
-        conversion_table_swapped.loc[:, ['open', 'high', 'low', 'close']] = \
-            1 / conversion_table_swapped.loc[:, ['open', 'high', 'low', 'close']]
-        conversion_table_swapped.columns = \
-            conversion_table_swapped.columns.swaplevel(0, 1)
-        conversion_table_swapped = conversion_table_swapped.astype(float).copy()
-        symbols = conversion_table_swapped.columns.get_level_values(0).unique().tolist()
-        return add_quote_asset_level_to_pairs_and_reverse(conversion_table_swapped, 
-                                                          exchange_info)
-    to_asset = 'USDT'
-    conversion_table = convert_ohlcvs(
-        to_asset, conversion_table, exchange_info, shortest_paths=shortest_paths)
-    conversion_table_swapped = invert_pairs(conversion_table, exchange_info)
-    conversion_table = add_base_asset_level_to_pairs(conversion_table, exchange_info)
-    conversion_table_mixed = pd.concat([conversion_table, conversion_table_swapped], 
-                                       join='outer', axis='columns')
-    conversion_table_mixed = conversion_table_mixed.sort_index(axis='columns')
-    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 3)
-    conversion_table_mixed = conversion_table_mixed[['open', 'high', 'low', 'close', 
-                                                     'base_volume', 'quote_volume']]
-    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 3)
-    conversion_table_mixed = conversion_table_mixed[['not_inverted', 'inverted']]
-    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 3)
-    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 1)
-    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(1, 2)
-    assets = conversion_table_mixed.columns.get_level_values(0).unique().tolist()
-    new_columns = []
-    for asset in tqdm(assets, unit=' asset'):
-        symbols = conversion_table_mixed[asset].columns.get_level_values(0)
-        trading_base_volume = \
-            conversion_table_mixed.loc[:, (asset, slice(None), 'base_volume')].sum(axis='columns')
-        trading_quote_volume = \
-            conversion_table_mixed.loc[:, (asset, slice(None), 'quote_volume')].sum(axis='columns')
-        new_columns.append(symbols[0])
-        for symbol in symbols:
-            # Fix this warning (PerformanceWarning: indexing past lexsort depth may impact performance).
-            conversion_table_mixed.loc[:, (asset, symbol, 'base_volume')] = trading_base_volume
-            conversion_table_mixed.loc[:, (asset, symbol, 'quote_volume')] = trading_quote_volume
-    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 1)
-    conversion_table_mixed = conversion_table_mixed[new_columns]
-    conversion_table_mixed.columns = conversion_table_mixed.columns.swaplevel(0, 3)
-    conversion_table_mixed.columns = conversion_table_mixed.columns.droplevel(3)
-    conversion_table_mixed = conversion_table_mixed['not_inverted']
-    conversion_table_mixed.columns.names = ['symbol', 'feature']
-    return conversion_table_mixed
+def get_conversion_steps(from_asset: str, 
+                         shortest_path: List[Tuple[str, str]]) -> Tuple[str, List[Tuple[str, bool]]]:
+    """First pair and (pair, multiply or divide) steps convert_ohlcvs takes along a path."""
+    (base_asset, quote_asset) = shortest_path[0]
+    first_symbol = base_asset + quote_asset
+    steps = []
+    for (base_asset, quote_asset) in shortest_path[1:]:
+        to_asset = quote_asset if from_asset == base_asset else base_asset
+        steps.append((base_asset + quote_asset, base_asset == from_asset))
+        from_asset = to_asset
+    return first_symbol, steps
+
+def convert_ohlcv_array(values: np.ndarray, 
+                        symbols: pd.Index, 
+                        to_asset: str, 
+                        exchange_info: pd.DataFrame, 
+                        shortest_paths: Optional[Dict[str, Dict[str, Dict[str, 
+                            List[Tuple[str, str]]]]]] = None, 
+                        symbol_index: Optional[Symbol_index] = None) -> np.ndarray:
+    """
+    Same as convert_ohlcvs before cleaning, on a (time x symbol x [open, high, low, close, 
+    base_volume, quote_volume]) array: every symbol takes its path one hop at a time, all 
+    the symbols with a hop left being converted together.
+    """
+    positions = {symbol: i for (i, symbol) in enumerate(symbols)}
+    base_assets = get_symbol_index(exchange_info, symbol_index).map(symbols, 'base_asset')
+    first_positions = np.arange(len(symbols))
+    steps = [[] for _ in symbols]
+    conversion_steps = {}
+    for (i, from_asset) in enumerate(base_assets):
+        if from_asset == to_asset:
+            continue
+        if from_asset not in conversion_steps:
+            if shortest_paths is None:
+                shortest_path = get_shortest_pair_path_between_assets(from_asset=from_asset, 
+                                                                      to_asset=to_asset, 
+                                                                      exchange_info=exchange_info, 
+                                                                      priority='accuracy')
+            else:
+                shortest_path = shortest_paths['accuracy'][from_asset][to_asset]
+            conversion_steps[from_asset] = get_conversion_steps(from_asset, shortest_path)
+        (first_symbol, symbol_steps) = conversion_steps[from_asset]
+        first_positions[i] = positions[first_symbol]
+        steps[i] = [(positions[symbol], multiply) for (symbol, multiply) in symbol_steps]
+    prices = values[:, first_positions, :4].copy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for hop in range(max([len(symbol_steps) for symbol_steps in steps] + [0])):
+            selected = np.array([i for (i, symbol_steps) in enumerate(steps) if len(symbol_steps) > hop])
+            connections = values[:, [steps[i][hop][0] for i in selected], :4]
+            multiply = np.array([steps[i][hop][1] for i in selected])[:, np.newaxis]
+            # The next open comes from the open, the next high, low and close from the close.
+            size = prices[:, selected][:, :, [0, 3, 3, 3]]
+            prices[:, selected] = np.where(multiply, size * connections, size / connections)
+        close = prices[:, :, 3]
+        volumes = np.stack([close * values[:, :, 4], 
+                            close * (values[:, :, 5] / values[:, :, 3])], axis=2)
+    values = np.concatenate([prices, volumes], axis=2)
+    values[np.isinf(values)] = np.nan
+    return values
+
+def convert_ohlcvs_from_pairs_to_assets(conversion_table: pd.DataFrame, 
+                                        exchange_info: pd.DataFrame, 
+                                        shortest_paths: Optional[Dict[str, Dict[str, Dict[str, 
+                                            List[Tuple[str, str]]]]]] = None, 
+                                        symbol_index: Optional[Symbol_index] = None) -> pd.DataFrame:
+    """
+    USDT OHLCV of every asset traded as a base asset, on a dense (time x pair x feature) 
+    array: prices are those of its first pair in alphabetical order, volumes are summed 
+    over all the pairs trading it, inverted (base and quote volumes swapped) when it is 
+    their quote asset.
+    """
+    symbol_index = get_symbol_index(exchange_info, symbol_index)
+    features = pd.Index(['open', 'high', 'low', 'close', 'base_volume', 'quote_volume'])
+    symbols = conversion_table.columns.get_level_values(0).unique()
+    values = conversion_table.loc[:, pd.MultiIndex.from_product([symbols, features])]
+    values = values.to_numpy(dtype=float).reshape(conversion_table.shape[0], len(symbols), len(features))
+    values = convert_ohlcv_array(values, symbols, 'USDT', exchange_info, shortest_paths=shortest_paths, 
+                                 symbol_index=symbol_index)
+    values = clean_array(values, conversion_table.index, features)
+
+    base_assets = symbol_index.map(symbols, 'base_asset')
+    quote_assets = symbol_index.map(symbols, 'quote_asset')
+    assets = pd.Index(sorted(set(base_assets) | set(quote_assets)))
+    # Pairs are summed in the same order as before: the ones it is the base of, then the inverted ones.
+    order = np.argsort(symbols, kind='mergesort')
+    inverted_order = np.argsort(quote_assets + base_assets, kind='mergesort')
+    volumes = np.zeros((values.shape[0], len(assets), 2))
+    np.add.at(volumes, (slice(None), assets.get_indexer(base_assets[order])), values[:, order, 4:])
+    np.add.at(volumes, (slice(None), assets.get_indexer(quote_assets[inverted_order])), 
+              values[:, inverted_order][:, :, [5, 4]])
+
+    (base_assets, first_positions) = np.unique(base_assets[order], return_index=True)
+    values = np.concatenate([values[:, order[first_positions], :4], 
+                             volumes[:, assets.get_indexer(base_assets)]], axis=2)
+    columns = pd.MultiIndex.from_product([base_assets, features], names=['symbol', 'feature'])
+    return pd.DataFrame(values.reshape(values.shape[0], -1), index=conversion_table.index, columns=columns)
@@ -9,24 +9,38 @@
 # Library imports.
 from typing import Dict, List, Tuple, Union, Optional
 from binance.client import Client
-from .conversion import convert_price
-from .conversion import get_base_asset_from_pair, get_quote_asset_from_pair
+from .conversion import Batch_price_converter, convert_prices, get_price_converter
+from .symbol_index import Symbol_index, get_symbol_index
 import datetime
+import numpy as np
 import pandas as pd
 
 # Function definitions.
 def get_conversion_table_from_binance(client: Client, 
                                       exchange_info: pd.DataFrame, 
                                       offset_s: float = 0, 
-                                      dump_raw: bool = False) -> pd.DataFrame:
-    conversion_table = pd.DataFrame(client.get_ticker())
-    conversion_table = conversion_table[conversion_table['symbol'].isin(
-        exchange_info['symbol'])]
+                                      dump_raw: bool = False, 
+                                      symbol_index: Optional[Symbol_index] = None) -> pd.DataFrame:
+    return get_conversion_table_from_tickers(
+        tickers=client.get_ticker(), exchange_info=exchange_info, 
+        offset_s=offset_s, dump_raw=dump_raw, symbol_index=symbol_index)
 
-    conversion_table['base_asset'] = conversion_table['symbol'].apply(
-        lambda x: get_base_asset_from_pair(x, exchange_info=exchange_info))
-    conversion_table['quote_asset'] = conversion_table['symbol'].apply(
-        lambda x: get_quote_asset_from_pair(x, exchange_info=exchange_info))
+def get_conversion_table_from_tickers(tickers: List[Dict[str, object]], 
+                                      exchange_info: pd.DataFrame, 
+                                      offset_s: float = 0, 
+                                      dump_raw: bool = False, 
+                                      symbol_index: Optional[Symbol_index] = None) -> pd.DataFrame:
+    """Same as get_conversion_table_from_binance, from already received 24h tickers 
+    (REST client.get_ticker() or Ticker_stream.get_ticker())."""
+    symbol_index = get_symbol_index(exchange_info, symbol_index)
+    conversion_table = pd.DataFrame(tickers)
+    conversion_table = conversion_table[
+        symbol_index.get_positions(conversion_table['symbol']) >= 0].copy()
+
+    conversion_table['base_asset'] = \
+        symbol_index.map(conversion_table['symbol'], 'base_asset')
+    conversion_table['quote_asset'] = \
+        symbol_index.map(conversion_table['symbol'], 'quote_asset')
 
     conversion_table = conversion_table.rename(columns={
         'openPrice': 'open', 'highPrice': 'high', 'lowPrice': 'low', 
@@ -63,6 +77,13 @@ def get_conversion_table_from_binance(client: Client,
     conversion_table['date'] = pd.DatetimeIndex(conversion_table['date'])
     return conversion_table.sort_values(by='date')
 
+def broadcast_by_codes(values: pd.Series, 
+                       codes: np.ndarray, 
+                       how: str = 'sum') -> np.ndarray:
+    """Aggregate values by integer-coded group and gather the result back onto every row."""
+    values = pd.Series(values.to_numpy())
+    return values.groupby(codes).transform(how).to_numpy()
+
 def process_conversion_table(conversion_table: pd.DataFrame, 
                              exchange_info: pd.DataFrame, 
                              as_pair: bool = False, 
@@ -72,7 +93,8 @@ def process_conversion_table(conversion_table: pd.DataFrame,
                              convert_to_USDT: bool = False, 
                              shortest_paths: Optional[Dict[str, Dict[str, 
                                              Dict[str, List[Tuple[str, 
-                                                 str]]]]]] = None) -> \
+                                                 str]]]]]] = None, 
+                             price_converter: Optional[Batch_price_converter] = None) -> \
         pd.DataFrame:
     """
     Fetches and calculates data used for prices, volumes and other stats.
@@ -175,40 +197,30 @@ def process_conversion_table(conversion_table: pd.DataFrame,
             (((conversion_table['ask_price'] - conversion_table['close']) / \
               conversion_table['close']) + 1)
 
+        base_assets = conversion_table['base_asset'].unique().tolist()
+        # Both conversions share the paths compiled by one converter.
+        price_converter = get_price_converter(exchange_info, priority='accuracy', 
+                                              shortest_paths=shortest_paths, 
+                                              converter=price_converter)
+
         if not super_extra_minimal:
-            temp_conversion_table = conversion_table[[
-                'base_asset', 'open']]
-            temp_conversion_table = temp_conversion_table.drop_duplicates(
-                subset=['base_asset'], keep='first')
             conversion_table['USDT_open'] = \
-                temp_conversion_table.apply(
-                    lambda x: convert_price(
-                        size=1, from_asset=x['base_asset'], 
-                        to_asset='USDT', 
-                        conversion_table=conversion_table, 
-                        exchange_info=exchange_info, 
-                        shortest_path=shortest_paths, 
-                        key='open', priority='accuracy'), axis='columns')
-            conversion_table['USDT_open'] = conversion_table[[
-                'base_asset', 'USDT_open']].groupby(
-                    by=['base_asset']).fillna(method='pad')['USDT_open']
-
-        temp_conversion_table = conversion_table[[
-            'base_asset', 'close']]
-        temp_conversion_table = temp_conversion_table.drop_duplicates(
-            subset=['base_asset'], keep='first')
-        conversion_table['USDT_price'] = \
-            temp_conversion_table.apply(
-                lambda x: convert_price(
-                    size=1, from_asset=x['base_asset'], 
-                    to_asset='USDT', 
+                conversion_table['base_asset'].map(dict(zip(base_assets, convert_prices(
+                    from_assets=base_assets, to_asset='USDT', 
                     conversion_table=conversion_table, 
                     exchange_info=exchange_info, 
-                    shortest_path=shortest_paths, 
-                    key='close', priority='accuracy'), axis='columns')
-        conversion_table['USDT_price'] = conversion_table[[
-            'base_asset', 'USDT_price']].groupby(
-                by=['base_asset']).fillna(method='pad')['USDT_price']
+                    shortest_paths=shortest_paths, 
+                    key='open', priority='accuracy', 
+                    converter=price_converter))))
+
+        conversion_table['USDT_price'] = \
+            conversion_table['base_asset'].map(dict(zip(base_assets, convert_prices(
+                from_assets=base_assets, to_asset='USDT', 
+                conversion_table=conversion_table, 
+                exchange_info=exchange_info, 
+                shortest_paths=shortest_paths, 
+                key='close', priority='accuracy', 
+                converter=price_converter))))
 
         if not extra_minimal:
             conversion_table['USDT_high'] = \
@@ -239,13 +251,15 @@ def process_conversion_table(conversion_table: pd.DataFrame,
             conversion_table['USDT_price'].astype(float)
 
         if super_extra_minimal:
-            price_change_percent = conversion_table[[
-                'base_asset', 'price_change_percent']].groupby(
-                    by='base_asset').agg(lambda x: x.iloc[x.abs().argmax()])
+            # Keep the price_change_percent of largest magnitude per base_asset.
+            codes = pd.factorize(conversion_table['base_asset'])[0]
+            price_change_percent = \
+                conversion_table['price_change_percent'].to_numpy(dtype=float)
+            magnitude = np.nan_to_num(np.abs(price_change_percent), nan=-1.0)
+            order = np.lexsort((-magnitude, codes))
+            first = order[np.searchsorted(codes[order], np.arange(codes.max() + 1))]
             conversion_table['price_change_percent'] = \
-                conversion_table.apply(
-                    lambda x: price_change_percent.loc[x['base_asset']], 
-                    axis='columns')
+                price_change_percent[first][codes]
         else:
             conversion_table['USDT_price_change'] = \
                 (conversion_table['USDT_price'].astype(float) - \
@@ -360,27 +374,14 @@ def process_conversion_table(conversion_table: pd.DataFrame,
             pd.concat([conversion_table, conversion_table_swapped], 
                       join='outer', axis='index')
 
-        traded_volume = conversion_table[[
-            'base_asset', 'rolling_USDT_base_volume']].groupby(
-                by='base_asset').agg('sum')['rolling_USDT_base_volume']
+        codes = pd.factorize(conversion_table['base_asset'])[0]
         conversion_table['rolling_traded_volume'] = \
-            conversion_table.apply(
-                lambda x: traded_volume.loc[x['base_asset']], axis='columns')
+            broadcast_by_codes(conversion_table['rolling_USDT_base_volume'], codes)
         if not extra_minimal:
-            traded_bid_volume = conversion_table[[
-                'base_asset', 'USDT_bid_volume']].groupby(
-                    by='base_asset').agg('sum')['USDT_bid_volume']
             conversion_table['traded_bid_volume'] = \
-                conversion_table.apply(
-                    lambda x: traded_bid_volume.loc[x['base_asset']], 
-                    axis='columns')
-            traded_ask_volume = conversion_table[[
-                'base_asset', 'USDT_ask_volume']].groupby(
-                    by='base_asset').agg('sum')['USDT_ask_volume']
+                broadcast_by_codes(conversion_table['USDT_bid_volume'], codes)
             conversion_table['traded_ask_volume'] = \
-                conversion_table.apply(
-                    lambda x: traded_ask_volume.loc[x['base_asset']], 
-                    axis='columns')
+                broadcast_by_codes(conversion_table['USDT_ask_volume'], codes)
 
         conversion_table['importance'] = \
             conversion_table['rolling_USDT_base_volume'] / \
@@ -397,26 +398,14 @@ def process_conversion_table(conversion_table: pd.DataFrame,
                 conversion_table['USDT_ask_price'].astype(float) * \
                 conversion_table['importance']
 
-        importance_weighted_price = conversion_table[[
-            'base_asset', 'importance_weighted_price']].groupby(
-                by='base_asset').agg('sum')['importance_weighted_price']
-        conversion_table['traded_price'] = conversion_table.apply(
-            lambda x: importance_weighted_price.loc[x['base_asset']], 
-            axis='columns')
+        conversion_table['traded_price'] = \
+            broadcast_by_codes(conversion_table['importance_weighted_price'], codes)
 
         if not extra_minimal:
-            importance_weighted_bid_price = conversion_table[[
-                'base_asset', 'importance_weighted_bid_price']].groupby(
-                    by='base_asset').agg('sum')['importance_weighted_bid_price']
-            conversion_table['traded_bid_price'] = conversion_table.apply(
-                lambda x: importance_weighted_bid_price.loc[x['base_asset']], 
-                axis='columns')
-            importance_weighted_ask_price = conversion_table[[
-                'base_asset', 'importance_weighted_ask_price']].groupby(
-                    by='base_asset').agg('sum')['importance_weighted_ask_price']
-            conversion_table['traded_ask_price'] = conversion_table.apply(
-                lambda x: importance_weighted_ask_price.loc[x['base_asset']], 
-                axis='columns')
+            conversion_table['traded_bid_price'] = broadcast_by_codes(
+                conversion_table['importance_weighted_bid_price'], codes)
+            conversion_table['traded_ask_price'] = broadcast_by_codes(
+                conversion_table['importance_weighted_ask_price'], codes)
 
             conversion_table['traded_bid_ask_percent_change'] = \
                 ((conversion_table['traded_ask_price'] - \
@@ -535,34 +524,24 @@ def process_conversion_table(conversion_table: pd.DataFrame,
             conversion_table['symbol'] = conversion_table['base_asset'].copy()
             conversion_table['quote_asset'] = \
                 conversion_table['base_asset'].copy()
+            codes = pd.factorize(conversion_table['base_asset'])[0]
             if minimal:
-                df = conversion_table[[
-                    'base_asset', 'date', 'count']].groupby(by=[
-                        'base_asset']).agg({'date': 'max', 'count': 'max'})
-                conversion_table[['date', 'count']] = \
-                    conversion_table.apply(lambda x: df.loc[x['base_asset']], 
-                                           axis='columns')
+                conversion_table['date'] = \
+                    broadcast_by_codes(conversion_table['date'], codes, how='max')
+                conversion_table['count'] = \
+                    broadcast_by_codes(conversion_table['count'], codes, how='max')
                 if super_extra_minimal:
-                    df = conversion_table[[
-                        'base_asset', 'bid_ask_percent_change', 
-                        'bid_ask_volume_percent_change']].groupby(by=[
-                            'base_asset']).agg({
-                                'bid_ask_percent_change': 'min', 
-                                'bid_ask_volume_percent_change': 'max'})
-                    conversion_table.loc[:, [
-                        'bid_ask_percent_change', 
-                        'bid_ask_volume_percent_change']] = \
-                            conversion_table.apply(
-                                lambda x: df.loc[x['base_asset']], 
-                                axis='columns')
+                    conversion_table['bid_ask_percent_change'] = broadcast_by_codes(
+                        conversion_table['bid_ask_percent_change'], codes, how='min')
+                    conversion_table['bid_ask_volume_percent_change'] = broadcast_by_codes(
+                        conversion_table['bid_ask_volume_percent_change'], codes, how='max')
             else:
-                df = conversion_table[[
-                    'base_asset', 'date', 'last_ID', 'count']].groupby(
-                        by=['base_asset']).agg({
-                            'date': 'max', 'last_ID': 'sum', 'count': 'sum'})
-                conversion_table.loc[:, ['date', 'last_ID', 'count']] = \
-                    conversion_table.apply(lambda x: df.loc[x['base_asset']], 
-                                           axis='columns')
+                conversion_table['date'] = \
+                    broadcast_by_codes(conversion_table['date'], codes, how='max')
+                conversion_table['last_ID'] = \
+                    broadcast_by_codes(conversion_table['last_ID'], codes)
+                conversion_table['count'] = \
+                    broadcast_by_codes(conversion_table['count'], codes)
             conversion_table = conversion_table.drop_duplicates(
                 subset=['base_asset'], keep='first')
         conversion_table = conversion_table.reset_index(drop=True)
@@ -580,16 +559,25 @@ def get_conversion_table(client: Client,
                          super_extra_minimal: bool = False, 
                          convert_to_USDT: bool = False, 
                          shortest_paths: Optional[Dict[str, Dict[str, Dict[str, 
-                                         List[Tuple[str, str]]]]]] = None) \
+                                         List[Tuple[str, str]]]]]] = None, 
+                         tickers: Optional[List[Dict[str, object]]] = None, 
+                         symbol_index: Optional[Symbol_index] = None, 
+                         price_converter: Optional[Batch_price_converter] = None) \
         -> pd.DataFrame:
-    conversion_table = get_conversion_table_from_binance(
-        client=client, exchange_info=exchange_info, offset_s=offset_s, 
-        dump_raw=dump_raw)
+    if tickers is None:
+        conversion_table = get_conversion_table_from_binance(
+            client=client, exchange_info=exchange_info, offset_s=offset_s, 
+            dump_raw=dump_raw, symbol_index=symbol_index)
+    else:
+        conversion_table = get_conversion_table_from_tickers(
+            tickers=tickers, exchange_info=exchange_info, offset_s=offset_s, 
+            dump_raw=dump_raw, symbol_index=symbol_index)
     return process_conversion_table(
         conversion_table=conversion_table, exchange_info=exchange_info, 
         as_pair=as_pair, minimal=minimal, extra_minimal=extra_minimal, 
         super_extra_minimal=super_extra_minimal, 
-        convert_to_USDT=convert_to_USDT, shortest_paths=shortest_paths)
+        convert_to_USDT=convert_to_USDT, shortest_paths=shortest_paths, 
+        price_converter=price_converter)
 
 def get_new_tickers(conversion_table: pd.DataFrame) -> List[str]:
     return conversion_table['symbol'].unique().tolist()
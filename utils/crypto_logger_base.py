@@ -9,7 +9,11 @@
 # Library imports.
 from typing import List, Tuple, Union
 from decimal import Decimal
-from .resample import resample
+from .incremental_merge import Incremental_merge
+from .publication import Log_publisher, Log_reader
+from .resample import resample_next
+from .ring_buffer import Ring_buffer
+from .signals import Signal_publisher
 from abc import abstractmethod, ABC
 from os.path import exists, join
 from os import mkdir
@@ -26,7 +30,10 @@ class Crypto_logger_base(ABC):
                  input_log_name: str = '', 
                  raw: bool = False, 
                  append: bool = False, 
-                 roll: int = 0):
+                 roll: int = 0, 
+                 log_format: str = 'ring', 
+                 publish_url: Union[str, None] = None, 
+                 fsync: str = 'interval'):
         """
         :param interval: OHLCV interval to log. Default is 15 seconds.
         :param interval_input: OHLCV interval from input log. Default is 15 seconds.
@@ -37,6 +44,9 @@ class Crypto_logger_base(ABC):
         :param raw: whether the log dumps raw (instantaneous) or OHLCV data.
         :param append: whether to append the latest screened data to the log dumps or not.
         :param roll: buffer size to cut oldest data (0 means don't cut).
+        :param log_format: 'ring' (memory-mapped ring buffer), 'csv' or 'both' (ring buffer exported to CSV).
+        :param publish_url: also push every screened dataset logged to this ZeroMQ address (see utils/signals.py).
+        :param fsync: when CSV logs are flushed to disk, 'always', 'interval' or 'never' (see utils/publication.py).
         """
         input_log_name = 'crypto_' + input_log_name + '_log_' + interval_input
 
@@ -47,6 +57,7 @@ class Crypto_logger_base(ABC):
         self.raw = raw
         self.append = append
         self.roll = roll
+        self.log_format = log_format
 
         self.connected_to_raw = self.interval_input == self.interval
         self.input_log_name = join(directory, input_log_name + '.txt')
@@ -55,6 +66,20 @@ class Crypto_logger_base(ABC):
         self.log_name = join(directory, log_name + '.txt')
         self.log_screened_name = join(directory, log_name + '_screened.txt')
 
+        self.input_log_ring_name = join(directory, input_log_name + '_ring')
+        self.log_ring_name = join(directory, log_name + '_ring')
+        self.input_ring_buffer = None
+        self.ring_buffer = None
+        self.merge = Incremental_merge(key=['symbol', 'count'], size=buffer_size)
+        # Rows added or revised by the last get_and_put_next (see Crypto_logger_cascade).
+        self.revised = None
+        self.publisher = None if publish_url is None else Signal_publisher(url=publish_url)
+        self.log_publisher = Log_publisher(self.log_name, fsync=fsync)
+        self.log_screened_publisher = Log_publisher(self.log_screened_name, fsync=fsync)
+        self.log_readers = {}
+        # Set to a Background_writer to log off the loop.
+        self.writer = None
+
         if not exists(directory):
             mkdir(directory)
 
@@ -89,13 +114,39 @@ class Crypto_logger_base(ABC):
                     else:
                         header = [0, 1]
             if dataset is not None:
-                if exists(dataset):
-                    dataset = pd.read_csv(dataset, header=header, index_col=0)
-                    dataset.index = pd.DatetimeIndex(dataset.index)
+                ring_buffer = self.get_ring_buffer(dataset, screened=screened)
+                if ring_buffer is not None and ring_buffer.readonly:
+                    # Published by another process: only its new rows are read.
+                    dataset = ring_buffer.read_latest()
+                elif ring_buffer is not None:
+                    ring_buffer.refresh()
+                    dataset = ring_buffer.to_frame()
                 else:
-                    dataset = None
+                    if dataset not in self.log_readers:
+                        self.log_readers[dataset] = Log_reader(dataset)
+                    # Only parsed again when a new version was published.
+                    dataset = self.log_readers[dataset].read(header=header, index_col=0)
+                    if dataset is not None and not isinstance(dataset.index, pd.DatetimeIndex):
+                        dataset.index = pd.DatetimeIndex(dataset.index)
         return dataset
 
+    def get_ring_buffer(self, 
+                        log_name: str, 
+                        screened: bool = False) -> Union[Ring_buffer, None]:
+        """Map the ring buffer replacing the given CSV log, if there is one."""
+        if screened:
+            return None
+        if log_name == self.log_name:
+            if self.log_format == 'csv':
+                return None
+            if self.ring_buffer is None and Ring_buffer.exists(self.log_ring_name):
+                self.ring_buffer = Ring_buffer(self.log_ring_name, capacity=self.buffer_size, 
+                                               key=['symbol', 'count'] if self.raw else None)
+            return self.ring_buffer
+        if self.input_ring_buffer is None and Ring_buffer.exists(self.input_log_ring_name):
+            self.input_ring_buffer = Ring_buffer(self.input_log_ring_name, readonly=True)
+        return self.input_ring_buffer
+
     @abstractmethod
     def get(self, **kwargs):
         raise NotImplementedError()
@@ -110,29 +161,21 @@ class Crypto_logger_base(ABC):
         """Concatenate old dataset with new dataset in main logger loop and process."""
         dataset = self.maybe_get_from_file(dataset=dataset, inputs=self.raw, screened=False)
         if self.raw:
-            dataset = self.get()
-            if old_dataset is not None:
-                dataset = pd.concat([old_dataset, dataset], axis='index', join='outer')
-            dataset = dataset.copy().reset_index()
-            dataset = dataset.drop_duplicates(subset=['symbol', 'count'], 
-                                              keep='first', ignore_index=True)
-            dataset = dataset.set_index('date')
-            if not self.raw:
-                dataset = resample(dataset, self.interval)
-            dataset = dataset.tail(self.buffer_size)
+            # Only the new (symbol, count) rows are merged into the previous window.
+            dataset = self.merge.merge(old_dataset, self.get() if dataset is None else dataset)
+            self.revised = dataset
         else:
+            self.revised = None
             if dataset is None:
                 if old_dataset is not None:
                     dataset = old_dataset
             else:
                 dataset = self.get(dataset)
-                if old_dataset is not None:
-                    dataset = pd.concat([old_dataset, dataset], axis='index', join='outer')
-                dataset = dataset.copy().reset_index()
-                dataset = dataset.drop_duplicates(keep='last', ignore_index=True)
-                dataset = dataset.set_index('date')
-                dataset = resample(dataset, self.interval)
+                first_bucket = pd.DatetimeIndex(dataset.index).round(self.interval).min()
+                dataset = resample_next(old_dataset, dataset, self.interval)
                 dataset = dataset.tail(self.buffer_size)
+                # Every bucket from the first one the new rows fall in was aggregated again.
+                self.revised = dataset.iloc[dataset.index.searchsorted(first_bucket, side='left'):]
         return dataset
 
     def screen_next(self, 
@@ -158,11 +201,33 @@ class Crypto_logger_base(ABC):
                 dataset_screened = dataset_screened.tail(self.roll)
         return dataset_screened, live_filtered
 
+    def write_dataset(self, dataset: pd.DataFrame) -> None:
+        if self.log_format in ['ring', 'both']:
+            if self.ring_buffer is None:
+                self.ring_buffer = Ring_buffer(self.log_ring_name, capacity=self.buffer_size, 
+                                               key=['symbol', 'count'] if self.raw else None)
+            self.ring_buffer.update(dataset)
+            if self.log_format == 'both' and self.ring_buffer.head > 0:
+                self.log_publisher.publish(self.ring_buffer.to_frame())
+        else:
+            self.log_publisher.publish(dataset)
+
+    def write_screened(self, dataset_screened: pd.DataFrame) -> None:
+        self.log_screened_publisher.publish(dataset_screened)
+        if self.publisher is not None:
+            self.publisher.publish(dataset_screened)
+
     def log_next(self, 
                  dataset: Union[pd.DataFrame, None] = None, 
                  dataset_screened: Union[pd.DataFrame, None] = None) -> None:
-        """Log dataset in main logger loop."""
+        """Log dataset in main logger loop (on the background writer if there is one)."""
         if dataset is not None:
-            dataset.to_csv(self.log_name)
+            if self.writer is None:
+                self.write_dataset(dataset)
+            else:
+                self.writer.submit(self.log_name, self.write_dataset, dataset)
         if dataset_screened is not None:
-            dataset_screened.to_csv(self.log_screened_name)
+            if self.writer is None:
+                self.write_screened(dataset_screened)
+            else:
+                self.writer.submit(self.log_screened_name, self.write_screened, dataset_screened)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/crypto_logger_cascade.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Chain of Binance logger outputs updated in one pass per input bar.
+
+# Library imports.
+from typing import Dict, List, Optional, Tuple, Union
+from .crypto_logger_output import Crypto_logger_output
+import pandas as pd
+
+# Class definition.
+class Crypto_logger_cascade:
+    def __init__(self, 
+                 intervals: List[Tuple[str, int]], 
+                 interval_input: str = '5s', 
+                 input_log_name: str = 'input', 
+                 append: bool = False, 
+                 roll: int = 1000, 
+                 log_format: str = 'ring', 
+                 publish_urls: Optional[Dict[str, str]] = None, 
+                 indicator_triggers: bool = False):
+        """
+        :param intervals: (interval, buffer_size) of every level, each one resampled from the previous one.
+        :param interval_input: OHLCV interval of the datasets fed to the first level.
+        :param input_log_name: either input or output (log the first level reads from).
+        :param append: whether to append the latest screened data to the log dumps or not.
+        :param roll: buffer size to cut oldest data (0 means don't cut).
+        :param log_format: 'ring', 'csv' or 'both' (see Crypto_logger_base).
+        :param publish_urls: ZeroMQ address to push the screened datasets of some levels to, by interval.
+        :param indicator_triggers: also screen the 1min level with the Heikin-Ashi trigger (see screen_all).
+        """
+        self.loggers = {}
+        publish_urls = {} if publish_urls is None else publish_urls
+        for (interval, buffer_size) in intervals:
+            self.loggers[interval] = Crypto_logger_output(interval_input=interval_input, 
+                                                          interval=interval, 
+                                                          buffer_size=buffer_size, 
+                                                          input_log_name=input_log_name, 
+                                                          append=append, 
+                                                          roll=roll, 
+                                                          log_format=log_format, 
+                                                          publish_url=publish_urls.get(interval, None), 
+                                                          indicator_triggers=indicator_triggers)
+            interval_input, input_log_name = interval, 'output'
+        self.datasets = {interval: None for interval in self.loggers}
+        self.datasets_screened = {interval: None for interval in self.loggers}
+
+    @property
+    def first_logger(self) -> Crypto_logger_output:
+        return next(iter(self.loggers.values()))
+
+    def maybe_get_from_file(self) -> None:
+        """Resume every level from its own logs."""
+        for (interval, logger) in self.loggers.items():
+            self.datasets[interval] = \
+                logger.maybe_get_from_file(dataset=None, inputs=False, screened=False)
+            self.datasets_screened[interval] = \
+                logger.maybe_get_from_file(dataset=None, inputs=False, screened=True)
+
+    def get_input_from_file(self, screened: bool = False) -> Union[pd.DataFrame, None]:
+        """Read the log of the first level's input (when it is logged by another process)."""
+        return self.first_logger.maybe_get_from_file(dataset=None, inputs=True, screened=screened)
+
+    def get_and_put_next(self, 
+                         dataset: Union[pd.DataFrame, None] = None) -> Dict[str, Union[pd.DataFrame, None]]:
+        """Update every level from the one below in memory: only the rows it added or revised are resampled."""
+        for (interval, logger) in self.loggers.items():
+            self.datasets[interval] = \
+                logger.get_and_put_next(old_dataset=self.datasets[interval], dataset=dataset)
+            dataset = logger.revised
+        return self.datasets
+
+    def screen_next(self, 
+                    dataset_screened: Union[pd.DataFrame, None] = None, 
+                    live_filtered: Union[List[str], None] = None, 
+                    datasets: Optional[Dict[str, Union[pd.DataFrame, None]]] = None) -> Dict[str, Union[pd.DataFrame, None]]:
+        """Screen every level (of datasets, default is the latest ones) among the assets kept by the level below."""
+        datasets = self.datasets if datasets is None else datasets
+        for (interval, logger) in self.loggers.items():
+            dataset_screened, _ = \
+                logger.screen_next(old_dataset_screened=self.datasets_screened[interval], 
+                                   dataset_screened=dataset_screened, 
+                                   dataset=datasets[interval], live_filtered=live_filtered)
+            self.datasets_screened[interval] = dataset_screened
+            live_filtered = None
+        return self.datasets_screened
+
+    def log_next(self, 
+                 dataset: bool = True, 
+                 dataset_screened: bool = True, 
+                 datasets: Optional[Dict[str, Union[pd.DataFrame, None]]] = None, 
+                 datasets_screened: Optional[Dict[str, Union[pd.DataFrame, None]]] = None) -> None:
+        """Log the datasets and/or the screened datasets (default is the latest ones) of every level."""
+        datasets = self.datasets if datasets is None else datasets
+        datasets_screened = self.datasets_screened if datasets_screened is None else datasets_screened
+        for (interval, logger) in self.loggers.items():
+            logger.log_next(dataset=datasets[interval] if dataset else None, 
+                            dataset_screened=datasets_screened[interval] if dataset_screened else None)
@@ -7,13 +7,14 @@
 # Description: Simple Binance logger circular buffered for N time precision.
 
 # Library imports.
-from typing import List, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 from .crypto_logger_base import Crypto_logger_base
 from .authentication import Cryptocurrency_authenticator
 from .exchange import Cryptocurrency_exchange
 from .conversion import get_timezone_offset_in_seconds
 from .conversion import precompute_shortest_paths
 from .conversion_table import get_conversion_table, get_tradable_tickers_info
+from .ticker_stream import Ticker_stream
 import pandas as pd
 
 # Class definition.
@@ -25,25 +26,32 @@ class Crypto_logger_input(Crypto_logger_base):
                  volume_percent: float = 0.0, 
                  as_pair: bool = False, 
                  append: bool = False, 
-                 roll: int = 1000):
+                 roll: int = 1000, 
+                 log_format: str = 'ring', 
+                 streaming: bool = False, 
+                 stream_url: Optional[str] = None):
         """
         :param interval: OHLCV interval to log. Default is 15 seconds.
         :param buffer_size: buffer size to avoid crashing on memory accesses.
         :param price_percent: price move percent.
         :param volume_percent: volume move percent.
+        :param streaming: snapshot the websocket ticker stream at each interval instead of polling REST.
+        :param stream_url: websocket URL to stream from (default is Binance, see utils/replay.py).
         """
         self.price_percent = price_percent
         self.volume_percent = volume_percent
         self.as_pair = as_pair
         super().__init__(interval=interval, interval_input='', buffer_size=buffer_size, 
                          directory='crypto_logs', log_name='crypto_input_log_' + interval, 
-                         input_log_name='', raw=True, append=append, roll=roll)
+                         input_log_name='', raw=True, append=append, roll=roll, 
+                         log_format=log_format)
 
         authenticator = Cryptocurrency_authenticator(use_keys=False, testnet=False)
         self.client = authenticator.spot_client
 
         exchange = Cryptocurrency_exchange(client=self.client, directory=self.directory)
         self.exchange_info = exchange.info
+        self.symbol_index = exchange.symbol_index
 
         self.shortest_paths = precompute_shortest_paths(self.exchange_info, 
                                                 priority=None, 
@@ -51,6 +59,10 @@ class Crypto_logger_input(Crypto_logger_base):
 
         self.offset_s = get_timezone_offset_in_seconds()
 
+        self.ticker_stream = None
+        if streaming:
+            self.ticker_stream = Ticker_stream(url=stream_url).start()
+
     def filter_movers(self, 
                       dataset: pd.DataFrame, 
                       count: int = 1000, 
@@ -100,11 +112,26 @@ class Crypto_logger_input(Crypto_logger_base):
                                                   volume_percent=self.volume_percent)
         return dataset_screened, live_filtered
 
-    def get(self, dataset: Union[pd.DataFrame, None] = None) -> pd.DataFrame:
-        """Get all pairs data from Binance API."""
+    def fetch(self) -> List[Dict[str, object]]:
+        """24h tickers of all pairs, from the stream or the Binance API."""
+        if self.ticker_stream is not None:
+            try:
+                return self.ticker_stream.get_ticker_at_next_interval(self.interval)
+            except TimeoutError as e:
+                # Stream not connected yet or gone stale: this tick comes from the API.
+                print(e)
+        return self.client.get_ticker()
+
+    def normalize(self, tickers: List[Dict[str, object]]) -> pd.DataFrame:
+        """Conversion table of the tickers fetched, dated at the logged interval."""
         dataset = get_conversion_table(client=self.client, exchange_info=self.exchange_info, 
                                        offset_s=self.offset_s, dump_raw=False, as_pair=self.as_pair, 
                                        minimal=False, extra_minimal=True, super_extra_minimal=False, 
-                                       convert_to_USDT=False, shortest_paths=self.shortest_paths)
+                                       convert_to_USDT=False, shortest_paths=self.shortest_paths, 
+                                       tickers=tickers, symbol_index=self.symbol_index)
         dataset.index = dataset.index.round(self.interval)
         return dataset
+
+    def get(self, dataset: Union[pd.DataFrame, None] = None) -> pd.DataFrame:
+        """Get all pairs data from Binance API."""
+        return self.normalize(self.fetch())
@@ -9,7 +9,8 @@
 # Library imports.
 from typing import List, Tuple, Union
 from .crypto_logger_base import Crypto_logger_base
-from .indicators import filter_in_market, screen_one
+from .indicators import screen_all
+from .indicator_state import Indicator_engine, get_default_indicators
 import pandas as pd
 
 # Class definition.
@@ -20,7 +21,11 @@ class Crypto_logger_output(Crypto_logger_base):
                  buffer_size: int = 60, 
                  input_log_name: str = 'input', 
                  append: bool = True, 
-                 roll: int = 60):
+                 roll: int = 60, 
+                 log_format: str = 'ring', 
+                 publish_url: Union[str, None] = None, 
+                 fsync: str = 'interval', 
+                 indicator_triggers: bool = False):
         """
         :param interval_input: OHLCV interval from input log. Default is 15 seconds.
         :param interval: OHLCV interval to log. Default is 15 seconds.
@@ -28,10 +33,20 @@ class Crypto_logger_output(Crypto_logger_base):
         :param input_log_name: either input or output (this ends up in the log file name).
         :param append: whether to append the latest screened data to the log dumps or not.
         :param roll: buffer size to cut oldest data (0 means don't cut).
+        :param log_format: 'ring', 'csv' or 'both' (see Crypto_logger_base).
+        :param publish_url: ZeroMQ address to push screened datasets to (see Crypto_logger_base).
+        :param fsync: when CSV logs are flushed to disk (see Crypto_logger_base).
+        :param indicator_triggers: also screen the 1min level with the Heikin-Ashi trigger (see screen_all).
         """
         super().__init__(interval=interval, interval_input=interval_input, buffer_size=buffer_size, 
                          directory='crypto_logs', log_name='crypto_output_log_' + interval, 
-                         input_log_name=input_log_name, raw=False, append=append, roll=roll)
+                         input_log_name=input_log_name, raw=False, append=append, roll=roll, 
+                         log_format=log_format, publish_url=publish_url, fsync=fsync)
+        # Indicator states kept from one bar to the next for the 1min triggers (see screen_all).
+        self.indicator_engine = None
+        if indicator_triggers and interval == '1min':
+            self.indicator_engine = Indicator_engine(get_default_indicators(), 
+                                                     volume='rolling_base_volume')
 
     def screen(self, 
                dataset: Union[pd.DataFrame, None], 
@@ -44,7 +59,10 @@ class Crypto_logger_output(Crypto_logger_base):
                 new_columns = (input_filter & old_columns)
                 if live_filtered is not None:
                     new_columns = (new_columns & set(live_filtered))
-                assets = filter_in_market(screen_one, dataset[list(new_columns)])
+                if self.indicator_engine is not None:
+                    # Every symbol is followed, so the states carry over whichever ones are screened.
+                    self.indicator_engine.update(dataset)
+                assets = screen_all(dataset[list(new_columns)], engine=self.indicator_engine)
                 dataset_screened = dataset_screened[dataset_screened['symbol'].isin(assets)]
         return dataset_screened, None
 
@@ -10,6 +10,7 @@ from typing import Optional
 from binance.client import Client
 from os import mkdir
 from os.path import exists, join
+from .symbol_index import Symbol_index
 import pandas as pd
 
 # Class definition.
@@ -26,6 +27,8 @@ class Cryptocurrency_exchange:
         else:
             self.get_exchange_info()
             self.info.to_csv(self.info_path)
+        # Passed along with self.info to the functions looking up symbols.
+        self.symbol_index = Symbol_index(self.info)
 
     def get_exchange_info(self) -> None:
         def build_filters(symbols_info: pd.DataFrame, index: int) -> pd.DataFrame:
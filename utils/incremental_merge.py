@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/incremental_merge.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Rolling window of unique raw ticker rows, merged one tick at a time.
+
+# Library imports.
+from typing import Hashable, List, Optional, Tuple
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Class definition.
+class Incremental_merge:
+    def __init__(self, key: Optional[List[str]] = None, size: int = 3000):
+        """
+        Same as concatenating the window with new rows, dropping duplicate keys (keeping the
+        first row) and keeping the size latest rows, with the keys of the window kept in a
+        hash set so that only the new rows are looked at.
+
+        The window is kept in preallocated arrays (one per column) where only the new rows are
+        written, after the rows of every window handed out so far, which stay valid: each tick
+        returns a DataFrame viewing the arrays instead of a copy of the window.
+
+        :param key: columns identifying a row (default is symbol and count).
+        :param size: number of rows kept (buffer size).
+        """
+        self.key = ['symbol', 'count'] if key is None else key
+        self.size = size
+        self.dataset = None
+        self.keys = set()
+        self.order = deque()
+        self.arrays = None
+        self.index = None
+        self.index_name = None
+        self.start = 0
+        self.end = 0
+
+    def get_keys(self, dataset: pd.DataFrame) -> List[Tuple[Hashable, ...]]:
+        return list(zip(*[dataset[column].tolist() for column in self.key]))
+
+    def reset(self, dataset: Optional[pd.DataFrame] = None) -> None:
+        """Start over from dataset (e.g. the buffer loaded from the logs) without duplicate keys."""
+        self.keys = set()
+        self.order = deque()
+        self.arrays = None
+        if dataset is not None:
+            rows = []
+            for (i, key) in enumerate(self.get_keys(dataset)):
+                if key not in self.keys:
+                    self.keys.add(key)
+                    self.order.append(key)
+                    rows.append(i)
+            if len(rows) < dataset.shape[0]:
+                dataset = dataset.iloc[rows]
+        self.dataset = dataset
+
+    def matches_schema(self, dataset: pd.DataFrame) -> bool:
+        return self.arrays is not None and list(dataset.columns) == list(self.arrays) and \
+            all(dataset[column].dtype == array.dtype for (column, array) in self.arrays.items()) and \
+            dataset.index.dtype == self.index.dtype
+
+    def allocate(self, dataset: pd.DataFrame, rows: int = 0) -> None:
+        """New arrays holding dataset (the window) first, with room for at least rows more."""
+        capacity = max(2 * self.size, dataset.shape[0] + rows)
+        self.arrays = {}
+        for column in dataset.columns:
+            self.arrays[column] = np.empty(capacity, dtype=dataset[column].dtype)
+            self.arrays[column][:dataset.shape[0]] = dataset[column].to_numpy()
+        self.index = np.empty(capacity, dtype=dataset.index.dtype)
+        self.index[:dataset.shape[0]] = dataset.index.to_numpy()
+        self.index_name = dataset.index.name
+        self.start, self.end = 0, dataset.shape[0]
+
+    def write(self, dataset: pd.DataFrame) -> None:
+        """Write the rows of dataset after the window, in new arrays when they are full."""
+        if self.end + dataset.shape[0] > self.index.size:
+            # The windows handed out keep the previous arrays alive and unchanged.
+            window = self.to_frame()
+            self.allocate(window, rows=dataset.shape[0])
+        for (column, array) in self.arrays.items():
+            array[self.end:self.end + dataset.shape[0]] = dataset[column].to_numpy()
+        self.index[self.end:self.end + dataset.shape[0]] = dataset.index.to_numpy()
+        self.end += dataset.shape[0]
+
+    def to_frame(self) -> pd.DataFrame:
+        """The window, viewing the arrays."""
+        return pd.DataFrame({column: array[self.start:self.end] 
+                             for (column, array) in self.arrays.items()}, 
+                            index=pd.Index(self.index[self.start:self.end], name=self.index_name), 
+                            copy=False)
+
+    def merge(self, 
+              old_dataset: Optional[pd.DataFrame], 
+              dataset: pd.DataFrame) -> pd.DataFrame:
+        """Append the rows of dataset whose key is not in old_dataset (the previous window) yet."""
+        if old_dataset is not self.dataset:
+            self.reset(old_dataset)
+        rows = []
+        for (i, key) in enumerate(self.get_keys(dataset)):
+            if key not in self.keys:
+                self.keys.add(key)
+                self.order.append(key)
+                rows.append(i)
+        if len(rows) < dataset.shape[0]:
+            dataset = dataset.iloc[rows]
+        if self.arrays is None or not self.matches_schema(dataset):
+            # First window, or new columns or dtypes: the window is copied into new arrays once.
+            if self.dataset is not None:
+                dataset = pd.concat([self.dataset, dataset], axis='index', join='outer')
+            self.allocate(dataset)
+        else:
+            self.write(dataset)
+        excess = self.end - self.start - self.size
+        if excess > 0:
+            for _ in range(excess):
+                self.keys.discard(self.order.popleft())
+            self.start += excess
+        self.dataset = self.to_frame()
+        return self.dataset
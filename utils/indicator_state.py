@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/indicator_state.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Indicators updated bar by bar from their recursive state, for every symbol at once.
+
+# Library imports.
+from typing import Dict, List, Optional, Tuple
+from abc import abstractmethod, ABC
+from sys import float_info as sflt
+import numpy as np
+import pandas as pd
+
+# Function definitions.
+def push(window: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Drop the oldest row of a (length x symbol) window and append values."""
+    return np.concatenate([window[1:], values[None, :]], axis=0)
+
+def divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return numerator / denominator
+
+def get_rma_state(size: int) -> Dict[str, np.ndarray]:
+    return {'numerator': np.zeros(size), 'denominator': np.zeros(size), 'count': np.zeros(size)}
+
+def step_rma(state: Dict[str, np.ndarray], 
+             values: np.ndarray, 
+             length: int) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """pandas_ta rma: ewm(alpha=1 / length, min_periods=length).mean(), one row at a time."""
+    decay = 1 - 1 / length
+    valid = ~np.isnan(values)
+    state = {'numerator': state['numerator'] * decay + np.where(valid, values, 0), 
+             'denominator': state['denominator'] * decay + valid, 
+             'count': state['count'] + valid}
+    average = divide(state['numerator'], state['denominator'])
+    return state, np.where(state['count'] >= length, average, np.nan)
+
+def get_seeded_state(size: int) -> Dict[str, object]:
+    return {'count': 0, 'sum': np.zeros(size), 'value': np.full(size, np.nan)}
+
+def step_seeded(state: Dict[str, object], 
+                values: np.ndarray, 
+                length: int, 
+                alpha: float) -> Tuple[Dict[str, object], np.ndarray]:
+    """TA-Lib EMA (alpha=2 / (length + 1)) and Wilder (alpha=1 / length): seeded with the SMA of length values."""
+    count = state['count'] + 1
+    if count < length:
+        return {'count': count, 'sum': state['sum'] + values, 'value': state['value']}, state['value']
+    elif count == length:
+        value = (state['sum'] + values) / length
+    else:
+        value = state['value'] + alpha * (values - state['value'])
+    return {'count': count, 'sum': state['sum'], 'value': value}, value
+
+def get_default_indicators() -> List['Indicator']:
+    """Indicators used by the triggers in utils/indicators.py."""
+    return [RSI(length=6), RSI(length=12), RSI(length=24), KDJ(length=5, signal=3), 
+            JMA(length=7, phase=0), RSI_reversal(length=2, upper_threshold=95, lower_threshold=5), 
+            MACD(fast=12, slow=26, signal=9, heikin_ashi=True), CCI(length=22, heikin_ashi=True), 
+            MFI(length=11, heikin_ashi=True), ADX(length=14, lensig=8, heikin_ashi=True), 
+            ADX(length=14, heikin_ashi=True), CHOP(length=14, heikin_ashi=True), 
+            RSI(length=5, heikin_ashi=True)]
+
+# Class definition.
+class Indicator(ABC):
+    """
+    Indicator whose value at a bar only depends on a bounded state carried over from the
+    previous bar: step() returns the next state and the outputs at the new bar, without
+    modifying the previous state (so a bar still forming can be evaluated and discarded).
+    """
+    def __init__(self, heikin_ashi: bool = False):
+        """
+        :param heikin_ashi: compute the indicator on Heikin-Ashi bars instead of the OHLC bars.
+        """
+        self.heikin_ashi = heikin_ashi
+        self.params = ()
+
+    @property
+    def name(self) -> str:
+        name = '_'.join([type(self).__name__] + [str(param) for param in self.params])
+        return 'HA_' + name if self.heikin_ashi else name
+
+    @abstractmethod
+    def get_state(self, size: int) -> Dict[str, object]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def step(self, 
+             state: Dict[str, object], 
+             bar: Dict[str, np.ndarray]) -> Tuple[Dict[str, object], Dict[str, np.ndarray]]:
+        raise NotImplementedError()
+
+class RSI(Indicator):
+    def __init__(self, length: int = 14, heikin_ashi: bool = False):
+        """TA-Lib RSI (pandas_ta rsi with talib=True)."""
+        super().__init__(heikin_ashi=heikin_ashi)
+        self.length = length
+        self.params = (length,)
+
+    def get_state(self, size: int) -> Dict[str, object]:
+        return {'count': 0, 'close': np.full(size, np.nan), 
+                'gain': get_seeded_state(size), 'loss': get_seeded_state(size)}
+
+    def step(self, state, bar):
+        change = bar['close'] - state['close']
+        if state['count'] == 0: # First bar.
+            return dict(state, count=1, close=bar['close']), {self.name: np.full(change.size, np.nan)}
+        gain_state, gain = step_seeded(state['gain'], np.maximum(change, 0), self.length, 1 / self.length)
+        loss_state, loss = step_seeded(state['loss'], np.maximum(-change, 0), self.length, 1 / self.length)
+        rsi = np.where(gain + loss != 0, 100 * divide(gain, gain + loss), 0)
+        rsi = np.where(np.isnan(gain + loss), np.nan, rsi)
+        state = {'count': state['count'] + 1, 'close': bar['close'], 'gain': gain_state, 'loss': loss_state}
+        return state, {self.name: rsi}
+
+class RSI_reversal(Indicator):
+    def __init__(self, 
+                 length: int = 2, 
+                 upper_threshold: float = 95, 
+                 lower_threshold: float = 5, 
+                 heikin_ashi: bool = False):
+        """Latest RSI threshold crossing (1 bearish, -1 bullish, see get_RSI_reversal_trigger)."""
+        super().__init__(heikin_ashi=heikin_ashi)
+        self.rsi = RSI(length=length)
+        self.upper_threshold = upper_threshold
+        self.lower_threshold = lower_threshold
+        self.params = (length, upper_threshold, lower_threshold)
+
+    def get_state(self, size: int) -> Dict[str, object]:
+        return {'rsi': self.rsi.get_state(size), 'previous': np.full(size, np.nan), 
+                'signal': np.zeros(size)}
+
+    def step(self, state, bar):
+        rsi_state, rsi = self.rsi.step(state['rsi'], bar)
+        rsi, previous = rsi[self.rsi.name], state['previous']
+        bear = (previous >= self.upper_threshold) & (rsi < self.upper_threshold)
+        bull = (previous <= self.lower_threshold) & (rsi > self.lower_threshold)
+        signal = bear.astype(int) - bull.astype(int)
+        # replace(to_replace=0, method='pad'): keep the latest crossing.
+        signal = np.where(signal != 0, signal, state['signal'])
+        return {'rsi': rsi_state, 'previous': rsi, 'signal': signal}, {self.name: signal}
+
+class MACD(Indicator):
+    def __init__(self, 
+                 fast: int = 12, 
+                 slow: int = 26, 
+                 signal: int = 9, 
+                 heikin_ashi: bool = False):
+        """
+        TA-Lib MACD (pandas_ta macd with talib=True): both EMAs are seeded at the same bar, 
+        and all outputs start once the signal line is seeded.
+        """
+        super().__init__(heikin_ashi=heikin_ashi)
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        self.params = (fast, slow, signal)
+
+    def get_state(self, size: int) -> Dict[str, object]:
+        return {'count': 0, 'window': np.full((self.slow, size), np.nan), 
+                'fast': np.full(size, np.nan), 'slow': np.full(size, np.nan), 
+                'signal': get_seeded_state(size)}
+
+    def step(self, state, bar):
+        close = bar['close']
+        count = state['count'] + 1
+        window, fast, slow = state['window'], state['fast'], state['slow']
+        if count < self.slow:
+            window = push(window, close)
+        elif count == self.slow:
+            window = push(window, close)
+            fast = window[-self.fast:].mean(axis=0)
+            slow = window.mean(axis=0)
+        else:
+            fast = fast + 2 / (self.fast + 1) * (close - fast)
+            slow = slow + 2 / (self.slow + 1) * (close - slow)
+        signal_state, signal = state['signal'], np.full(close.size, np.nan)
+        if count >= self.slow:
+            signal_state, signal = step_seeded(signal_state, fast - slow, self.signal, 2 / (self.signal + 1))
+        ready = count >= self.slow + self.signal - 1
+        macd = fast - slow if ready else np.full(close.size, np.nan)
+        suffix = '_{}_{}_{}'.format(self.fast, self.slow, self.signal)
+        state = {'count': count, 'window': window, 'fast': fast, 'slow': slow, 'signal': signal_state}
+        return state, {'MACD' + suffix: macd, 'MACDh' + suffix: macd - signal, 'MACDs' + suffix: signal}
+
+class KDJ(Indicator):
+    def __init__(self, length: int = 9, signal: int = 3, heikin_ashi: bool = False):
+        """pandas_ta kdj."""
+        super().__init__(heikin_ashi=heikin_ashi)
+        self.length = length
+        self.signal = signal
+        self.params = (length, signal)
+
+    def get_state(self, size: int) -> Dict[str, object]:
+        return {'high': np.full((self.length, size), np.nan), 
+                'low': np.full((self.length, size), np.nan), 
+                'k': get_rma_state(size), 'd': get_rma_state(size)}
+
+    def step(self, state, bar):
+        high, low = push(state['high'], bar['high']), push(state['low'], bar['low'])
+        highest_high, lowest_low = high.max(axis=0), low.min(axis=0)
+        price_range = highest_high - lowest_low
+        price_range = np.where(price_range == 0, sflt.epsilon, price_range)
+        fast_k = 100 * (bar['close'] - lowest_low) / price_range
+        k_state, k = step_rma(state['k'], fast_k, self.signal)
+        d_state, d = step_rma(state['d'], k, self.signal)
+        suffix = '_{}_{}'.format(self.length, self.signal)
+        state = {'high': high, 'low': low, 'k': k_state, 'd': d_state}
+        return state, {'K' + suffix: k, 'D' + suffix: d, 'J' + suffix: 3 * k - 2 * d}
+
+class JMA(Indicator):
+    sum_length = 10
+    average_length = 65
+
+    def __init__(self, length: int = 7, phase: float = 0, heikin_ashi: bool = False):
+        """pandas_ta jma (Jurik moving average)."""
+        super().__init__(heikin_ashi=heikin_ashi)
+        self.length = length
+        self.phase = phase
+        self.params = (length, phase)
+        half_length = 0.5 * (length - 1)
+        self.pr = 0.5 if phase < -100 else 2.5 if phase > 100 else 1.5 + phase * 0.01
+        self.length1 = max((np.log(np.sqrt(half_length)) / np.log(2.0)) + 2.0, 0)
+        self.pow1 = max(self.length1 - 2.0, 0.5)
+        length2 = self.length1 * np.sqrt(half_length)
+        self.bet = length2 / (length2 + 1)
+        self.beta = 0.45 * (length - 1) / (0.45 * (length - 1) + 2.0)
+
+    def get_state(self, size: int) -> Dict[str, object]:
+        return {'count': 0, 'volty': np.zeros((self.sum_length + 1, size)), 
+                'v_sum': np.zeros((self.average_length + 1, size)), 
+                'upper_band': np.full(size, np.nan), 'lower_band': np.full(size, np.nan), 
+                'ma1': np.full(size, np.nan), 'det0': np.zeros(size), 'det1': np.zeros(size), 
+                'jma': np.full(size, np.nan)}
+
+    def step(self, state, bar):
+        price = bar['close']
+        count = state['count'] + 1
+        if count == 1:
+            state = dict(state, count=count, upper_band=price, lower_band=price, ma1=price, jma=price)
+        else:
+            del1 = price - state['upper_band']
+            del2 = price - state['lower_band']
+            volty = np.where(np.abs(del1) != np.abs(del2), np.maximum(np.abs(del1), np.abs(del2)), 0)
+            volty_window = push(state['volty'], volty)
+            v_sum = state['v_sum'][-1] + (volty - volty_window[0]) / self.sum_length
+            v_sum_window = push(state['v_sum'], v_sum)
+            average_volty = v_sum_window[-min(count, self.average_length + 1):].mean(axis=0)
+            d_volty = np.where(average_volty == 0, 0, divide(volty, average_volty))
+            r_volty = np.maximum(1.0, np.minimum(np.power(self.length1, 1 / self.pow1), d_volty))
+            power = np.power(r_volty, self.pow1)
+            kv = np.power(self.bet, np.sqrt(power))
+            upper_band = np.where(del1 > 0, price, price - kv * del1)
+            lower_band = np.where(del2 < 0, price, price - kv * del2)
+            alpha = np.power(self.beta, power)
+            ma1 = (1 - alpha) * price + alpha * state['ma1']
+            det0 = (price - ma1) * (1 - self.beta) + self.beta * state['det0']
+            ma2 = ma1 + self.pr * det0
+            det1 = (ma2 - state['jma']) * (1 - alpha) * (1 - alpha) + alpha * alpha * state['det1']
+            state = {'count': count, 'volty': volty_window, 'v_sum': v_sum_window, 
+                     'upper_band': upper_band, 'lower_band': lower_band, 
+                     'ma1': ma1, 'det0': det0, 'det1': det1, 'jma': state['jma'] + det1}
+        jma = state['jma'] if count >= self.length else np.full(price.size, np.nan)
+        return state, {self.name: jma}
+
+class ATR(Indicator):
+    def __init__(self, length: int = 14, heikin_ashi: bool = False):
+        """TA-Lib ATR (a length of 1 is the true range)."""
+        super().__init__(heikin_ashi=heikin_ashi)
+        self.length = length
+        self.params = (length,)
+
+    def get_state(self, size: int) -> Dict[str, object]:
+        return {'count': 0, 'close': np.full(size, np.nan), 'atr': get_seeded_state(size)}
+
+    def step(self, state, bar):
+        if state['count'] == 0: # First bar.
+            return dict(state, count=1, close=bar['close']), {self.name: np.full(bar['close'].size, np.nan)}
+        true_range = np.maximum(bar['high'] - bar['low'], np.maximum(
+            np.abs(bar['high'] - state['close']), np.abs(bar['low'] - state['close'])))
+        atr_state, atr = step_seeded(state['atr'], true_range, self.length, 1 / self.length)
+        return {'count': state['count'] + 1, 'close': bar['close'], 'atr': atr_state}, {self.name: atr}
+
+class ADX(Indicator):
+    def __init__(self, length: int = 14, lensig: Optional[int] = None, heikin_ashi: bool = False):
+        """pandas_ta adx (with TA-Lib ATR)."""
+        super().__init__(heikin_ashi=heikin_ashi)
+        self.length = length
+        self.lensig = length if lensig is None else lensig
+        self.atr = ATR(length=length)
+        self.params = (length, self.lensig)
+
+    def get_state(self, size: int) -> Dict[str, object]:
+        return {'high': np.full(size, np.nan), 'low': np.full(size, np.nan), 
+                'atr': self.atr.get_state(size), 'positive': get_rma_state(size), 
+                'negative': get_rma_state(size), 'adx': get_rma_state(size)}
+
+    def step(self, state, bar):
+        atr_state, atr = self.atr.step(state['atr'], bar)
+        up = bar['high'] - state['high']
+        down = state['low'] - bar['low']
+        positive = np.where((up > down) & (up > 0), up, np.where(np.isnan(up), np.nan, 0))
+        negative = np.where((down > up) & (down > 0), down, np.where(np.isnan(down), np.nan, 0))
+        positive = np.where(np.abs(positive) < sflt.epsilon, 0, positive)
+        negative = np.where(np.abs(negative) < sflt.epsilon, 0, negative)
+        k = divide(100, atr[self.atr.name])
+        positive_state, dmp = step_rma(state['positive'], positive, self.length)
+        negative_state, dmn = step_rma(state['negative'], negative, self.length)
+        dmp, dmn = k * dmp, k * dmn
+        dx = 100 * divide(np.abs(dmp - dmn), dmp + dmn)
+        adx_state, adx = step_rma(state['adx'], dx, self.lensig)
+        state = {'high': bar['high'], 'low': bar['low'], 'atr': atr_state, 
+                 'positive': positive_state, 'negative': negative_state, 'adx': adx_state}
+        return state, {'ADX_{}'.format(self.lensig): adx, 
+                       'DMP_{}'.format(self.length): dmp, 'DMN_{}'.format(self.length): dmn}
+
+class CCI(Indicator):
+    def __init__(self, length: int = 14, heikin_ashi: bool = False):
+        """TA-Lib CCI (pandas_ta cci with talib=True)."""
+        super().__init__(heikin_ashi=heikin_ashi)
+        self.length = length
+        self.params = (length,)
+
+    def get_state(self, size: int) -> Dict[str, object]:
+        return {'count': 0, 'typical_price': np.full((self.length, size), np.nan)}
+
+    def step(self, state, bar):
+        typical_price = (bar['high'] + bar['low'] + bar['close']) / 3
+        window = push(state['typical_price'], typical_price)
+        state = {'count': state['count'] + 1, 'typical_price': window}
+        if state['count'] < self.length:
+            return state, {self.name: np.full(typical_price.size, np.nan)}
+        average = window.mean(axis=0)
+        deviation = np.abs(window - average).mean(axis=0)
+        difference = typical_price - average
+        cci = np.where((difference != 0) & (deviation != 0), divide(difference, 0.015 * deviation), 0)
+        return state, {self.name: cci}
+
+class MFI(Indicator):
+    def __init__(self, length: int = 14, heikin_ashi: bool = False):
+        """TA-Lib MFI (pandas_ta mfi with talib=True)."""
+        super().__init__(heikin_ashi=heikin_ashi)
+        self.length = length
+        self.params = (length,)
+
+    def get_state(self, size: int) -> Dict[str, object]:
+        return {'count': 0, 'typical_price': np.full(size, np.nan), 
+                'positive': np.zeros((self.length, size)), 'negative': np.zeros((self.length, size))}
+
+    def step(self, state, bar):
+        typical_price = (bar['high'] + bar['low'] + bar['close']) / 3
+        money_flow = typical_price * bar['volume']
+        previous = state['typical_price']
+        positive = push(state['positive'], np.where(typical_price > previous, money_flow, 0))
+        negative = push(state['negative'], np.where(typical_price < previous, money_flow, 0))
+        state = {'count': state['count'] + 1, 'typical_price': typical_price, 
+                 'positive': positive, 'negative': negative}
+        if state['count'] <= self.length:
+            return state, {self.name: np.full(typical_price.size, np.nan)}
+        positive, total = positive.sum(axis=0), positive.sum(axis=0) + negative.sum(axis=0)
+        return state, {self.name: np.where(total < 1, 0, 100 * divide(positive, total))}
+
+class CHOP(Indicator):
+    def __init__(self, length: int = 14, atr_length: int = 1, heikin_ashi: bool = False):
+        """pandas_ta chop (with TA-Lib ATR)."""
+        super().__init__(heikin_ashi=heikin_ashi)
+        self.length = length
+        self.atr = ATR(length=atr_length)
+        self.params = (length, atr_length, 100)
+
+    def get_state(self, size: int) -> Dict[str, object]:
+        return {'atr': self.atr.get_state(size), 
+                'atrs': np.full((self.length, size), np.nan), 
+                'high': np.full((self.length, size), np.nan), 
+                'low': np.full((self.length, size), np.nan)}
+
+    def step(self, state, bar):
+        atr_state, atr = self.atr.step(state['atr'], bar)
+        atrs = push(state['atrs'], atr[self.atr.name])
+        high, low = push(state['high'], bar['high']), push(state['low'], bar['low'])
+        price_range = high.max(axis=0) - low.min(axis=0)
+        price_range = np.where(price_range == 0, sflt.epsilon, price_range)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            chop = 100 * (np.log10(atrs.sum(axis=0)) - np.log10(price_range)) / np.log10(self.length)
+        state = {'atr': atr_state, 'atrs': atrs, 'high': high, 'low': low}
+        return state, {self.name: chop}
+
+class Indicator_engine:
+    """
+    Keeps the state of every indicator after the latest closed bar of a (symbol, feature)
+    dataset, so each new bar costs one step instead of a recompute over the whole buffer.
+    The latest pending bars may still be revised by the loggers: they are evaluated from
+    the committed state on every update and only committed once they are older. Anything
+    else (restart, gap, revised committed bar, new symbols) recomputes from the whole buffer.
+    """
+    def __init__(self, 
+                 indicators: List[Indicator], 
+                 volume: str = 'base_volume', 
+                 history: int = 3, 
+                 pending: int = 2):
+        """
+        :param indicators: indicators to keep up to date.
+        :param volume: feature used as the volume (e.g. rolling_base_volume at 1min).
+        :param history: number of latest values kept for every output (e.g. for .iat[-2]).
+        :param pending: number of latest bars not committed to the state yet.
+        """
+        self.indicators = indicators
+        self.volume = volume
+        self.history = history
+        self.pending = pending
+        self.heikin_ashi = any([indicator.heikin_ashi for indicator in indicators])
+        self.symbols = None
+        self.last_date = None
+        self.last_bar = None
+        self.frequency = None
+        self.states = None
+        self.values = None
+        self.latest = None
+        self.recomputes = 0
+
+    def get_bars(self, dataset: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """(time x symbol) arrays of open, high, low, close and volume."""
+        features = {'open': 'open', 'high': 'high', 'low': 'low', 'close': 'close', 'volume': self.volume}
+        return {name: dataset.xs(feature, axis='columns', level=1).reindex(
+                    columns=self.symbols).to_numpy(dtype=float)
+                for (name, feature) in features.items()}
+
+    def get_state(self) -> Dict[str, object]:
+        size = len(self.symbols)
+        states = {indicator.name: indicator.get_state(size) for indicator in self.indicators}
+        states['heikin_ashi'] = {'open': np.full(size, np.nan), 'close': np.full(size, np.nan)}
+        return states
+
+    def step(self, 
+             states: Dict[str, object], 
+             bar: Dict[str, np.ndarray]) -> Tuple[Dict[str, object], Dict[str, Dict[str, np.ndarray]]]:
+        states = dict(states)
+        heikin_ashi_bar = None
+        if self.heikin_ashi:
+            heikin_ashi_close = (bar['open'] + bar['high'] + bar['low'] + bar['close']) / 4
+            previous = states['heikin_ashi']
+            heikin_ashi_open = np.where(np.isnan(previous['open']), (bar['open'] + bar['close']) / 2, 
+                                        (previous['open'] + previous['close']) / 2)
+            heikin_ashi_bar = {'open': heikin_ashi_open, 'close': heikin_ashi_close, 
+                               'high': np.maximum(bar['high'], np.maximum(heikin_ashi_open, heikin_ashi_close)), 
+                               'low': np.minimum(bar['low'], np.minimum(heikin_ashi_open, heikin_ashi_close)), 
+                               'volume': bar['volume']}
+            states['heikin_ashi'] = {'open': heikin_ashi_open, 'close': heikin_ashi_close}
+        outputs = {}
+        for indicator in self.indicators:
+            states[indicator.name], outputs[indicator.name] = indicator.step(
+                states[indicator.name], heikin_ashi_bar if indicator.heikin_ashi else bar)
+        return states, outputs
+
+    def run(self, 
+            states: Dict[str, object], 
+            bars: Dict[str, np.ndarray], 
+            values: Dict[str, Dict[str, np.ndarray]]) -> Tuple[Dict[str, object], Dict[str, Dict[str, np.ndarray]]]:
+        """Step through every row of bars, keeping the latest history values of every output."""
+        for row in range(bars['close'].shape[0]):
+            states, outputs = self.step(states, {name: bar[row] for (name, bar) in bars.items()})
+            for (name, output) in outputs.items():
+                for (column, value) in output.items():
+                    history = values.get(name, {}).get(column, np.full((self.history, value.size), np.nan))
+                    values.setdefault(name, {})[column] = push(history, value)
+        return states, values
+
+    def needs_recompute(self, dataset: pd.DataFrame, symbols: pd.Index) -> bool:
+        if self.last_date is None or not symbols.equals(self.symbols):
+            return True
+        index = pd.DatetimeIndex(dataset.index)
+        position = index.searchsorted(self.last_date)
+        if position >= index.size or index[position] != self.last_date:
+            return True # The committed bar is gone (e.g. the buffer rolled over during a pause).
+        if (index[position + 1:] - index[position:-1] > self.frequency).any():
+            return True # Missing bars.
+        last_bar = self.get_bars(dataset.iloc[position:position + 1])
+        return not all([np.array_equal(last_bar[name], self.last_bar[name], equal_nan=True)
+                        for name in last_bar])
+
+    def update(self, dataset: pd.DataFrame) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Return the latest values of every indicator output as (history x symbol) arrays, 
+        by name (e.g. values['RSI_14']['RSI_14'][-1] is the RSI at the latest bar).
+        """
+        dataset = dataset.loc[:, ~dataset.columns.duplicated()]
+        symbols = dataset.columns.get_level_values(0).unique()
+        if self.needs_recompute(dataset, symbols):
+            self.recomputes += 1
+            self.symbols = symbols
+            index = pd.DatetimeIndex(dataset.index)
+            self.frequency = (index[1:] - index[:-1]).min() if index.size > 1 else pd.Timedelta(0)
+            self.states, self.values = self.get_state(), {}
+            start = 0
+        else:
+            start = pd.DatetimeIndex(dataset.index).searchsorted(self.last_date) + 1
+        # Commit the bars up to the pending ones, then evaluate those from the committed state.
+        end = max(dataset.shape[0] - self.pending, start)
+        if end > start:
+            bars = self.get_bars(dataset.iloc[start:end])
+            self.states, self.values = self.run(self.states, bars, self.values)
+            self.last_date = dataset.index[end - 1]
+            self.last_bar = {name: bar[-1:] for (name, bar) in bars.items()}
+        bars = self.get_bars(dataset.iloc[end:])
+        values = {name: dict(output) for (name, output) in self.values.items()}
+        _, values = self.run(self.states, bars, values)
+        self.latest = values
+        return values
+
+    def get_triggers(self, function, symbols: pd.Index, **kwargs) -> np.ndarray:
+        """function(latest values) (e.g. get_heikin_ashi_triggers) for symbols, False for those not followed."""
+        if self.latest is None:
+            return np.zeros(len(symbols), dtype=bool)
+        triggers = pd.Series(function(self.latest, **kwargs), index=self.symbols)
+        return triggers.reindex(symbols, fill_value=False).to_numpy(dtype=bool)
@@ -10,10 +10,27 @@
 from .renko import get_renko_trigger
 from sys import float_info as sflt
 from numpy import log
-from pandas_ta.utils._core import signed_series, recent_minimum_index
-import pandas_ta as ta
+from .lazy import lazy_import
+import warnings
+import numpy as np
 import pandas as pd
 
+# pandas_ta is only loaded by the single-pair indicators, screen_all doesn't need it.
+ta = lazy_import('pandas_ta')
+ta_core = lazy_import('pandas_ta.utils._core')
+
+# Class definition.
+class Lazy_ta_accessor:
+    """DataFrame.ta, importing pandas_ta (which then registers its own accessor) on first use."""
+    def __new__(cls, data: pd.DataFrame):
+        with warnings.catch_warnings():
+            # pandas_ta replacing this accessor is expected.
+            warnings.simplefilter('ignore', UserWarning)
+            return ta.AnalysisIndicators(data)
+
+if not hasattr(pd.DataFrame, 'ta'):
+    pd.api.extensions.register_dataframe_accessor('ta')(Lazy_ta_accessor)
+
 # Function definitions.
 def filter_in_market(function, dataset):
     def f(x):
@@ -117,12 +134,12 @@ def get_ease_of_movement_trigger(data):
     data[['open', 'high', 'low', 'close']] += sflt.epsilon
     data[['volume']] += 1
     log_price = log(data['close'])
-    price_trough_index = recent_minimum_index(signed_series(log_price, initial=None))
+    price_trough_index = ta_core.recent_minimum_index(ta_core.signed_series(log_price, initial=None))
     price_slope = ta.slope(close=log_price, length=price_trough_index, as_angle=True, 
                            to_degrees=True, talib=True)
 
     EOM = get_ease_of_movement(data)
-    EOM_trough_index = recent_minimum_index(signed_series(EOM, initial=None))
+    EOM_trough_index = ta_core.recent_minimum_index(ta_core.signed_series(EOM, initial=None))
     EOM_slope = ta.slope(close=EOM, length=EOM_trough_index, as_angle=True, 
                          to_degrees=True, talib=True)
 
@@ -291,3 +308,91 @@ def screen_one(pair):
         else:
             return True
     return False
+
+def get_feature_values(dataset, feature, symbols):
+    """(time x symbol) array of one feature (NaN for symbols without it)."""
+    return dataset.xs(feature, axis='columns', level=1).reindex(columns=symbols).to_numpy(dtype=float)
+
+def get_unique_counts(values):
+    """Same as Series.unique().size for every column (NaN counts as one value)."""
+    values = np.sort(values, axis=0) # NaNs last.
+    valid = ~np.isnan(values)
+    counts = valid[0].astype(int) + ((values[1:] != values[:-1]) & valid[1:]).sum(axis=0)
+    return counts + (~valid).any(axis=0)
+
+def get_not_square_wave_triggers_all(close, multiplications=10):
+    """get_not_square_wave_triggers for every column of a (time x symbol) close array."""
+    multiplications = min(close.shape[0] // 5, multiplications)
+    triggers = np.ones(close.shape[1], dtype=bool)
+    for multiplier in range(1, multiplications + 1):
+        triggers &= (get_unique_counts(close[-5 * multiplier:]) >= 2 * multiplier)
+    return triggers
+
+def get_pct_change_last(values, periods=1):
+    """Same as Series.pct_change(periods).iat[-1] for every column."""
+    if values.shape[0] <= periods:
+        return np.full(values.shape[1], np.nan)
+    values = pd.DataFrame(values).fillna(method='pad').to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return values[-1] / values[-1 - periods] - 1
+
+def screen_all(dataset, engine=None):
+    """
+    Same as filter_in_market(screen_one, dataset), on (time x symbol) arrays at once. Given
+    the Indicator_engine of a 1min logger built with indicator_triggers=True (updated with its
+    whole dataset), the Heikin-Ashi trigger commented out in screen_one is applied at 1min too.
+    """
+    dataset = dataset.loc[:, ~dataset.columns.duplicated()]
+    symbols = dataset.columns.get_level_values(0).unique()
+    if symbols.size == 0:
+        return pd.Series([], dtype='str')
+    close = get_feature_values(dataset, 'close', symbols)
+    triggers = get_not_square_wave_triggers_all(close, multiplications=10)
+    frequency = (dataset.index[1:] - dataset.index[:-1]).min()
+    frequency = pd.tseries.frequencies.to_offset(frequency)
+    frequency_1min = pd.tseries.frequencies.to_offset('1min')
+    frequency_1d = pd.tseries.frequencies.to_offset('1d')
+    if frequency_1min <= frequency < frequency_1d:
+        rolling_base_volume = get_feature_values(dataset, 'rolling_base_volume', symbols)
+        # get_rising_volume_trigger.
+        if rolling_base_volume.shape[0] > 1:
+            triggers &= (rolling_base_volume[-1] - rolling_base_volume[-2] > 0)
+        else:
+            triggers &= False
+        if frequency == frequency_1min:
+            # get_minute_daily_volume_minimum_trigger and get_minute_daily_volume_change_trigger.
+            triggers &= (rolling_base_volume[-1] > 1000000)
+            triggers &= ((get_pct_change_last(rolling_base_volume, periods=1440) * 100) > 0)
+            if engine is not None:
+                triggers &= engine.get_triggers(get_heikin_ashi_triggers, symbols)
+    return pd.Series(symbols[triggers].tolist(), dtype='str')
+
+def get_positive_RSI_triggers(values):
+    """get_positive_RSI_trigger for every symbol, from Indicator_engine.update() values."""
+    RSI_6 = values['RSI_6']['RSI_6'][-1]
+    RSI_12 = values['RSI_12']['RSI_12'][-1]
+    RSI_24 = values['RSI_24']['RSI_24'][-1]
+    return (RSI_6 > RSI_12) | (RSI_6 > RSI_24) | (RSI_12 > RSI_24)
+
+def get_positive_momentum_triggers(values):
+    KDJ = values['KDJ_5_3']
+    return (KDJ['J_5_3'][-1] > KDJ['D_5_3'][-1]) & (KDJ['J_5_3'][-1] > KDJ['K_5_3'][-1])
+
+def get_positive_JMA_triggers(values, close):
+    """close: latest close of every symbol (Indicator_engine.symbols order)."""
+    return close < values['JMA_7_0']['JMA_7_0'][-1]
+
+def get_RSI_reversal_triggers(values, positive=True):
+    return values['RSI_reversal_2_95_5']['RSI_reversal_2_95_5'][-1] == (1 if positive else -1)
+
+def get_heikin_ashi_triggers(values):
+    """get_heikin_ashi_trigger for every symbol (the indicators are computed on Heikin-Ashi bars)."""
+    MACD = values['HA_MACD_12_26_9']
+    histogram = MACD['MACDs_12_26_9'] - MACD['MACD_12_26_9']
+    positive_phase = (histogram[-1] > histogram[-2]) | \
+        (MACD['MACD_12_26_9'][-1] > MACD['MACDs_12_26_9'][-1])
+    not_negative_rebound = (values['HA_CCI_22']['HA_CCI_22'][-1] > 0) | \
+        (values['HA_MFI_11']['HA_MFI_11'][-1] > 20)
+    ADX = values['HA_ADX_14_8']
+    not_negative_trend_strength = (ADX['DMP_14'][-1] > ADX['DMN_14'][-1]) & (ADX['ADX_8'][-1] > 0.30)
+    return positive_phase | not_negative_rebound | not_negative_trend_strength
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/kline_cache.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Persistent per-symbol klines cache, partitioned by day in NumPy columns.
+
+# Library imports.
+from typing import Dict, List, Optional, Tuple, Union
+from os.path import exists, join
+from .ohlcv import klines_to_columns
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+# Class definition.
+class Kline_cache:
+    milliseconds = {'m': 60000, 'h': 3600000, 'd': 86400000, 'w': 604800000}
+    day_ms = 86400000
+
+    def __init__(self, 
+                 directory: str = 'crypto_klines', 
+                 interval: str = '1m', 
+                 retention: str = '7d'):
+        """
+        Klines of every symbol are kept in one .npz file of typed columns per UTC day, 
+        along with the time ranges already fetched (so that a listing gap or a halt is not
+        requested again).
+
+        :param directory: where to keep the cache (not crypto_logs, which bootstrap.py wipes).
+        :param interval: kline interval (1m, 1h, 1d...).
+        :param retention: age past which compact() drops the cached klines.
+        """
+        self.directory = join(directory, interval)
+        self.interval = interval
+        self.interval_ms = int(''.join(filter(str.isdigit, interval))) * \
+            self.milliseconds[''.join(filter(str.isalpha, interval))]
+        self.retention_ms = int(pd.Timedelta(retention).total_seconds() * 1000)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_window(self, period: int) -> Tuple[int, int]:
+        """(start, end) in ms of the last period intervals."""
+        now_ms = int(time.time() * 1000)
+        return now_ms - period * self.interval_ms, now_ms
+
+    def get_symbol_directory(self, symbol: str) -> str:
+        return join(self.directory, symbol)
+
+    def get_partition_path(self, symbol: str, day: int) -> str:
+        day = pd.Timestamp(day * self.day_ms, unit='ms').strftime('%Y%m%d')
+        return join(self.get_symbol_directory(symbol), day + '.npz')
+
+    def get_ranges(self, symbol: str) -> List[List[int]]:
+        path = join(self.get_symbol_directory(symbol), 'ranges.json')
+        if not exists(path):
+            return []
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def set_ranges(self, symbol: str, ranges: List[List[int]]) -> None:
+        path = join(self.get_symbol_directory(symbol), 'ranges.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(ranges, f)
+        os.replace(path + '.tmp', path)
+
+    def add_range(self, symbol: str, start_ms: int, end_ms: int) -> None:
+        """Mark [start_ms, end_ms] as fetched, merging overlapping ranges."""
+        merged = []
+        for (range_start_ms, range_end_ms) in sorted(self.get_ranges(symbol) + [[start_ms, end_ms]]):
+            if len(merged) > 0 and range_start_ms <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], range_end_ms)
+            else:
+                merged.append([range_start_ms, range_end_ms])
+        self.set_ranges(symbol, merged)
+
+    def get_missing_ranges(self, symbol: str, start_ms: int, end_ms: int) -> List[Tuple[int, int]]:
+        """Time ranges of [start_ms, end_ms] not fetched yet."""
+        missing = []
+        for (range_start_ms, range_end_ms) in self.get_ranges(symbol):
+            if range_end_ms < start_ms or range_start_ms > end_ms:
+                continue
+            if range_start_ms > start_ms:
+                missing.append((start_ms, range_start_ms - 1))
+            start_ms = max(start_ms, range_end_ms + 1)
+        if start_ms <= end_ms:
+            missing.append((start_ms, end_ms))
+        return missing
+
+    def read_partition(self, symbol: str, day: int) -> Optional[Dict[str, np.ndarray]]:
+        path = self.get_partition_path(symbol, day)
+        if not exists(path):
+            return None
+        with np.load(path) as partition:
+            return {column: partition[column] for column in partition.files}
+
+    def write_partition(self, symbol: str, day: int, columns: Dict[str, np.ndarray]) -> None:
+        path = self.get_partition_path(symbol, day)
+        # np.savez adds .npz to names without it.
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, **columns)
+        os.replace(path + '.tmp', path)
+
+    def put(self, 
+            symbol: str, 
+            klines: List[List[Union[int, str]]], 
+            start_ms: int, 
+            end_ms: int) -> List[List[Union[int, str]]]:
+        """
+        Cache the closed klines fetched for [start_ms, end_ms] and mark the range as fetched
+        up to the first kline still open, which is returned instead.
+        """
+        now_ms = int(time.time() * 1000)
+        open_klines = [kline for kline in klines if kline[6] >= now_ms]
+        klines = [kline for kline in klines if kline[6] < now_ms]
+        end_ms = min(end_ms, now_ms)
+        if len(open_klines) > 0:
+            end_ms = min(end_ms, open_klines[0][0] - 1)
+        os.makedirs(self.get_symbol_directory(symbol), exist_ok=True)
+        if len(klines) > 0:
+            columns = klines_to_columns(klines)
+            days = columns['date'] // self.day_ms
+            for day in np.unique(days):
+                new = {column: values[days == day] for (column, values) in columns.items()}
+                old = self.read_partition(symbol, day)
+                self.write_partition(symbol, day, new if old is None else merge_columns(old, new))
+        if start_ms <= end_ms:
+            self.add_range(symbol, start_ms, end_ms)
+        return open_klines
+
+    def get(self, 
+            symbol: str, 
+            start_ms: int, 
+            end_ms: int, 
+            open_klines: Optional[List[List[Union[int, str]]]] = None) -> Dict[str, np.ndarray]:
+        """Cached columns of the klines opened in [start_ms, end_ms], followed by open_klines."""
+        partitions = [self.read_partition(symbol, day)
+                      for day in range(start_ms // self.day_ms, end_ms // self.day_ms + 1)]
+        partitions = [partition for partition in partitions if partition is not None]
+        if open_klines is not None and len(open_klines) > 0:
+            partitions.append(klines_to_columns(open_klines))
+        if len(partitions) == 0:
+            return klines_to_columns([])
+        columns = partitions[0]
+        for partition in partitions[1:]:
+            columns = merge_columns(columns, partition)
+        selection = (columns['date'] >= start_ms) & (columns['date'] <= end_ms)
+        return {column: values[selection] for (column, values) in columns.items()}
+
+    def compact(self) -> None:
+        """Drop the partitions and fetched ranges older than the retention window."""
+        cutoff_ms = int(time.time() * 1000) - self.retention_ms
+        cutoff_day = cutoff_ms // self.day_ms
+        for symbol in os.listdir(self.directory):
+            symbol_directory = self.get_symbol_directory(symbol)
+            for name in os.listdir(symbol_directory):
+                if name.endswith('.npz') and \
+                        pd.Timestamp(name[:-len('.npz')]).value // 1000000 // self.day_ms < cutoff_day:
+                    os.remove(join(symbol_directory, name))
+            ranges = [[max(range_start_ms, cutoff_day * self.day_ms), range_end_ms]
+                      for (range_start_ms, range_end_ms) in self.get_ranges(symbol)
+                      if range_end_ms >= cutoff_day * self.day_ms]
+            if len(ranges) == 0:
+                shutil.rmtree(symbol_directory)
+            else:
+                self.set_ranges(symbol, ranges)
+
+# Function definitions.
+def merge_columns(old: Dict[str, np.ndarray], new: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Concatenate two sets of kline columns, sorted by open time, new klines replacing old ones."""
+    columns = {column: np.concatenate([old[column], new[column]]) for column in old}
+    # Last occurrence of every open time.
+    dates = columns['date'][::-1]
+    (_, positions) = np.unique(dates, return_index=True)
+    positions = dates.shape[0] - 1 - positions
+    return {column: values[positions] for (column, values) in columns.items()}
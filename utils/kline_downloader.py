@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/kline_downloader.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Concurrent, rate limited and resumable historical klines download.
+
+# Library imports.
+from typing import Dict, List, Optional, Union
+from binance.client import Client
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
+from tqdm import tqdm
+from .kline_cache import Kline_cache
+from .ohlcv import columns_to_df, klines_to_columns
+import time
+import numpy as np
+import pandas as pd
+
+# Class definitions.
+class Rate_limiter:
+    def __init__(self, weight_per_minute: int = 1200, burst: Optional[int] = None):
+        """
+        :param weight_per_minute: request weight allowed by the exchange over any minute.
+        :param burst: weight that can be spent at once (default is a tenth of the limit).
+        """
+        self.burst = weight_per_minute // 10 if burst is None else burst
+        # Refill so that burst plus one minute of refill never exceeds the limit.
+        self.rate = (weight_per_minute - self.burst) / 60
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = Lock()
+
+    def acquire(self, weight: int = 1) -> None:
+        """Block until the weight can be spent."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                delay = (weight - self.tokens) / self.rate
+            time.sleep(delay)
+
+class Kline_downloader:
+    milliseconds = {'m': 60000, 'h': 3600000, 'd': 86400000, 'w': 604800000}
+
+    def __init__(self, 
+                 client: Client, 
+                 interval: str = '1m', 
+                 workers: int = 8, 
+                 weight_per_minute: int = 1200, 
+                 request_weight: int = 2, 
+                 limit: int = 1000, 
+                 retries: int = 5, 
+                 cache: Optional[Kline_cache] = None):
+        """
+        :param client: Binance client (its API_URL can point to a Kline_replay_server).
+        :param interval: kline interval (1m, 1h, 1d...).
+        :param workers: number of symbols downloaded at the same time.
+        :param weight_per_minute: request weight allowed by the exchange over any minute.
+        :param request_weight: weight of one klines request.
+        :param limit: klines per request (at most 1000).
+        :param retries: attempts per request before giving up.
+        :param cache: keep the klines of every symbol there to resume downloads (None means don't).
+        """
+        self.client = client
+        self.interval = interval
+        self.interval_ms = int(''.join(filter(str.isdigit, interval))) * \
+            self.milliseconds[''.join(filter(str.isalpha, interval))]
+        self.workers = workers
+        self.rate_limiter = Rate_limiter(weight_per_minute=weight_per_minute)
+        self.request_weight = request_weight
+        self.limit = limit
+        self.retries = retries
+        self.cache = cache
+
+    def request_klines(self, symbol: str, start_ms: int, end_ms: int) -> List[List[Union[int, str]]]:
+        for attempt in range(self.retries):
+            self.rate_limiter.acquire(self.request_weight)
+            try:
+                return self.client.get_klines(symbol=symbol, interval=self.interval, 
+                                              startTime=start_ms, endTime=end_ms, 
+                                              limit=self.limit)
+            except Exception as e:
+                if attempt == self.retries - 1:
+                    raise
+                delay = 2 ** attempt
+                if getattr(e, 'status_code', None) in [418, 429]:
+                    # Rate limited or banned: wait as long as the exchange asks.
+                    response = getattr(e, 'response', None)
+                    headers = getattr(response, 'headers', {})
+                    delay = max(delay, float(headers.get('Retry-After', 60)))
+                time.sleep(delay)
+
+    def get_klines(self, 
+                   symbol: str, 
+                   start_ms: int, 
+                   end_ms: int) -> List[List[Union[int, str]]]:
+        """
+        All klines opened between start_ms and end_ms, one request per limit klines. Every 
+        page is cached as soon as it is received, so that an interruption loses at most one.
+        """
+        klines = []
+        while start_ms <= end_ms:
+            page = self.request_klines(symbol, start_ms, end_ms)
+            full = len(page) == self.limit
+            if self.cache is not None:
+                page_end_ms = page[-1][0] + self.interval_ms - 1 if full else end_ms
+                self.cache.put(symbol, page, start_ms, page_end_ms)
+            klines += page
+            if not full:
+                break
+            start_ms = page[-1][0] + self.interval_ms
+        return klines
+
+    def download_columns(self, symbol: str, period: int = 2880) -> Dict[str, np.ndarray]:
+        """Klines of the last period intervals, only fetching what is not cached."""
+        if self.cache is None:
+            now_ms = int(time.time() * 1000)
+            return klines_to_columns(self.get_klines(symbol, now_ms - period * self.interval_ms, now_ms))
+        (start_ms, end_ms) = self.cache.get_window(period)
+        open_klines = []
+        for (range_start_ms, range_end_ms) in self.cache.get_missing_ranges(symbol, start_ms, end_ms):
+            now_ms = int(time.time() * 1000)
+            open_klines += [kline for kline in self.get_klines(symbol, range_start_ms, range_end_ms) 
+                            if kline[6] >= now_ms]
+        return self.cache.get(symbol, start_ms, end_ms, open_klines)
+
+    def download_pair(self, symbol: str, period: int = 2880, offset_s: float = 0) -> pd.DataFrame:
+        """Same as ohlcv.download_pair."""
+        return columns_to_df(self.download_columns(symbol, period=period), offset_s=offset_s)
+
+    def download_pairs(self, 
+                       symbols: List[str], 
+                       period: int = 2880, 
+                       offset_s: float = 0) -> List[pd.DataFrame]:
+        """Download every symbol with a pool of workers, in the order of symbols."""
+        pairs = [None] * len(symbols)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.download_pair, symbol, period, offset_s): i
+                       for (i, symbol) in enumerate(symbols)}
+            for future in tqdm(as_completed(futures), total=len(futures), unit=' pair'):
+                pairs[futures[future]] = future.result()
+        return pairs
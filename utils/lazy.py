@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/lazy.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Modules imported on first use, for optional engines most processes never call.
+
+# Library imports.
+from types import ModuleType
+import importlib
+
+# Class definition.
+class Lazy_module(ModuleType):
+    def __init__(self, name: str):
+        """
+        Stand-in for a module, importing it when one of its attributes is first accessed.
+
+        :param name: full name of the module (e.g. scipy.optimize).
+        """
+        super().__init__(name)
+        self.__dict__['module'] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__['module'] is not None
+
+    def load(self) -> ModuleType:
+        module = self.__dict__['module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['module'] = module
+        return module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self.load(), attribute)
+
+    def __dir__(self):
+        return dir(self.load())
+
+    def __repr__(self) -> str:
+        return '<lazy module {!r}{}>'.format(self.__name__, '' if self.is_loaded else ' (not loaded)')
+
+# Function definitions.
+def lazy_import(name: str) -> Lazy_module:
+    """Same as importlib.import_module(name), deferred until the module is used."""
+    return Lazy_module(name)
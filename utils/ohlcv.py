@@ -7,10 +7,16 @@
 # Description: Download OHLCV precomputed DataFrame from the Binance API.
 
 # Library imports.
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 from binance.client import Client
-from datetime import datetime
+import time
+import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    # kline_cache imports this module.
+    from .kline_cache import Kline_cache
+
 # Function definitions.
 def fix_DST_bug(df: pd.DataFrame) -> pd.DataFrame:
     timeseries_size = df.shape[0]
@@ -29,27 +35,51 @@ def download_pair(client: Client,
                   symbol: str, 
                   interval: str = '1m', 
                   period: int = 60, 
-                  offset_s: float = 0) -> pd.DataFrame:
+                  offset_s: float = 0, 
+                  cache: Optional['Kline_cache'] = None) -> pd.DataFrame:
     def get_n_periods_from_time(period: int = 60) -> str:
         interval_digits = int(''.join(filter(str.isdigit, interval)))
         interval_string = str(''.join(filter(str.isalpha, interval)))
         return str(interval_digits * period) + interval_string
 
+    if cache is not None:
+        # Only fetches the time ranges missing from the cache (kline_downloader imports this module).
+        from .kline_downloader import Kline_downloader
+        downloader = Kline_downloader(client, interval=interval, workers=1, cache=cache)
+        return downloader.download_pair(symbol, period=period, offset_s=offset_s)
     start_str = get_n_periods_from_time(period=period)
     data = client.get_historical_klines(symbol=symbol, interval=interval, start_str=start_str)
-    data = pd.DataFrame(data, columns=['date', 'open', 'high', 'low', 'close', 
-                                       'base_volume', 'close_time', 'quote_volume', 
-                                       'n_trades', 'taker_buy_base_volume', 
-                                       'taker_buy_quote_volume', 'ignore'])
-    data['date'] = data['date'].apply(lambda timestamp: \
-                                      datetime.fromtimestamp((timestamp / 1000) + int(offset_s)))
-
-    data = data.drop(columns=['close_time', 'ignore']).set_index('date')
-    data[['open', 'high', 'low', 'close', 'base_volume', 'quote_volume', 
-          'taker_buy_base_volume', 'taker_buy_quote_volume']] = \
-        data[['open', 'high', 'low', 'close', 'base_volume', 'quote_volume', 
-              'taker_buy_base_volume', 'taker_buy_quote_volume']].applymap(
-            lambda entry: entry.rstrip('0').rstrip('.'))
-    data = data.astype(float)
+    return klines_to_df(data, offset_s=offset_s)
+
+def klines_to_columns(data: List[List[Union[int, str]]]) -> Dict[str, np.ndarray]:
+    """Parse raw klines (as returned by the Binance API) into typed columns, one column at a time."""
+    names = ['date', 'open', 'high', 'low', 'close', 'base_volume', 'close_time', 
+             'quote_volume', 'n_trades', 'taker_buy_base_volume', 'taker_buy_quote_volume', 'ignore']
+    fields = zip(*data) if len(data) > 0 else [()] * len(names)
+    # NumPy parses the price and volume strings itself.
+    return {name: np.array(values, dtype='int64' if name in ['date', 'close_time', 'n_trades'] else float) 
+            for (name, values) in zip(names, fields) if name != 'ignore'}
+
+def get_local_dates(timestamps: np.ndarray, offset_s: float = 0) -> pd.DatetimeIndex:
+    """
+    Same as datetime.fromtimestamp((timestamp / 1000) + int(offset_s)) for every timestamp (in ms), 
+    with one UTC offset lookup per quarter of an hour instead of one per timestamp.
+    """
+    seconds = timestamps // 1000 + int(offset_s)
+    (quarters, positions) = np.unique(seconds // 900, return_inverse=True)
+    utc_offsets = np.array([time.localtime(quarter * 900).tm_gmtoff for quarter in quarters.tolist()], 
+                           dtype='int64')
+    dates = timestamps + (int(offset_s) + utc_offsets[positions]) * 1000
+    return pd.DatetimeIndex(dates.astype('datetime64[ms]').astype('datetime64[ns]'), name='date')
+
+def columns_to_df(columns: Dict[str, np.ndarray], offset_s: float = 0) -> pd.DataFrame:
+    """OHLCV DataFrame from typed kline columns (see klines_to_columns)."""
+    data = pd.DataFrame({column: values.astype(float) for (column, values) in columns.items() 
+                         if column not in ['date', 'close_time']}, 
+                        index=get_local_dates(columns['date'], offset_s=offset_s))
     data['n_trades'] = data['n_trades'].astype(int)
     return fix_DST_bug(data)
+
+def klines_to_df(data: List[List[Union[int, str]]], offset_s: float = 0) -> pd.DataFrame:
+    """Parse raw klines (as returned by the Binance API) into an OHLCV DataFrame."""
+    return columns_to_df(klines_to_columns(data), offset_s=offset_s)
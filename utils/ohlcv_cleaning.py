@@ -7,49 +7,60 @@
 # Description: Provides whole market OHLCV data cleaning.
 
 # Library imports.
+import numpy as np
 import pandas as pd
 
 # Function definitions.
-def clean_data(data):
-    def clean_ticker(data, main_ticker, volume_columns=None, 
-                     rolling_volume_columns=None):
-        df = data[main_ticker].copy()
-        data = data.sort_index(axis='columns')
-        data = data.drop(columns=[main_ticker])
-        if volume_columns is not None and len(volume_columns) > 0:
-            df[volume_columns] = df[volume_columns].fillna(value=0.0)
-        if rolling_volume_columns is not None and \
-                len(rolling_volume_columns) > 0:
-            df[rolling_volume_columns] = \
-                df[rolling_volume_columns].fillna(method='pad').fillna(method='backfill')
+def fill_chain(values: np.ndarray) -> np.ndarray:
+    """fillna(method='pad').fillna(method='backfill') along the first axis of an array."""
+    shape = values.shape
+    values = values.reshape(shape[0], -1)
+    columns = np.arange(values.shape[1])
+    rows = np.arange(values.shape[0])[:, np.newaxis]
+    positions = np.maximum.accumulate(np.where(np.isnan(values), 0, rows), axis=0)
+    values = values[positions, columns]
+    positions = np.where(np.isnan(values), values.shape[0] - 1, rows)
+    positions = np.minimum.accumulate(positions[::-1], axis=0)[::-1]
+    return values[positions, columns].reshape(shape)
 
-        s = pd.concat([df['open'], df['close']])
-        s = s.sort_index(kind='merge')
-        s = s.fillna(method='pad')
-        s = s.fillna(method='backfill')
-        df['open'] = s.iloc[0::2]
-        df['close'] = s.iloc[1::2]
-        df.loc[df['high'].isna(),'high'] = \
-            df.loc[df['high'].isna(),['open', 'high', 'low', 'close']].max(axis='columns')
-        df.loc[df['low'].isna(),'low'] = \
-            df.loc[df['low'].isna(),['open', 'high', 'low', 'close']].min(axis='columns')
+def clean_array(values: np.ndarray, dates: pd.Index, features: pd.Index) -> np.ndarray:
+    """
+    Clean a (time x symbol x feature) array in place: open and close are filled as one 
+    chain (open, close, next open...), missing highs and lows are taken from the bar, 
+    volumes are zero-filled and rolling volumes are padded.
+    """
+    volume = features.str.endswith('volume')
+    rolling_volume = volume & features.str.startswith('rolling_')
+    volume &= ~rolling_volume
+    values[:, :, volume] = np.nan_to_num(values[:, :, volume], nan=0.0)
+    values[:, :, rolling_volume] = fill_chain(values[:, :, rolling_volume])
 
-        column_names = df.columns.tolist()
-        columns = [(main_ticker, column) for column in column_names]
-        df.columns = pd.MultiIndex.from_tuples(columns)
-        df.columns = df.columns.set_names(['symbol', 'feature'])
-        data = pd.concat([data, df], axis='columns')
-        return data
+    (open_, high, low, close) = features.get_indexer(['open', 'high', 'low', 'close'])
+    if min(open_, high, low, close) < 0:
+        raise KeyError(['open', 'high', 'low', 'close'])
+    order = np.argsort(dates, kind='mergesort')
+    chain = values[order][:, :, [open_, close]].transpose(0, 2, 1)
+    chain = fill_chain(chain.reshape(-1, values.shape[1])).reshape(chain.shape)
+    values[order, :, open_] = chain[:, 0]
+    values[order, :, close] = chain[:, 1]
+    bars = values[:, :, [open_, high, low, close]]
+    values[:, :, high] = np.where(np.isnan(bars[:, :, 1]), np.fmax.reduce(bars, axis=2), bars[:, :, 1])
+    bars[:, :, 1] = values[:, :, high]
+    values[:, :, low] = np.where(np.isnan(bars[:, :, 2]), np.fmin.reduce(bars, axis=2), bars[:, :, 2])
+    return values
+
+def clean_data(data: pd.DataFrame) -> pd.DataFrame:
+    """Clean every ticker at once on the (time x symbol x feature) array (see clean_array)."""
     data.columns = data.columns.set_names(['symbol', 'feature'])
-    columns = data.columns.tolist()
-    tickers_list = data.columns.get_level_values('symbol').unique().tolist()
-    features_list = data.columns.get_level_values('feature').unique().tolist()
-    volume_columns = [feature for feature in features_list if feature.endswith('volume')]
-    rolling_volume_columns = [feature for feature in volume_columns if feature.startswith('rolling_')]
-    volume_columns = [feature for feature in volume_columns if not feature.startswith('rolling_')]
-    for main_ticker in tickers_list:
-        data = clean_ticker(data, main_ticker, volume_columns=volume_columns, 
-                            rolling_volume_columns=rolling_volume_columns)
-    #data = data.fillna(method='pad').fillna(method='backfill')
-    data = data[columns]
-    return data
+    symbols = data.columns.get_level_values('symbol').unique()
+    features = data.columns.get_level_values('feature').unique()
+    columns = pd.MultiIndex.from_product([symbols, features], names=['symbol', 'feature'])
+    positions = data.columns.get_indexer(columns)
+    if (positions < 0).any():
+        raise KeyError(columns[positions < 0].tolist())
+    values = data.to_numpy(dtype=float)[:, positions]
+    values = values.reshape(data.shape[0], len(symbols), len(features))
+    values = clean_array(values, data.index, features)
+    cleaned = np.empty(data.shape)
+    cleaned[:, positions] = values.reshape(data.shape[0], -1)
+    return pd.DataFrame(cleaned, index=data.index, columns=data.columns)
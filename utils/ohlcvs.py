@@ -9,7 +9,8 @@
 # Library imports.
 from typing import List, Optional
 from binance.client import Client
-from .ohlcv import download_pair
+from .kline_cache import Kline_cache
+from .kline_downloader import Kline_downloader
 from tqdm import tqdm
 from .timezone import get_timezone_offset_in_seconds
 from .ohlcv_cleaning import clean_data
@@ -31,11 +32,12 @@ def download_pairs(client: Client,
                    interval: str = '1m', 
                    period: int = 2880, 
                    second_period: Optional[int] = None, 
-                   offset_s: float = 0) -> pd.DataFrame:
+                   offset_s: float = 0, 
+                   workers: int = 8, 
+                   cache: Optional[Kline_cache] = None) -> pd.DataFrame:
+    downloader = Kline_downloader(client, interval=interval, workers=workers, cache=cache)
     def download_pairs_helper(period=2880, offset_s=0):
-        pairs = [download_pair(client=client, symbol=symbol, interval=interval, 
-                               period=period, offset_s=offset_s) 
-                 for symbol in tqdm(assets, unit=' pair')]
+        pairs = downloader.download_pairs(assets, period=period, offset_s=offset_s)
         pairs = named_pairs_to_df(assets, pairs)
         pairs = pairs.sort_index(axis='index')
         pairs.columns = pairs.columns.swaplevel(0, 1)
@@ -58,9 +60,12 @@ def download_pairs(client: Client,
     return pairs
 
 def download_pairs_bootstrapped(client: Client, assets: List[str], 
-                                interval: str = '1m', offset_s: float = 0) \
+                                interval: str = '1m', offset_s: float = 0, 
+                                workers: int = 8, 
+                                cache: Optional[Kline_cache] = None) \
         -> pd.DataFrame:
     period = 2880 if interval == '1m' else 60
     second_period = 60 if interval == '1m' else None
     return download_pairs(client, assets, interval='1m', period=period, 
-                          second_period=second_period, offset_s=offset_s)
+                          second_period=second_period, offset_s=offset_s, 
+                          workers=workers, cache=cache)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/pipeline.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Stages of the logger loop running concurrently, one tick apart, through bounded queues.
+
+# Library imports.
+from typing import Callable, Dict, List, Tuple
+import queue
+import threading
+import time
+
+# Class definition.
+class Pipeline:
+    done = object()
+
+    def __init__(self, stages: List[Tuple[str, Callable]], maxsize: int = 1):
+        """
+        Every stage runs on its own thread and hands its result to the next one through a
+        bounded queue. The first stage is called without arguments for every tick (returning
+        Pipeline.done stops the pipeline), the others with the result of the previous stage. While a stage works on tick N, the one before
+        it already works on tick N + 1, so ticks come out at the pace of the slowest stage
+        instead of the sum of all of them. Each stage only sees its own ticks in order, so it
+        can keep state from one tick to the next.
+
+        :param stages: (name, function) of every stage, in order.
+        :param maxsize: ticks that can wait between two stages.
+        """
+        self.names = [name for (name, _) in stages]
+        self.functions = [function for (_, function) in stages]
+        self.queues = [queue.Queue(maxsize=maxsize) for _ in stages[1:]]
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.error = None
+        self.counts = {name: 0 for name in self.names}
+        self.times = {name: 0.0 for name in self.names}
+        self.latest = {name: 0.0 for name in self.names}
+        self.threads = []
+
+    def put(self, i: int, item) -> bool:
+        """Hand item to stage i + 1, return False if the pipeline failed meanwhile."""
+        while self.error is None:
+            try:
+                self.queues[i].put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get(self, i: int):
+        """Next item for stage i, Pipeline.done once there are no more."""
+        while self.error is None:
+            try:
+                return self.queues[i - 1].get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return self.done
+
+    def run_stage(self, i: int) -> None:
+        name = self.names[i]
+        try:
+            while True:
+                if i == 0:
+                    if self.stopping.is_set():
+                        break
+                    args = ()
+                else:
+                    item = self.get(i)
+                    if item is self.done:
+                        break
+                    args = (item,)
+                start_time = time.time()
+                result = self.functions[i](*args)
+                if result is self.done:
+                    break
+                elapsed = time.time() - start_time
+                with self.lock:
+                    self.counts[name] += 1
+                    self.times[name] += elapsed
+                    self.latest[name] = elapsed
+                if i < len(self.queues) and not self.put(i, result):
+                    break
+        except Exception as e:
+            with self.lock:
+                if self.error is None:
+                    self.error = e
+            self.stopping.set()
+        finally:
+            if i < len(self.queues):
+                self.put(i, self.done)
+
+    def start(self) -> 'Pipeline':
+        for i in range(len(self.names)):
+            thread = threading.Thread(target=self.run_stage, args=(i,), 
+                                      name='pipeline_' + self.names[i], daemon=True)
+            self.threads.append(thread)
+            thread.start()
+        return self
+
+    def join(self) -> None:
+        """Wait for every stage to finish, then raise the error of the first one that failed."""
+        for thread in self.threads:
+            # Joined in steps so that KeyboardInterrupt still reaches the main thread.
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+        if self.error is not None:
+            raise self.error
+
+    def stop(self) -> None:
+        """Stop fetching new ticks and let the ticks already fetched go through every stage."""
+        self.stopping.set()
+        self.join()
+
+    def get_timings(self, latest: bool = False) -> Dict[str, float]:
+        """Seconds spent per tick in every stage (on average, or for the latest tick)."""
+        with self.lock:
+            if latest:
+                return dict(self.latest)
+            return {name: self.times[name] / max(self.counts[name], 1) for name in self.names}
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/publication.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Atomic, versioned CSV logs, so that readers never see a half-written file.
+
+# Library imports.
+from typing import Dict, Optional, Tuple
+from os.path import dirname, exists, getsize
+import json
+import os
+import time
+import pandas as pd
+
+# Class definitions.
+class Log_publisher:
+    policies = ['always', 'interval', 'never']
+
+    def __init__(self, path: str, fsync: str = 'interval', fsync_interval: float = 60.0):
+        """
+        Every version of the log is written to a temporary file, then renamed over the log
+        (atomic on POSIX), then described by a manifest (version, rows, size and time) that
+        readers check before reading the log again.
+
+        :param path: CSV log to publish.
+        :param fsync: flush to disk before renaming 'always', every fsync_interval seconds or 'never'
+                      (renaming alone is enough for readers, flushing only matters after a crash).
+        :param fsync_interval: seconds between flushes when fsync is 'interval'.
+        """
+        if fsync not in self.policies:
+            raise ValueError("'fsync' must be one of {}.".format(self.policies))
+        self.path = path
+        self.manifest_path = get_manifest_path(path)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.synced = 0.0
+        manifest = read_manifest(self.manifest_path)
+        # Versions keep increasing across restarts.
+        self.version = 0 if manifest is None else manifest['version']
+
+    def should_sync(self) -> bool:
+        if self.fsync == 'always':
+            return True
+        if self.fsync == 'interval':
+            return time.time() - self.synced >= self.fsync_interval
+        return False
+
+    def publish(self, dataset: pd.DataFrame) -> int:
+        """Write dataset as the next version of the log, return that version."""
+        sync = self.should_sync()
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as f:
+            dataset.to_csv(f)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        size = getsize(temporary)
+        os.replace(temporary, self.path)
+        self.version += 1
+        manifest = {'version': self.version, 'rows': int(dataset.shape[0]), 
+                    'size': size, 'time': time.time()}
+        with open(self.manifest_path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+        if sync:
+            if os.name == 'posix':
+                # Make the renames themselves durable.
+                directory = os.open(dirname(self.path) or '.', os.O_RDONLY)
+                try:
+                    os.fsync(directory)
+                finally:
+                    os.close(directory)
+            self.synced = time.time()
+        return self.version
+
+class Log_reader:
+    def __init__(self, path: str):
+        """
+        Reads a log published by Log_publisher, only parsing it again when its manifest
+        names a new version (logs without a manifest are parsed on every read).
+
+        :param path: CSV log to read.
+        """
+        self.path = path
+        self.manifest_path = get_manifest_path(path)
+        self.version = None
+        self.dataset = None
+
+    def read(self, **kwargs) -> Optional[pd.DataFrame]:
+        """Latest version of the log (the same DataFrame if it didn't change), None if there is none."""
+        version = get_version(read_manifest(self.manifest_path))
+        if version is not None and version == self.version:
+            return self.dataset
+        if not exists(self.path):
+            return None
+        self.dataset = pd.read_csv(self.path, **kwargs)
+        # The log may already be newer than the manifest read, it is then read once more.
+        self.version = version
+        return self.dataset
+
+# Function definitions.
+def get_manifest_path(path: str) -> str:
+    return path + '.manifest.json'
+
+def read_manifest(manifest_path: str) -> Optional[Dict[str, float]]:
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+def get_version(manifest: Optional[Dict[str, float]]) -> Optional[Tuple[int, float]]:
+    """What identifies a publication: its version, and its time in case the manifest was deleted."""
+    if manifest is None:
+        return None
+    return manifest['version'], manifest['time']
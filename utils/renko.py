@@ -7,14 +7,19 @@
 # Description: This file handles the Renko technical indicator and trigger.
 
 # Library imports.
-from scipy.stats import iqr
+from typing import Dict, List, Optional, Union
+from .indicator_state import ATR
+from .lazy import lazy_import
 import math
 import numpy as np
 import pandas as pd
-import scipy.optimize as opt
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import talib
+
+# Plotting, optimization and TA-Lib are only loaded once a Renko chart needs them.
+stats = lazy_import('scipy.stats')
+opt = lazy_import('scipy.optimize')
+plt = lazy_import('matplotlib.pyplot')
+patches = lazy_import('matplotlib.patches')
+talib = lazy_import('talib')
 
 # Class definition.
 class Renko:
@@ -106,16 +111,13 @@ class Renko:
         return brick_size
 
     def evaluate(self, method = 'simple'):
-        balance = sign_changes = 0
         price_ratio = len(self.source_prices) / len(self.renko_prices)
 
         if method == 'simple':
-            for i in range(2, len(self.renko_directions)):
-                if self.renko_directions[i] == self.renko_directions[i - 1]:
-                    balance += 1
-                else:
-                    balance -= 2
-                    sign_changes = sign_changes + 1
+            directions = np.array(self.renko_directions)
+            same = (directions[2:] == directions[1:-1])
+            sign_changes = int((~same).sum())
+            balance = int(same.sum()) - 2 * sign_changes
 
             if sign_changes == 0:
                 sign_changes = 1
@@ -166,16 +168,185 @@ class Renko:
 
         plt.show()
 
+class Renko_brick_cache:
+    def __init__(self, 
+                 atr_timeperiod: int = 25, 
+                 tolerance: float = 0.2, 
+                 grid_size: int = 64):
+        """
+        :param atr_timeperiod: ATR period bounding the brick size search.
+        :param tolerance: relative ATR drift after which a symbol's brick size is searched again.
+        :param grid_size: number of brick sizes scored per search.
+        """
+        self.atr_timeperiod = atr_timeperiod
+        self.tolerance = tolerance
+        self.grid_size = grid_size
+        self.brick_sizes = {}
+        self.atrs = {}
+
+    def get_brick_sizes(self, 
+                        symbols: Union[List[str], pd.Index], 
+                        high: np.ndarray, 
+                        low: np.ndarray, 
+                        close: np.ndarray) -> np.ndarray:
+        """Optimal brick size of every symbol, only searched again for new symbols or when ATR drifts."""
+        atrs = get_atrs(high, low, close, timeperiod=self.atr_timeperiod)
+        last_atrs = atrs[-1]
+        cached_atrs = np.array([self.atrs.get(symbol, np.nan) for symbol in symbols])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drift = np.abs(last_atrs / cached_atrs - 1)
+        refit = ~(drift <= self.tolerance) & ~np.isnan(last_atrs)
+        if refit.any():
+            brick_sizes = get_grid_brick_sizes(close[:, refit], atrs[:, refit], grid_size=self.grid_size)
+            for (symbol, brick_size, atr) in zip(np.asarray(symbols)[refit], brick_sizes, last_atrs[refit]):
+                self.brick_sizes[symbol] = brick_size
+                self.atrs[symbol] = atr
+        return np.array([self.brick_sizes.get(symbol, np.nan) for symbol in symbols])
+
+# Function definitions.
+def build_renko(prices: Union[pd.Series, np.ndarray], 
+                brick_sizes: Union[float, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Same as Renko.build_history(prices) then evaluate() for many charts at once: the bricks 
+    are only counted, with the statistics evaluate() needs, for every series in one pass.
+    :param prices: (time,) prices shared by all brick sizes, or (time x series) prices.
+    :param brick_sizes: brick size of every series (a scalar builds a single chart).
+    """
+    brick_sizes = np.atleast_1d(np.asarray(brick_sizes, dtype=float))
+    prices = np.asarray(prices, dtype=float)
+    if prices.ndim == 1:
+        prices = np.repeat(prices[:, None], brick_sizes.size, axis=1)
+    if brick_sizes.size < 64:
+        # The per-row NumPy overhead only pays off with many series.
+        evaluations = [build_renko_one(prices[:, i], brick_size) for (i, brick_size) in enumerate(brick_sizes)]
+        return {name: np.concatenate([evaluation[name] for evaluation in evaluations], axis=-1) 
+                for name in evaluations[0]}
+    renko_price = prices[0].copy()
+    direction = np.zeros(brick_sizes.size)
+    previous_direction = np.zeros(brick_sizes.size)
+    count = np.ones(brick_sizes.size, dtype=int)
+    balance = np.zeros(brick_sizes.size, dtype=int)
+    sign_changes = np.zeros(brick_sizes.size, dtype=int)
+    timed_renko_prices = np.empty(prices.shape)
+    timed_renko_prices[0] = renko_price
+    for row in range(1, prices.shape[0]):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gap = np.trunc((prices[row] - renko_price) / brick_sizes)
+        gap = np.where(np.isfinite(gap), gap, 0)
+        sign = np.sign(gap)
+        # Forward any direction, or backward by a double gap at least.
+        forward = ((gap > 0) & (direction >= 0)) | ((gap < 0) & (direction <= 0))
+        backward = ~forward & (np.abs(gap) >= 2)
+        bricks = np.where(forward, np.abs(gap), np.where(backward, np.abs(gap) - 1, 0)).astype(int)
+        # evaluate() compares every brick direction with the previous one, from the second brick on.
+        new = (bricks > 0)
+        compared = new & (count >= 2)
+        same = (sign == direction)
+        balance += np.where(compared, np.where(same, 1, -2), 0) + np.where(new, bricks - 1, 0)
+        sign_changes += (compared & ~same)
+        # Prices are accumulated brick by brick, as Renko does.
+        renko_price = np.where(backward, renko_price + 2 * brick_sizes * sign, renko_price)
+        steps = np.where(forward, np.abs(gap), np.where(backward, np.abs(gap) - 2, 0))
+        for step in range(int(steps.max(initial=0))):
+            renko_price = np.where(step < steps, renko_price + brick_sizes * sign, renko_price)
+        previous_direction = np.where(bricks >= 2, sign, np.where(new, direction, previous_direction))
+        direction = np.where(new, sign, direction)
+        count += bricks
+        timed_renko_prices[row] = renko_price
+    return get_renko_evaluation(renko_price, direction, previous_direction, 
+                                count, balance, sign_changes, timed_renko_prices)
+
+def build_renko_one(prices: np.ndarray, brick_size: float) -> Dict[str, np.ndarray]:
+    """build_renko() for a single chart, in plain Python (faster than NumPy for one series)."""
+    prices = prices.tolist()
+    renko_price = prices[0]
+    direction = previous_direction = 0
+    count, balance, sign_changes = 1, 0, 0
+    timed_renko_prices = [renko_price]
+    for price in prices[1:]:
+        try:
+            gap = int((price - renko_price) / brick_size)
+        except (ZeroDivisionError, ValueError, OverflowError):
+            gap = 0
+        if gap != 0:
+            sign = 1 if gap > 0 else -1
+            bricks = 0
+            if (gap > 0 and direction >= 0) or (gap < 0 and direction <= 0):
+                bricks = steps = abs(gap)
+            elif abs(gap) >= 2:
+                bricks, steps = abs(gap) - 1, abs(gap) - 2
+                renko_price = renko_price + 2 * brick_size * sign
+            if bricks > 0:
+                if count >= 2:
+                    if sign == direction:
+                        balance += 1
+                    else:
+                        balance -= 2
+                        sign_changes += 1
+                balance += bricks - 1
+                for _ in range(steps):
+                    renko_price = renko_price + brick_size * sign
+                previous_direction = sign if bricks >= 2 else direction
+                direction = sign
+                count += bricks
+        timed_renko_prices.append(renko_price)
+    return get_renko_evaluation(*[np.array([value], dtype=float) 
+                                  for value in [renko_price, direction, previous_direction]], 
+                                *[np.array([value]) for value in [count, balance, sign_changes]], 
+                                np.array(timed_renko_prices)[:, None])
+
+def get_renko_evaluation(renko_price: np.ndarray, 
+                         direction: np.ndarray, 
+                         previous_direction: np.ndarray, 
+                         count: np.ndarray, 
+                         balance: np.ndarray, 
+                         sign_changes: np.ndarray, 
+                         timed_renko_prices: np.ndarray) -> Dict[str, np.ndarray]:
+    """Renko.evaluate(method='simple') from the brick statistics of every chart."""
+    price_ratio = timed_renko_prices.shape[0] / count
+    sign_changes = np.where(sign_changes == 0, 1, sign_changes)
+    score = balance / sign_changes
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = np.where((score >= 0) & (price_ratio >= 1), 
+                         np.log(score + 1) * np.log(price_ratio), -1.0)
+    return {'renko_price': renko_price, 'direction': direction, 
+            'previous_direction': previous_direction, 'count': count, 'balance': balance, 
+            'sign_changes': sign_changes, 'price_ratio': price_ratio, 'score': score, 
+            'timed_renko_prices': timed_renko_prices}
+
+def get_atrs(high: np.ndarray, 
+             low: np.ndarray, 
+             close: np.ndarray, 
+             timeperiod: int = 25) -> np.ndarray:
+    """talib.ATR for every column of (time x symbol) arrays."""
+    atr = ATR(length=timeperiod)
+    state = atr.get_state(close.shape[1])
+    atrs = np.empty(close.shape)
+    for row in range(close.shape[0]):
+        state, values = atr.step(state, {'high': high[row], 'low': low[row], 'close': close[row]})
+        atrs[row] = values[atr.name]
+    return atrs
+
+def get_grid_brick_sizes(close: np.ndarray, 
+                         atrs: np.ndarray, 
+                         grid_size: int = 64) -> np.ndarray:
+    """
+    Best scoring brick size of every column among grid_size sizes between its lowest and 
+    highest ATR (the bounds get_renko_trigger(method='brent') searches), all in one pass.
+    """
+    lower, upper = np.fmin.reduce(atrs, axis=0), np.fmax.reduce(atrs, axis=0)
+    grid = lower[:, None] + (upper - lower)[:, None] * np.linspace(0, 1, grid_size)[None, :]
+    prices = np.repeat(close, grid_size, axis=1)
+    scores = build_renko(prices, grid.ravel())['score'].reshape(close.shape[1], grid_size)
+    return grid[np.arange(close.shape[1]), scores.argmax(axis=1)]
+
 # Function definitions.
 def get_renko_trigger(data, compress=False, direction_type='long', trigger_type='simple', method='brent', plot=False, return_raw=False):
     def identity(x):
         return x
 
     def evaluate_renko(brick, history, column_name):
-        renko_obj = Renko()
-        renko_obj.set_brick_size(brick_size=brick, auto=False)
-        renko_obj.build_history(prices = history)
-        return renko_obj.evaluate()[column_name]
+        return build_renko(history, brick)[column_name][0]
 
     data.reset_index(drop=True)
     if compress:
@@ -183,7 +354,7 @@ def get_renko_trigger(data, compress=False, direction_type='long', trigger_type=
         if tr.size == 0:
             optimal_bin_width = 0
         else:
-            optimal_bin_width = 2 * iqr(tr) / tr.size ** (1.0 / 3)
+            optimal_bin_width = 2 * stats.iqr(tr) / tr.size ** (1.0 / 3)
         if optimal_bin_width == 0:
             optimal_bin_count = 1
         else:
@@ -212,9 +383,20 @@ def get_renko_trigger(data, compress=False, direction_type='long', trigger_type=
         # Get optimal brick size as maximum of score function by Brent's (or similar) method
         # First and Last ATR values are used as the boundaries
         optimal_brick_sfo = opt.fminbound(lambda x: -evaluate_renko(brick=x, 
-                                                                    history=data.close, column_name='score'), 
+                                                                    history=data.close.to_numpy(), column_name='score'), 
                                           np.min(atr), np.max(atr), disp=0)
 
+    elif method == 'grid':
+        atr = talib.ATR(high=np.double(data.high),
+                        low=np.double(data.low),
+                        close=np.double(data.close),
+                        timeperiod=25)
+        if np.isnan(atr).all():
+            return False
+
+        # Every brick size of the grid is scored in the same pass.
+        optimal_brick_sfo = get_grid_brick_sizes(np.double(data.close)[:, None], atr[:, None])[0]
+
     elif method == 'atr':
         # Get ATR values (it needs to get boundaries)
         # Drop NaNs
@@ -232,37 +414,55 @@ def get_renko_trigger(data, compress=False, direction_type='long', trigger_type=
         optimal_brick_sfo = Renko().set_brick_size(auto=True, HLC_history=data[['high', 'low', 'close']])
 
     # Build Renko chart
-    renko_obj_sfo = Renko()
-    opt_brick_size = renko_obj_sfo.set_brick_size(auto=False, brick_size=optimal_brick_sfo)
-    if plot:
-        print('Set brick size to optimal: ', opt_brick_size)
-    #renko_obj_sfo.build_history(prices=data['close'])
     hlc3 = (data['high'] + data['low'] + data['close']) / 3
-    renko_obj_sfo.build_history(prices=hlc3)
-    prices = renko_obj_sfo.get_renko_prices()
-    directions = renko_obj_sfo.get_renko_directions()
-    evaluation = renko_obj_sfo.evaluate()
+    renko = build_renko(hlc3.to_numpy(), optimal_brick_sfo)
+    direction, previous_direction = renko['direction'][0], renko['previous_direction'][0]
     if plot:
-        print('Renko bar prices: ', prices)
-        print('Renko bar directions: ', directions)
-        print('Renko bar evaluation: ', evaluation)
-
-    if plot and len(renko_obj_sfo.get_renko_prices()) > 1:
-        renko_obj_sfo.plot_renko()
-
-    if direction_type == 'long':
-        if trigger_type == 'exit':
-            trigger = directions[-1] == -1 and directions[-2] == 1
-        else:
-            trigger = directions[-1] == 1
-            if trigger_type == 'entry':
-                trigger = trigger and directions[-2] == -1
-    elif direction_type == 'short':
-        if trigger_type == 'exit':
-            trigger = directions[-1] == 1 and directions[-2] == -1
-        else:
-            trigger = directions[-1] == -1
-            if trigger_type == 'entry':
-                trigger = trigger and directions[-2] == 1
-
-    return pd.Series(renko_obj_sfo.timed_renko_prices) if return_raw else trigger
+        print('Set brick size to optimal: ', optimal_brick_sfo)
+        renko_obj_sfo = Renko()
+        renko_obj_sfo.set_brick_size(auto=False, brick_size=optimal_brick_sfo)
+        renko_obj_sfo.build_history(prices=hlc3)
+        print('Renko bar prices: ', renko_obj_sfo.get_renko_prices())
+        print('Renko bar directions: ', renko_obj_sfo.get_renko_directions())
+        print('Renko bar evaluation: ', renko_obj_sfo.evaluate())
+        if len(renko_obj_sfo.get_renko_prices()) > 1:
+            renko_obj_sfo.plot_renko()
+
+    trigger = get_direction_trigger(direction, previous_direction, 
+                                    direction_type=direction_type, trigger_type=trigger_type)
+
+    return pd.Series(renko['timed_renko_prices'][:, 0]) if return_raw else trigger
+
+def get_direction_trigger(direction: Union[float, np.ndarray], 
+                          previous_direction: Union[float, np.ndarray], 
+                          direction_type: str = 'long', 
+                          trigger_type: str = 'simple') -> Union[bool, np.ndarray]:
+    """Trigger on the last two Renko brick directions (scalars or arrays)."""
+    sign = 1 if direction_type == 'long' else -1
+    if trigger_type == 'exit':
+        return (direction == -sign) & (previous_direction == sign)
+    trigger = (direction == sign)
+    if trigger_type == 'entry':
+        trigger = trigger & (previous_direction == -sign)
+    return trigger
+
+def get_renko_triggers(dataset: pd.DataFrame, 
+                       brick_cache: Optional['Renko_brick_cache'] = None, 
+                       direction_type: str = 'long', 
+                       trigger_type: str = 'simple') -> pd.Series:
+    """
+    get_renko_trigger(method='grid') for every symbol of a (symbol, feature) dataset in one 
+    pass, keeping the optimal brick sizes in brick_cache between calls. Return the symbols 
+    triggered.
+    """
+    brick_cache = Renko_brick_cache() if brick_cache is None else brick_cache
+    dataset = dataset.loc[:, ~dataset.columns.duplicated()]
+    symbols = dataset.columns.get_level_values(0).unique()
+    high, low, close = [dataset.xs(feature, axis='columns', level=1).reindex(
+        columns=symbols).to_numpy(dtype=float) for feature in ['high', 'low', 'close']]
+    brick_sizes = brick_cache.get_brick_sizes(symbols, high, low, close)
+    renko = build_renko((high + low + close) / 3, brick_sizes)
+    triggers = get_direction_trigger(renko['direction'], renko['previous_direction'], 
+                                     direction_type=direction_type, trigger_type=trigger_type)
+    triggers &= np.isfinite(brick_sizes)
+    return pd.Series(symbols[triggers].tolist(), dtype='str')
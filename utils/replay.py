@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/replay.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Local servers replaying recorded Binance data for offline testing.
+# Usage:       python -m utils.replay tickers crypto_logs/ticker_frames.txt --port 8765 --speed 1
+#              python -m utils.replay klines --port 8766 --weight_per_minute 1200
+
+# Library imports.
+from typing import Dict, List, Optional, Tuple, Union
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+import argparse
+import asyncio
+import json
+import math
+import time
+import zlib
+import websockets
+
+# Class definitions.
+class Ticker_replay_server:
+    def __init__(self, 
+                 frames_path: str, 
+                 host: str = 'localhost', 
+                 port: int = 8765, 
+                 speed: float = 1.0, 
+                 loop_frames: bool = True):
+        """
+        :param frames_path: file with one recorded !ticker@arr frame per line (see Ticker_stream).
+        :param host: interface to listen on.
+        :param port: port to listen on (the stream URL is then ws://host:port).
+        :param speed: replay speed relative to the recorded event times (0 means as fast as possible).
+        :param loop_frames: start over at the end of the recording.
+        """
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.loop_frames = loop_frames
+        with open(frames_path, 'r') as f:
+            self.frames = [line.strip() for line in f if line.strip()]
+        self.thread = None
+        self.loop = None
+        self.stopped = None
+
+    @property
+    def url(self) -> str:
+        return 'ws://{}:{}'.format(self.host, self.port)
+
+    def get_delays(self) -> List[float]:
+        """Seconds between consecutive frames, from their latest event time (E, in ms)."""
+        event_times = [max([ticker['E'] for ticker in json.loads(frame)] + [0]) for frame in self.frames]
+        delays = [max(0, (event_times[i] - event_times[i - 1]) / 1000) for i in range(1, len(event_times))]
+        return [0] + delays
+
+    async def send_frames(self, websocket, path: Optional[str] = None) -> None:
+        delays = self.get_delays()
+        try:
+            while True:
+                for (frame, delay) in zip(self.frames, delays):
+                    if self.speed > 0:
+                        await asyncio.sleep(delay / self.speed)
+                    await websocket.send(frame)
+                if not self.loop_frames:
+                    break
+        except websockets.ConnectionClosed:
+            pass
+
+    async def serve(self) -> None:
+        self.stopped = asyncio.Event()
+        async with websockets.serve(self.send_frames, self.host, self.port):
+            await self.stopped.wait()
+
+    def start(self) -> 'Ticker_replay_server':
+        """Serve in a background thread."""
+        def run() -> None:
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.serve())
+            self.loop.close()
+        self.thread = Thread(target=run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self.loop is not None and self.stopped is not None:
+            self.loop.call_soon_threadsafe(self.stopped.set)
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+class Kline_replay_server:
+    milliseconds = {'m': 60000, 'h': 3600000, 'd': 86400000, 'w': 604800000}
+
+    def __init__(self, 
+                 host: str = 'localhost', 
+                 port: int = 8766, 
+                 weight_per_minute: int = 1200, 
+                 request_weight: int = 2, 
+                 listings: Optional[Dict[str, int]] = None, 
+                 fail_every: int = 0):
+        """
+        Fake /api/v3/klines endpoint serving deterministic synthetic klines, so that a 
+        client with API_URL = server.url can bootstrap offline.
+
+        :param host: interface to listen on.
+        :param port: port to listen on.
+        :param weight_per_minute: answer 429 past this request weight in a minute (0 means no limit).
+        :param request_weight: weight of one klines request.
+        :param listings: listing time (in ms) of some symbols, no klines are served before it.
+        :param fail_every: answer 500 to every n-th klines request (0 means never).
+        """
+        self.host = host
+        self.port = port
+        self.weight_per_minute = weight_per_minute
+        self.request_weight = request_weight
+        self.listings = {} if listings is None else listings
+        self.fail_every = fail_every
+        self.requests = 0
+        self.rejected = 0
+        self.minute = None
+        self.used_weight = 0
+        self.lock = Lock()
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return 'http://{}:{}/api'.format(self.host, self.port)
+
+    def get_kline(self, symbol: str, open_time: int, interval_ms: int) -> List[Union[int, str]]:
+        """Same kline for the same symbol and open time at every request."""
+        seed = zlib.crc32(symbol.encode())
+        step = open_time // interval_ms
+        price = (1 + seed % 1000) * (1 + 0.05 * math.sin(step / 97 + seed))
+        amplitude = price * 0.001 * (1 + (step * seed) % 7)
+        volume = (step * 7919 + seed) % 1000
+        # Binance sends prices and volumes as padded strings.
+        prices = ['{:.8f}'.format(value) for value in [price, price + amplitude, price - amplitude, 
+                                                       price + amplitude * math.cos(step)]]
+        return [open_time] + prices + ['{:.8f}'.format(volume), open_time + interval_ms - 1, 
+                                       '{:.8f}'.format(volume * price), volume // 10 + 1, 
+                                       '{:.8f}'.format(volume / 2), 
+                                       '{:.8f}'.format(volume * price / 2), '0']
+
+    def get_klines(self, parameters: Dict[str, str]) -> List[List[Union[int, str]]]:
+        interval = parameters['interval']
+        interval_ms = int(''.join(filter(str.isdigit, interval))) * \
+            self.milliseconds[''.join(filter(str.isalpha, interval))]
+        now_ms = int(time.time() * 1000)
+        start_ms = max(int(parameters.get('startTime', 0)), 
+                       self.listings.get(parameters['symbol'], 0))
+        end_ms = min(int(parameters.get('endTime', now_ms)), now_ms)
+        limit = min(int(parameters.get('limit', 500)), 1000)
+        open_time = -(-start_ms // interval_ms) * interval_ms
+        klines = []
+        while open_time <= end_ms and len(klines) < limit:
+            klines.append(self.get_kline(parameters['symbol'], open_time, interval_ms))
+            open_time += interval_ms
+        return klines
+
+    def handle(self, path: str) -> Tuple[int, object]:
+        url = urlparse(path)
+        if url.path in ['/api/v3/ping', '/api/v1/ping']:
+            return 200, {}
+        if url.path in ['/api/v3/time', '/api/v1/time']:
+            return 200, {'serverTime': int(time.time() * 1000)}
+        if url.path != '/api/v3/klines':
+            return 404, {'code': -1, 'msg': 'Unknown path.'}
+        with self.lock:
+            self.requests += 1
+            minute = int(time.time() // 60)
+            if minute != self.minute:
+                self.minute, self.used_weight = minute, 0
+            self.used_weight += self.request_weight
+            if self.weight_per_minute > 0 and self.used_weight > self.weight_per_minute:
+                self.rejected += 1
+                return 429, {'code': -1003, 'msg': 'Too much request weight used.'}
+            if self.fail_every > 0 and self.requests % self.fail_every == 0:
+                return 500, {'code': -1000, 'msg': 'Simulated failure.'}
+        parameters = {key: values[-1] for (key, values) in parse_qs(url.query).items()}
+        return 200, self.get_klines(parameters)
+
+    def start(self) -> 'Kline_replay_server':
+        """Serve in a background thread."""
+        replay_server = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                (status, payload) = replay_server.handle(self.path)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if status == 429:
+                    self.send_header('Retry-After', str(60 - int(time.time()) % 60))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+# Function definitions.
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='server', required=True)
+    subparser = subparsers.add_parser('tickers')
+    subparser.add_argument('frames_path')
+    subparser.add_argument('--host', default='localhost')
+    subparser.add_argument('--port', type=int, default=8765)
+    subparser.add_argument('--speed', type=float, default=1.0)
+    subparser = subparsers.add_parser('klines')
+    subparser.add_argument('--host', default='localhost')
+    subparser.add_argument('--port', type=int, default=8766)
+    subparser.add_argument('--weight_per_minute', type=int, default=1200)
+    subparser.add_argument('--fail_every', type=int, default=0)
+    args = parser.parse_args()
+    if args.server == 'tickers':
+        server = Ticker_replay_server(args.frames_path, host=args.host, port=args.port, speed=args.speed)
+        print('Replaying {} frames on {}.'.format(len(server.frames), server.url))
+        asyncio.run(server.serve())
+    else:
+        server = Kline_replay_server(host=args.host, port=args.port, 
+                                     weight_per_minute=args.weight_per_minute, 
+                                     fail_every=args.fail_every).start()
+        print('Serving klines on {} (set Client.API_URL to it).'.format(server.url))
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            server.stop()
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,8 @@
 # Library imports.
 from .volume_conversion import recalculate_volumes
 #from .ohlcv_cleaning import clean_data
+from typing import Optional
+import numpy as np
 import pandas as pd
 
 # Function definitions.
@@ -39,3 +41,129 @@ def resample(df: pd.DataFrame, interval: str = '1min') -> pd.DataFrame:
     if interval == '1min':
         df = recalculate_volumes(df)
     return df
+
+def fill_values(values: np.ndarray, backward: bool = False) -> np.ndarray:
+    """fillna(method='pad') (or 'backfill') for a few rows of a 2-D array."""
+    rows = range(values.shape[0] - 2, -1, -1) if backward else range(1, values.shape[0])
+    step = 1 if backward else -1
+    for row in rows:
+        values[row] = np.where(np.isnan(values[row]), values[row + step], values[row])
+    return values
+
+def resample_recent(dates: pd.DatetimeIndex, 
+                    values: np.ndarray, 
+                    columns: pd.MultiIndex, 
+                    interval: str = '1min') -> pd.DataFrame:
+    """
+    Same as resample(df, interval) without recalculate_volumes, for a few rows, with one NumPy 
+    reduction over all buckets instead of stack and pivot_table.
+    """
+    frequency_interval = pd.tseries.frequencies.to_offset(interval)
+    frequency_1min = pd.tseries.frequencies.to_offset('1min')
+    frequency_1d = pd.tseries.frequencies.to_offset('1d')
+    volume_operation = 'sum' if frequency_interval >= frequency_1min else 'last'
+    rolling_volume_operation = 'sum' if frequency_interval >= frequency_1d else 'last'
+    aggfunc = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 
+               'base_volume': volume_operation, 'quote_volume': volume_operation, 
+               'rolling_base_volume': rolling_volume_operation, 
+               'rolling_quote_volume': rolling_volume_operation}
+    features = columns.get_level_values(1)
+    kept = np.asarray(features.isin(list(aggfunc)))
+    columns, features, values = columns[kept], features[kept], values[:, kept]
+    buckets, codes = np.unique(dates.round(interval), return_inverse=True)
+    symbols, symbol_codes = np.unique(columns.get_level_values(0), return_inverse=True)
+    operations = {operation: np.asarray([aggfunc[feature] == operation for feature in features]) 
+                  for operation in ['first', 'last', 'max', 'min', 'sum']}
+    # Rows grouped by bucket (in order within a bucket) so each reduction runs once over all buckets.
+    order = np.argsort(codes, kind='stable')
+    rows, codes = values[order], codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    positions = np.arange(rows.shape[0])[:, None]
+    valid = ~np.isnan(rows)
+    has_value = np.logical_or.reduceat(valid, starts, axis=0)
+    # A symbol without any value in the bucket is dropped by stack (no volume sum either).
+    symbol_order = np.argsort(symbol_codes, kind='stable')
+    symbol_starts = np.flatnonzero(np.r_[True, np.diff(symbol_codes[symbol_order]) != 0])
+    has_symbol = np.logical_or.reduceat(has_value[:, symbol_order], symbol_starts, axis=1)
+    first = np.minimum.reduceat(np.where(valid, positions, rows.shape[0] - 1), starts, axis=0)
+    last = np.maximum.reduceat(np.where(valid, positions, 0), starts, axis=0)
+    columns_positions = np.arange(rows.shape[1])
+    aggregated = np.where(operations['first'], rows[first, columns_positions], 
+                          rows[last, columns_positions])
+    aggregated = np.where(operations['max'], np.fmax.reduceat(rows, starts, axis=0), aggregated)
+    aggregated = np.where(operations['min'], np.fmin.reduceat(rows, starts, axis=0), aggregated)
+    aggregated = np.where(has_value, aggregated, np.nan)
+    aggregated = np.where(operations['sum'] & has_symbol[:, symbol_codes], 
+                          np.add.reduceat(np.nan_to_num(rows, nan=0.0), starts, axis=0), aggregated)
+    # pivot_table drops empty rows and columns.
+    valid = ~np.isnan(aggregated)
+    rows, kept = valid.any(axis=1), valid.any(axis=0)
+    aggregated, columns, features = aggregated[rows][:, kept], columns[kept], features[kept]
+    volumes = np.asarray(features.isin(['base_volume', 'quote_volume']))
+    aggregated[:, volumes] = np.nan_to_num(aggregated[:, volumes], nan=0.0)
+    aggregated = fill_values(fill_values(aggregated), backward=True) # Last resort.
+    return pd.DataFrame(aggregated, index=pd.DatetimeIndex(buckets[rows], name='date'), 
+                        columns=columns)
+
+def recalculate_volumes_values(values: np.ndarray, columns: pd.MultiIndex) -> np.ndarray:
+    """Same as recalculate_volumes, on the array of a (symbol, feature) sorted frame."""
+    size = values.shape[0]
+    rows = np.arange(max(size - 2, 0), size)
+    symbols = columns.get_level_values(0)
+    features = columns.get_level_values(1)
+    for (volume, rolling_volume) in [('base_volume', 'rolling_base_volume'), 
+                                     ('quote_volume', 'rolling_quote_volume')]:
+        volume_columns = np.flatnonzero(features == volume)
+        rolling_columns = np.flatnonzero(features == rolling_volume)
+        rolling_columns = rolling_columns[
+            pd.Index(symbols[rolling_columns]).get_indexer(symbols[volume_columns])]
+        rolling_difference = np.full((rows.size, volume_columns.size), np.nan)
+        shifted_volume = np.full((rows.size, volume_columns.size), np.nan)
+        for (i, row) in enumerate(rows):
+            if row >= 1:
+                rolling_difference[i] = values[row, rolling_columns] - values[row - 1, rolling_columns]
+            if row >= 1440:
+                shifted_volume[i] = values[row - 1440, volume_columns]
+        values[rows[:, None], volume_columns[None, :]] = rolling_difference + shifted_volume
+    return values
+
+def resample_next(old_df: Optional[pd.DataFrame], 
+                  df: pd.DataFrame, 
+                  interval: str = '1min') -> pd.DataFrame:
+    """
+    Same as resample() on old_df (already resampled) concatenated with df (new rows) 
+    after drop_duplicates, but only the buckets the new rows fall in are aggregated again: the 
+    open bars of old_df (from the first bucket of df on) are folded with the new rows.
+    """
+    if old_df is None or old_df.shape[0] == 0:
+        df = df.copy().reset_index()
+        df = df.drop_duplicates(keep='last', ignore_index=True)
+        return resample(df.set_index('date'), interval)
+    # The last untouched bucket seeds the forward fill of the new buckets.
+    first_bucket = pd.DatetimeIndex(df.index).round(interval).min()
+    seed = max(old_df.index.searchsorted(first_bucket, side='left') - 1, 0)
+    columns = old_df.columns.union(df.columns).sort_values()
+    old_columns = columns.get_indexer(old_df.columns)
+    new_columns = columns.get_indexer(df.columns)
+    values = np.full((old_df.shape[0] - seed + df.shape[0], len(columns)), np.nan)
+    values[:old_df.shape[0] - seed, old_columns] = old_df.iloc[seed:].to_numpy(dtype=float)
+    values[old_df.shape[0] - seed:, new_columns] = df.to_numpy(dtype=float)
+    dates = pd.DatetimeIndex(old_df.index[seed:].append(pd.DatetimeIndex(df.index)))
+    # drop_duplicates(keep='last') on the dates and values, only among rows sharing a date.
+    kept = ~pd.Index(dates).duplicated(keep=False)
+    shared = np.flatnonzero(~kept)
+    rows = np.where(np.isnan(values[shared]), np.nan, values[shared] + 0.0) # One NaN, one zero.
+    rows = np.column_stack([dates.asi8[shared].view(np.float64), rows])
+    kept[shared] = ~pd.Series([row.tobytes() for row in rows], dtype=object).duplicated(
+        keep='last').to_numpy()
+    recent_df = resample_recent(dates[kept], values[kept], columns, interval)
+    columns = old_df.columns.union(recent_df.columns).sort_values()
+    values = np.full((seed + recent_df.shape[0], len(columns)), np.nan)
+    values[:seed, columns.get_indexer(old_df.columns)] = old_df.iloc[:seed].to_numpy(dtype=float)
+    values[seed:, columns.get_indexer(recent_df.columns)] = recent_df.to_numpy()
+    # New symbols: zero volumes and values backfilled from their first bar (as in resample).
+    added_columns = columns.get_indexer(recent_df.columns.difference(old_df.columns))
+    values[:seed, added_columns] = values[seed, added_columns]
+    if interval == '1min':
+        values = recalculate_volumes_values(values, columns)
+    return pd.DataFrame(values, index=old_df.index[:seed].append(recent_df.index), columns=columns)
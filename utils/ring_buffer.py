@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/ring_buffer.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Append-only, fixed-capacity columnar ring buffer on memory-mapped NumPy arrays.
+
+# Library imports.
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+from os import listdir, makedirs, remove, replace
+from os.path import exists, join
+import json
+import time
+import numpy as np
+import pandas as pd
+
+# Class definition.
+class Ring_buffer:
+    """
+    Stores the rows of a logger dataset in one memory-mapped array per column.
+
+    Two layouts are supported:
+    - long: flat columns (raw ticker rows), one 1-D array per column,
+      string columns dictionary-encoded against the shared symbol list.
+    - wide: (symbol, feature) MultiIndex columns (OHLCV), one 2-D array
+      (capacity x symbol slots) per feature.
+
+    Row n (counted from the first row ever written) lives in slot
+    n % capacity, so a write only touches the new rows. The meta.json
+    file is replaced atomically after the arrays are flushed, so readers
+    mapping the arrays always see a consistent head.
+
+    Writes also bump a shared sequence number (odd while writing), so
+    that readers in other processes can retry instead of reading rows
+    being rewritten (see read_latest).
+    """
+    version = 1
+
+    def __init__(self, 
+                 path: str, 
+                 capacity: int = 3000, 
+                 key: Optional[List[str]] = None, 
+                 readonly: bool = False):
+        """
+        :param path: directory holding the arrays and meta.json.
+        :param capacity: maximum number of rows kept (buffer size).
+        :param key: columns identifying a row in the long layout (None means the index).
+        :param readonly: map the arrays read-only (for readers in other processes).
+        """
+        self.path = path
+        self.capacity = capacity
+        self.key = key
+        self.readonly = readonly
+        self.meta = None
+        self.arrays = {}
+        self.sequence = None
+        self.rows = None
+        self.rows_head = 0
+        self.rows_generation = None
+        self.latest = None
+        if exists(self.meta_path):
+            self.load()
+
+    @property
+    def meta_path(self) -> str:
+        return join(self.path, 'meta.json')
+
+    @property
+    def sequence_path(self) -> str:
+        return join(self.path, 'sequence.bin')
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return exists(join(path, 'meta.json'))
+
+    @property
+    def head(self) -> int:
+        """Number of rows written since the buffer was created."""
+        return 0 if self.meta is None else self.meta['head']
+
+    @property
+    def size(self) -> int:
+        return min(self.head, self.meta['capacity']) if self.meta is not None else 0
+
+    def load(self) -> None:
+        with open(self.meta_path, 'r') as f:
+            meta = json.load(f)
+        if self.meta is None or meta['generation'] != self.meta['generation']:
+            self.arrays = {}
+            mmap_mode = 'r' if self.readonly else 'r+'
+            for name in self.array_names(meta):
+                self.arrays[name] = np.load(join(self.path, name + '.npy'), 
+                                            mmap_mode=mmap_mode)
+        self.meta = meta
+        if self.readonly:
+            self.capacity = meta['capacity']
+        self.symbol_codes = {symbol: i for (i, symbol) in enumerate(meta['symbols'])}
+
+    def refresh(self) -> None:
+        """Re-read meta.json (cheap) and remap the arrays only if they were re-created."""
+        if exists(self.meta_path):
+            self.load()
+
+    def get_sequence(self) -> int:
+        """Number of writes started and finished (odd while one is in progress)."""
+        if self.sequence is None:
+            if not exists(self.sequence_path):
+                return 0
+            self.sequence = np.memmap(self.sequence_path, dtype=np.int64, 
+                                      mode='r' if self.readonly else 'r+', shape=(1,))
+        return int(self.sequence[0])
+
+    def begin_write(self) -> None:
+        if self.sequence is None and not exists(self.sequence_path):
+            if not exists(self.path):
+                makedirs(self.path)
+            # Kept across re-created arrays, so that it never goes back.
+            np.memmap(self.sequence_path, dtype=np.int64, mode='w+', shape=(1,)).flush()
+        if self.get_sequence() % 2 == 1:
+            # The previous writer died while writing.
+            self.sequence[0] += 1
+        self.sequence[0] += 1
+
+    def end_write(self) -> None:
+        self.sequence[0] += 1
+
+    def array_names(self, meta: dict) -> List[str]:
+        return ['index'] + ['column_{}'.format(i) for i in range(len(meta['columns']))]
+
+    def save_meta(self) -> None:
+        for array in self.arrays.values():
+            array.flush()
+        temp_path = self.meta_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.meta, f)
+        replace(temp_path, self.meta_path)
+
+    def create(self, df: pd.DataFrame, width: int = 0) -> None:
+        """Allocate empty arrays for the schema of df."""
+        generation = 0 if self.meta is None else self.meta['generation'] + 1
+        self.arrays = {}
+        if not exists(self.path):
+            makedirs(self.path)
+        for name in listdir(self.path):
+            if name.endswith('.npy'):
+                remove(join(self.path, name))
+        if isinstance(df.columns, pd.MultiIndex):
+            layout = 'wide'
+            symbols = df.columns.get_level_values(0).unique().tolist()
+            columns = [[feature, 'f'] for feature in df.columns.get_level_values(1).unique()]
+            width = max(width, 2 * len(symbols))
+        else:
+            layout = 'long'
+            symbols = []
+            columns = [[column, self.get_kind(df[column])] for column in df.columns]
+            width = 0
+        self.meta = {'version': self.version, 'generation': generation, 'layout': layout,
+                     'capacity': self.capacity, 'head': 0, 'width': width,
+                     'index_name': df.index.name, 'columns': columns, 'symbols': symbols}
+        self.symbol_codes = {symbol: i for (i, symbol) in enumerate(symbols)}
+        self.arrays['index'] = self.allocate('index', np.int64, (self.capacity,))
+        for (i, (column, kind)) in enumerate(columns):
+            if layout == 'wide':
+                shape, dtype = (self.capacity, width), np.float64
+            else:
+                shape, dtype = (self.capacity,), self.get_dtype(kind)
+            self.arrays['column_{}'.format(i)] = self.allocate('column_{}'.format(i), dtype, shape)
+        self.save_meta()
+
+    def allocate(self, name: str, dtype: type, shape: tuple) -> np.memmap:
+        # Files are replaced rather than truncated: readers keep their old mapping.
+        path = join(self.path, name + '.npy')
+        array = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=dtype, shape=shape)
+        if array.dtype.kind == 'f':
+            array[:] = np.nan
+        replace(path + '.tmp', path)
+        return array
+
+    def get_kind(self, series: pd.Series) -> str:
+        """Numbers formatted as strings (e.g. USDT_price) are stored as floats, not symbols."""
+        kind = series.dtype.kind
+        if kind == 'O':
+            try:
+                pd.to_numeric(series)
+                kind = 'f'
+            except (ValueError, TypeError):
+                pass
+        return kind
+
+    def get_dtype(self, kind: str) -> type:
+        if kind == 'O':
+            return np.int32
+        elif kind in 'iuM':
+            return np.int64
+        elif kind == 'b':
+            return np.bool_
+        else:
+            return np.float64
+
+    def matches_schema(self, df: pd.DataFrame) -> bool:
+        if self.meta is None or self.meta['capacity'] != self.capacity:
+            return False
+        if isinstance(df.columns, pd.MultiIndex):
+            features = df.columns.get_level_values(1).unique().tolist()
+            return self.meta['layout'] == 'wide' and \
+                features == [column for (column, kind) in self.meta['columns']]
+        return self.meta['layout'] == 'long' and \
+            df.columns.tolist() == [column for (column, kind) in self.meta['columns']]
+
+    def encode_symbols(self, symbols: Union[pd.Series, pd.Index]) -> np.ndarray:
+        """Map symbols to their dictionary codes, growing the dictionary as needed."""
+        for symbol in pd.unique(symbols):
+            if symbol not in self.symbol_codes and not pd.isna(symbol):
+                self.symbol_codes[symbol] = len(self.meta['symbols'])
+                self.meta['symbols'].append(symbol)
+        return pd.Index(self.meta['symbols']).get_indexer(symbols).astype(np.int32)
+
+    def grow(self, width: int) -> None:
+        """Re-create the wide arrays with more symbol slots, keeping the stored rows."""
+        for i in range(len(self.meta['columns'])):
+            name = 'column_{}'.format(i)
+            old_array = np.array(self.arrays[name])
+            array = self.allocate(name, np.float64, (self.capacity, width))
+            array[:, :old_array.shape[1]] = old_array
+            self.arrays[name] = array
+        self.meta['width'] = width
+        self.meta['generation'] += 1
+
+    def write(self, df: pd.DataFrame) -> None:
+        slots = (self.meta['head'] + np.arange(df.shape[0])) % self.capacity
+        self.arrays['index'][slots] = pd.DatetimeIndex(df.index).asi8
+        if self.meta['layout'] == 'wide':
+            codes = self.encode_symbols(df.columns.get_level_values(0))
+            if len(self.meta['symbols']) > self.meta['width']:
+                self.grow(2 * len(self.meta['symbols']))
+            features = df.columns.get_level_values(1)
+            values = df.to_numpy(dtype=np.float64)
+            for (i, (feature, kind)) in enumerate(self.meta['columns']):
+                mask = np.asarray(features == feature)
+                array = self.arrays['column_{}'.format(i)]
+                array[slots] = np.nan
+                array[slots[:, None], codes[mask][None, :]] = values[:, mask]
+        else:
+            for (i, (column, kind)) in enumerate(self.meta['columns']):
+                if kind == 'O':
+                    values = self.encode_symbols(df[column])
+                elif kind == 'M':
+                    values = pd.DatetimeIndex(df[column]).asi8
+                elif kind == 'f':
+                    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+                else:
+                    values = df[column].to_numpy()
+                self.arrays['column_{}'.format(i)][slots] = values
+        self.meta['head'] += df.shape[0]
+
+    def append(self, df: pd.DataFrame) -> None:
+        """Append rows, keeping at most capacity of them."""
+        if df.shape[0] > 0:
+            self.begin_write()
+            if not self.matches_schema(df):
+                self.create(df)
+            self.write(df.tail(self.capacity))
+            self.save_meta()
+            self.end_write()
+
+    def rewind(self, n: int) -> None:
+        """Forget the n latest rows so they can be rewritten."""
+        self.meta['head'] -= min(n, self.size)
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Write only the rows of the (full) dataset that are not stored yet."""
+        if self.head == 0 or not self.matches_schema(df):
+            self.append(df)
+            return
+        last_slot = (self.head - 1) % self.capacity
+        if self.key is None:
+            # The latest bar may still be updated, so it is rewritten.
+            last_date = pd.Timestamp(self.arrays['index'][last_slot])
+            start = pd.DatetimeIndex(df.index).searchsorted(last_date, side='left')
+            if start < df.shape[0] and df.index[start] == last_date:
+                self.rewind(1)
+        else:
+            # Rows are immutable: find the latest stored row and write what follows.
+            keys = list(zip(*[df[column].tolist() for column in self.key]))
+            last_key = self.get_keys(np.array([last_slot]))[0]
+            found = [i for (i, key) in enumerate(keys) if key == last_key]
+            if len(found) > 0:
+                start = found[-1] + 1
+            else:
+                # The latest stored row is no longer in df (e.g. it rolled out of a coalesced
+                # write): only rows after its date, or at its date but not stored, are new.
+                last_date = pd.Timestamp(self.arrays['index'][last_slot])
+                slots = (self.head - 1 - np.arange(self.size)) % self.capacity
+                stored = set(self.get_keys(slots[self.arrays['index'][slots] == last_date.value]))
+                dates = pd.DatetimeIndex(df.index)
+                new = (dates > last_date) | ((dates == last_date) & 
+                                             np.array([key not in stored for key in keys], dtype=bool))
+                self.append(df[new])
+                return
+        self.append(df.iloc[start:])
+
+    def get_keys(self, slots: np.ndarray) -> List[Tuple[Hashable, ...]]:
+        """Key values of the rows stored in slots (long layout)."""
+        names = [name for (name, kind) in self.meta['columns']]
+        columns = []
+        for column in self.key:
+            i = names.index(column)
+            values = self.arrays['column_{}'.format(i)][slots]
+            if self.meta['columns'][i][1] == 'O':
+                values = [self.meta['symbols'][value] if value >= 0 else None for value in values]
+            else:
+                values = values.tolist()
+            columns.append(values)
+        return list(zip(*columns))
+
+    def read_rows(self, start: int, end: int) -> Dict[str, np.ndarray]:
+        """Copy of the arrays (with all symbol slots) of row numbers start to end."""
+        slots = np.arange(start, end) % self.capacity
+        return {name: array[slots] for (name, array) in self.arrays.items()}
+
+    def build_frame(self, rows: Dict[str, np.ndarray]) -> pd.DataFrame:
+        index = pd.DatetimeIndex(rows['index'], name=self.meta['index_name'])
+        if self.meta['layout'] == 'wide':
+            symbols = self.meta['symbols']
+            features = [feature for (feature, kind) in self.meta['columns']]
+            values = np.stack([rows['column_{}'.format(i)][:, :len(symbols)]
+                               for i in range(len(features))], axis=-1)
+            columns = pd.MultiIndex.from_product([symbols, features], names=['symbol', 'feature'])
+            df = pd.DataFrame(values.reshape(index.size, -1), index=index, columns=columns)
+            df = df.dropna(axis='columns', how='all')
+            return df.sort_index(axis='columns')
+        symbols = np.array(self.meta['symbols'] + [None], dtype=object)
+        data = {}
+        for (i, (column, kind)) in enumerate(self.meta['columns']):
+            values = rows['column_{}'.format(i)]
+            if kind == 'O':
+                values = symbols[values]
+            elif kind == 'M':
+                values = pd.DatetimeIndex(values)
+            data[column] = values
+        return pd.DataFrame(data, index=index)
+
+    def read(self, start: Optional[int] = None) -> pd.DataFrame:
+        """Return the rows written since row number start (default: all stored rows)."""
+        first = self.head - self.size
+        start = first if start is None else max(start, first)
+        return self.build_frame(self.read_rows(start, self.head))
+
+    def read_latest(self, retries: int = 100) -> Optional[pd.DataFrame]:
+        """
+        Same as refresh() then to_frame(), for readers in other processes. Only the rows
+        written since the previous call are copied from the arrays (and the latest one
+        again, as it may have been rewritten), and the copy is retried as long as a write
+        overlapped it, so that rows being rewritten are never returned. The previous
+        rows are returned if every attempt overlapped a write.
+        """
+        for attempt in range(retries):
+            sequence = self.get_sequence()
+            if sequence % 2 == 0:
+                self.refresh()
+                if self.meta is None or self.head == 0:
+                    return None
+                first = self.head - self.size
+                if self.rows is None or self.rows_generation != self.meta['generation']:
+                    (rows, start) = (None, first)
+                else:
+                    # Symbol codes and slots only change with the generation.
+                    start = min(max(self.rows_head - 1, first), self.head)
+                    rows_first = self.rows_head - self.rows['index'].shape[0]
+                    kept = slice(max(first, rows_first) - rows_first, max(start - rows_first, 0))
+                    rows = {name: values[kept] for (name, values) in self.rows.items()}
+                new_rows = self.read_rows(start, self.head)
+                if self.get_sequence() == sequence:
+                    if rows is not None:
+                        new_rows = {name: np.concatenate([rows[name], values])
+                                    for (name, values) in new_rows.items()}
+                    self.rows = new_rows
+                    self.rows_head = self.head
+                    self.rows_generation = self.meta['generation']
+                    self.latest = self.build_frame(self.rows)
+                    return self.latest
+            time.sleep(0.001)
+        return self.latest
+
+    def to_frame(self) -> Optional[pd.DataFrame]:
+        return None if self.meta is None or self.head == 0 else self.read()
+
+    def to_csv(self, path: str) -> None:
+        """Export the stored rows in the same CSV format the loggers used to write."""
+        df = self.to_frame()
+        if df is not None:
+            df.to_csv(path)
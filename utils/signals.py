@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/signals.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: ZeroMQ publish/subscribe channel pushing screened assets from loggers to the trader.
+
+# Library imports.
+from typing import List, Optional
+from .lazy import lazy_import
+import json
+import struct
+import time
+import numpy as np
+import pandas as pd
+
+zmq = lazy_import('zmq')
+
+# Class definitions.
+class Signal_publisher:
+    header = struct.Struct('<Qd')
+
+    def __init__(self, url: str = 'tcp://*:5556', topic: str = 'screened'):
+        """
+        :param url: address to bind (e.g. tcp://*:5556, or ipc:///tmp/screened on the same machine).
+        :param topic: subscribers only receive the topics they subscribed to.
+        """
+        self.url = url
+        self.topic = topic.encode()
+        self.sequence = 0
+        self.context = zmq.Context.instance()
+        self.socket = self.context.socket(zmq.PUB)
+        # Slow subscribers only miss old sets, they are superseded anyway.
+        self.socket.setsockopt(zmq.SNDHWM, 16)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.bind(url)
+
+    def publish(self, dataset: pd.DataFrame) -> int:
+        """Send dataset as the next set, return its sequence number."""
+        self.sequence += 1
+        frames = [self.topic, self.header.pack(self.sequence, time.time())] + encode_frame(dataset)
+        self.socket.send_multipart(frames, copy=False)
+        return self.sequence
+
+    def close(self) -> None:
+        self.socket.close()
+
+class Signal_subscriber:
+    def __init__(self, 
+                 url: str = 'tcp://localhost:5556', 
+                 topic: str = 'screened', 
+                 max_age: Optional[float] = 120.0):
+        """
+        :param url: address the publisher is bound to.
+        :param topic: topic to subscribe to.
+        :param max_age: seconds after which the latest set is considered stale and the channel 
+                        silent (None means never).
+        """
+        self.url = url
+        self.max_age = max_age
+        self.context = zmq.Context.instance()
+        self.socket = self.context.socket(zmq.SUB)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.setsockopt(zmq.SUBSCRIBE, topic.encode())
+        self.socket.connect(url)
+        self.poller = zmq.Poller()
+        self.poller.register(self.socket, zmq.POLLIN)
+        self.latest = None
+        self.sequence = 0
+        self.published = None
+        self.received = None
+        self.missed = 0
+        self.connected = time.time()
+        self.silent = False
+
+    def drain(self) -> bool:
+        """Keep only the newest of the sets already received, return whether there was one."""
+        frames = None
+        while True:
+            try:
+                frames = self.socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            (sequence, published) = Signal_publisher.header.unpack(frames[1])
+            if self.sequence > 0 and sequence > self.sequence + 1:
+                self.missed += sequence - self.sequence - 1
+            elif sequence <= self.sequence:
+                # The publisher restarted.
+                self.missed = 0
+            (self.sequence, self.published) = (sequence, published)
+        if frames is None:
+            return False
+        self.latest = decode_frame(frames[2:])
+        self.received = time.time()
+        return True
+
+    def receive(self, timeout: float = 1.0) -> Optional[pd.DataFrame]:
+        """
+        Wait at most timeout seconds for a new set, then return the latest one (None if
+        there is none yet, if it is empty or if it is older than max_age).
+        """
+        if not self.drain() and self.poller.poll(timeout * 1000):
+            self.drain()
+        if self.latest is None or self.latest.shape[0] < 1:
+            return None
+        if self.max_age is not None and time.time() - self.received > self.max_age:
+            return None
+        return self.latest
+
+    def is_silent(self) -> bool:
+        """Whether no set arrived for max_age seconds (since connecting if none ever did)."""
+        last = self.connected if self.received is None else self.received
+        silent = self.max_age is not None and time.time() - last > self.max_age
+        if silent and not self.silent:
+            print('No screened set received from {} for {} seconds.'.format(self.url, self.max_age))
+        self.silent = silent
+        return silent
+
+    def close(self) -> None:
+        self.socket.close()
+
+# Function definitions.
+def encode_frame(dataset: pd.DataFrame) -> List[bytes]:
+    """Schema, then the raw bytes of the index and of every column (strings separated by NULs)."""
+    columns = [dataset.index.to_series()] + [dataset[column] for column in dataset.columns]
+    schema = {'index': dataset.index.name, 'rows': dataset.shape[0], 
+              'columns': [str(column) for column in dataset.columns], 'dtypes': []}
+    buffers = []
+    for values in columns:
+        if values.dtype == object:
+            schema['dtypes'].append('O')
+            buffers.append('\0'.join(values.astype(str)).encode())
+        elif values.dtype.kind == 'M':
+            schema['dtypes'].append('M')
+            buffers.append(pd.DatetimeIndex(values).asi8.tobytes())
+        else:
+            schema['dtypes'].append(values.dtype.str)
+            buffers.append(values.to_numpy().tobytes())
+    return [json.dumps(schema).encode()] + buffers
+
+def decode_frame(frames: List[bytes]) -> pd.DataFrame:
+    schema = json.loads(bytes(frames[0]))
+    columns = []
+    for (dtype, buffer) in zip(schema['dtypes'], frames[1:]):
+        buffer = bytes(buffer)
+        if dtype == 'O':
+            values = np.array(buffer.decode().split('\0') if schema['rows'] > 0 else [], dtype=object)
+        elif dtype == 'M':
+            values = pd.DatetimeIndex(np.frombuffer(buffer, dtype=np.int64))
+        else:
+            values = np.frombuffer(buffer, dtype=np.dtype(dtype)).copy()
+        columns.append(values)
+    index = pd.Index(columns[0], name=schema['index'])
+    return pd.DataFrame(dict(zip(schema['columns'], columns[1:])), index=index)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/snapshot.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Versioned, memory-mapped snapshot of exchange_info and shortest_paths for fast startups.
+
+# Library imports.
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections.abc import Mapping
+from os.path import exists, join
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+# Class definitions.
+class Shortest_paths_view(Mapping):
+    def __init__(self, 
+                 positions: Dict[str, int], 
+                 pairs: List[Tuple[str, str]], 
+                 offsets: np.ndarray, 
+                 hops: np.ndarray, 
+                 present: np.ndarray, 
+                 from_position: Optional[int] = None):
+        """
+        Read-only shortest_paths[priority] (or shortest_paths[priority][from_asset] when
+        from_position is given), decoding paths from the memory-mapped arrays on access.
+        """
+        self.positions = positions
+        self.pairs = pairs
+        self.offsets = offsets
+        self.hops = hops
+        self.present = present
+        self.from_position = from_position
+
+    def __getitem__(self, asset: str):
+        position = self.positions[asset]
+        if self.from_position is None:
+            return Shortest_paths_view(self.positions, self.pairs, self.offsets, self.hops, 
+                                       self.present, from_position=position)
+        k = self.from_position * len(self.positions) + position
+        if not self.present[k]:
+            raise KeyError(asset)
+        return [self.pairs[hop] for hop in self.hops[self.offsets[k]:self.offsets[k + 1]]]
+
+    def __iter__(self) -> Iterator[str]:
+        if self.from_position is None:
+            return iter(self.positions)
+        row = self.present[self.from_position * len(self.positions):
+                           (self.from_position + 1) * len(self.positions)]
+        return (asset for (asset, position) in self.positions.items() if row[position])
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+class Startup_snapshot:
+    version = 1
+
+    def __init__(self, 
+                 directory: str = 'crypto_logs/snapshot', 
+                 exchange_info_path: str = 'crypto_logs/crypto_exchange_info.txt', 
+                 shortest_paths_path: str = 'crypto_logs/shortest_paths.pkl'):
+        """
+        exchange_info and shortest_paths saved as .npy columns under a manifest naming the
+        snapshot version and the CSV and pickle it was made from, so that a restart maps
+        them in memory instead of parsing the CSV and unpickling every path.
+
+        :param directory: where to keep the snapshot.
+        :param exchange_info_path: exchange information CSV (see Cryptocurrency_exchange).
+        :param shortest_paths_path: pickled paths (see precompute_shortest_paths).
+        """
+        self.directory = directory
+        self.exchange_info_path = exchange_info_path
+        self.shortest_paths_path = shortest_paths_path
+        self.manifest_path = join(directory, 'manifest.json')
+
+    def get_sources(self) -> Optional[Dict[str, List[int]]]:
+        """(size, modification time) of the files the snapshot is made from, None if one is missing."""
+        sources = {}
+        for path in [self.exchange_info_path, self.shortest_paths_path]:
+            if not exists(path):
+                return None
+            stat = os.stat(path)
+            sources[path] = [stat.st_size, stat.st_mtime_ns]
+        return sources
+
+    def get_manifest(self) -> Optional[Dict[str, object]]:
+        """Manifest of the current snapshot, None if there is none or it is stale."""
+        if not exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r') as f:
+            manifest = json.load(f)
+        sources = self.get_sources()
+        if manifest.get('version', None) != self.version or sources is None or \
+                manifest.get('sources', None) != sources:
+            return None
+        return manifest
+
+    def is_valid(self) -> bool:
+        return self.get_manifest() is not None
+
+    def save(self, 
+             exchange_info: pd.DataFrame, 
+             shortest_paths: Dict[str, Dict[str, Dict[str, List[Tuple[str, str]]]]]) -> None:
+        """
+        Write a new snapshot next to the current one, then switch the manifest over to it. The
+        one it replaces is kept until the next save, for processes that just read its manifest.
+        """
+        previous = None
+        if exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as f:
+                previous = json.load(f).get('name', None)
+        name = 'v{}_{}'.format(self.version, time.time_ns())
+        directory = join(self.directory, name)
+        os.makedirs(directory)
+        columns = []
+        for (i, column) in enumerate(exchange_info.columns):
+            values = exchange_info[column]
+            entry = {'name': column, 'file': 'column_{}.npy'.format(i), 'mask': None}
+            if values.dtype == object:
+                mask = values.isnull().to_numpy()
+                if mask.any():
+                    entry['mask'] = 'column_{}_mask.npy'.format(i)
+                    np.save(join(directory, entry['mask']), mask)
+                values = values.astype(str).to_numpy(dtype=str)
+            np.save(join(directory, entry['file']), np.asarray(values))
+            columns.append(entry)
+        np.save(join(directory, 'index.npy'), exchange_info.index.to_numpy())
+        assets = set()
+        for paths in shortest_paths.values():
+            for (from_asset, from_paths) in paths.items():
+                assets |= {from_asset} | set(from_paths)
+        assets = sorted(assets)
+        positions = {asset: i for (i, asset) in enumerate(assets)}
+        pairs = {}
+        for (priority, paths) in shortest_paths.items():
+            offsets = np.zeros(len(assets) ** 2 + 1, dtype=np.int64)
+            present = np.zeros(len(assets) ** 2, dtype=bool)
+            for (from_asset, from_paths) in paths.items():
+                for (to_asset, path) in from_paths.items():
+                    k = positions[from_asset] * len(assets) + positions[to_asset]
+                    present[k] = True
+                    offsets[k + 1] = len(path)
+            np.cumsum(offsets, out=offsets)
+            hops = np.zeros(offsets[-1], dtype=np.int32)
+            for (from_asset, from_paths) in paths.items():
+                for (to_asset, path) in from_paths.items():
+                    k = positions[from_asset] * len(assets) + positions[to_asset]
+                    hops[offsets[k]:offsets[k + 1]] = [pairs.setdefault(tuple(pair), len(pairs))
+                                                       for pair in path]
+            np.save(join(directory, priority + '_offsets.npy'), offsets)
+            np.save(join(directory, priority + '_hops.npy'), hops)
+            np.save(join(directory, priority + '_present.npy'), present)
+        np.save(join(directory, 'assets.npy'), np.array(assets, dtype=str))
+        np.save(join(directory, 'pairs.npy'), np.array(list(pairs), dtype=str).reshape(-1, 2))
+        manifest = {'version': self.version, 'name': name, 'sources': self.get_sources(), 
+                    'columns': columns, 'priorities': list(shortest_paths)}
+        with open(self.manifest_path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+        # Older snapshots may still be mapped by running processes, which keep their files open.
+        for entry in os.listdir(self.directory):
+            if entry not in [name, previous] and entry.startswith('v'):
+                shutil.rmtree(join(self.directory, entry), ignore_errors=True)
+
+    def load_exchange_info(self, manifest: Dict[str, object]) -> pd.DataFrame:
+        directory = join(self.directory, manifest['name'])
+        columns = {}
+        for entry in manifest['columns']:
+            values = np.load(join(directory, entry['file']))
+            if values.dtype.kind == 'U':
+                values = values.astype(object)
+                if entry['mask'] is not None:
+                    values[np.load(join(directory, entry['mask']))] = np.nan
+            columns[entry['name']] = values
+        index = pd.Index(np.load(join(directory, 'index.npy')))
+        return pd.DataFrame(columns, index=index)
+
+    def load_shortest_paths(self, manifest: Dict[str, object]) -> Dict[str, Shortest_paths_view]:
+        directory = join(self.directory, manifest['name'])
+        assets = np.load(join(directory, 'assets.npy')).tolist()
+        positions = {asset: i for (i, asset) in enumerate(assets)}
+        pairs = [tuple(pair) for pair in np.load(join(directory, 'pairs.npy')).tolist()]
+        return {priority: Shortest_paths_view(
+                    positions, pairs, 
+                    np.load(join(directory, priority + '_offsets.npy'), mmap_mode='r'), 
+                    np.load(join(directory, priority + '_hops.npy'), mmap_mode='r'), 
+                    np.load(join(directory, priority + '_present.npy'), mmap_mode='r'))
+                for priority in manifest['priorities']}
+
+    def load_manifest(self, manifest: Optional[Dict[str, object]]) \
+            -> Optional[Tuple[pd.DataFrame, Dict[str, Shortest_paths_view]]]:
+        if manifest is None:
+            return None
+        return self.load_exchange_info(manifest), self.load_shortest_paths(manifest)
+
+    def load(self) -> Optional[Tuple[pd.DataFrame, Dict[str, Shortest_paths_view]]]:
+        """(exchange_info, shortest_paths) from the snapshot, None if it is missing or stale."""
+        try:
+            return self.load_manifest(self.get_manifest())
+        except FileNotFoundError:
+            # Two saves since the manifest was read removed its snapshot: the new manifest is complete.
+            return self.load_manifest(self.get_manifest())
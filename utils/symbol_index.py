@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/symbol_index.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Hash index over exchange_info for O(1) symbol metadata lookups.
+
+# Library imports.
+from typing import List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+# Class definition.
+class Symbol_index:
+    fields = ['base_asset', 'quote_asset', 'tick_size', 'step_size', 
+              'base_asset_precision', 'quote_precision']
+
+    def __init__(self, exchange_info: pd.DataFrame):
+        """
+        :param exchange_info: exchange information on all tickers (see Cryptocurrency_exchange).
+        """
+        info = exchange_info.drop_duplicates(subset=['symbol'], keep='first')
+        self.exchange_info = exchange_info
+        self.symbols = pd.Index(info['symbol'])
+        self.positions = {symbol: i for (i, symbol) in enumerate(self.symbols)}
+        self.columns = {}
+        for field in self.fields:
+            if field in info.columns:
+                values = info[field]
+                if field in ['tick_size', 'step_size']:
+                    values = values.astype(float)
+                self.columns[field] = values.to_numpy()
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.positions
+
+    def get(self, symbol: str, field: str) -> Optional[Union[str, float, int]]:
+        """Return one field of one symbol, or None if the symbol is not listed."""
+        position = self.positions.get(symbol, None)
+        return None if position is None else self.columns[field][position]
+
+    def get_assets(self, symbol: str) -> Optional[Tuple[str, str]]:
+        position = self.positions.get(symbol, None)
+        if position is None:
+            return None
+        return self.columns['base_asset'][position], self.columns['quote_asset'][position]
+
+    def get_positions(self, symbols: Union[List[str], pd.Series, np.ndarray]) -> np.ndarray:
+        """Return the position of every symbol (-1 if not listed)."""
+        return self.symbols.get_indexer(symbols)
+
+    def map(self, 
+            symbols: Union[List[str], pd.Series, np.ndarray], 
+            field: str) -> np.ndarray:
+        """Return the field for a whole column of symbols (NaN if not listed)."""
+        positions = self.get_positions(symbols)
+        values = self.columns[field]
+        if (positions < 0).any():
+            if values.dtype.kind in 'iub':
+                values = values.astype(float)
+            values = np.append(values, np.array([np.nan], dtype=values.dtype))
+        return values[positions]
+
+# Function definitions.
+def get_symbol_index(exchange_info: pd.DataFrame, 
+                     symbol_index: Optional[Symbol_index] = None) -> Symbol_index:
+    """
+    Return symbol_index if it was built over this very exchange_info, else a new index. Indexes 
+    are kept by their owner (see Cryptocurrency_exchange and Trader_context) and passed along.
+    """
+    if symbol_index is None or symbol_index.exchange_info is not exchange_info:
+        symbol_index = Symbol_index(exchange_info)
+    return symbol_index
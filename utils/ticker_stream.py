@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/ticker_stream.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Binance all-market 24h ticker websocket stream kept as a latest-state table.
+
+# Library imports.
+from typing import Dict, List, Optional
+from threading import Event, Lock, Thread
+import asyncio
+import json
+import time
+import pandas as pd
+import websockets
+
+# Class definition.
+class Ticker_stream:
+    url = 'wss://stream.binance.com:9443/ws/!ticker@arr'
+
+    # Stream payload keys to client.get_ticker() keys, in the same order.
+    fields = {'s': 'symbol', 'p': 'priceChange', 'P': 'priceChangePercent', 
+              'w': 'weightedAvgPrice', 'x': 'prevClosePrice', 'c': 'lastPrice', 
+              'Q': 'lastQty', 'b': 'bidPrice', 'B': 'bidQty', 'a': 'askPrice', 
+              'A': 'askQty', 'o': 'openPrice', 'h': 'highPrice', 'l': 'lowPrice', 
+              'v': 'volume', 'q': 'quoteVolume', 'O': 'openTime', 'C': 'closeTime', 
+              'F': 'firstId', 'L': 'lastId', 'n': 'count'}
+
+    def __init__(self, 
+                 url: Optional[str] = None, 
+                 reconnect_delay: float = 1.0, 
+                 record_path: Optional[str] = None, 
+                 max_age: Optional[float] = 10.0):
+        """
+        :param url: websocket URL (default is Binance, a local replay server can be given instead).
+        :param reconnect_delay: seconds to wait before reconnecting after a dropped connection.
+        :param record_path: append every received frame to this file (see utils/replay.py).
+        :param max_age: seconds without a frame after which the table is stale (None means never).
+        """
+        self.url = self.url if url is None else url
+        self.reconnect_delay = reconnect_delay
+        self.record_path = record_path
+        self.max_age = max_age
+        self.received = None
+        self.tickers = {}
+        self.lock = Lock()
+        self.ready = Event()
+        self.running = False
+        self.thread = None
+        self.loop = None
+        self.websocket = None
+        self.frame_count = 0
+
+    def start(self) -> 'Ticker_stream':
+        """Consume the stream in a background thread running its own event loop."""
+        if not self.running:
+            self.running = True
+            self.thread = Thread(target=self.run, daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.running = False
+        if self.loop is not None and self.websocket is not None:
+            asyncio.run_coroutine_threadsafe(self.websocket.close(), self.loop)
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def run(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.consume())
+        self.loop.close()
+
+    async def consume(self) -> None:
+        while self.running:
+            try:
+                async with websockets.connect(self.url, max_size=None) as websocket:
+                    self.websocket = websocket
+                    async for message in websocket:
+                        self.update(message)
+            except (websockets.ConnectionClosed, OSError, asyncio.TimeoutError) as e:
+                print('Ticker stream disconnected:', e)
+            self.websocket = None
+            if self.running:
+                await asyncio.sleep(self.reconnect_delay)
+
+    def update(self, message: str) -> None:
+        """Only the tickers that changed are sent, so each frame is merged into the table."""
+        frame = json.loads(message)
+        tickers = {ticker['s']: {name: ticker[key] for (key, name) in self.fields.items() 
+                                 if key in ticker} for ticker in frame}
+        with self.lock:
+            self.tickers.update(tickers)
+            self.frame_count += 1
+            self.received = time.time()
+        if self.record_path is not None:
+            with open(self.record_path, 'a') as f:
+                f.write(message.strip() + '\n')
+        self.ready.set()
+
+    def get_ticker(self, timeout: Optional[float] = None) -> List[Dict[str, object]]:
+        """
+        Latest state of every symbol, in the same format as client.get_ticker(). Raises
+        TimeoutError if no frame arrived within timeout seconds of starting, or if the latest
+        one is older than max_age (e.g. while reconnecting).
+        """
+        if not self.ready.wait(timeout=timeout):
+            raise TimeoutError('No ticker frame received from {} after {} seconds.'.format(
+                self.url, timeout))
+        with self.lock:
+            age = time.time() - self.received
+            if self.max_age is not None and age > self.max_age:
+                raise TimeoutError('Latest ticker frame from {} is {:.1f} seconds old.'.format(
+                    self.url, age))
+            return list(self.tickers.values())
+
+    def get_ticker_at_next_interval(self, 
+                                    interval: str, 
+                                    timeout: Optional[float] = None) -> List[Dict[str, object]]:
+        """
+        Wait for the next interval boundary (e.g. every 5s) and snapshot the table, waiting at
+        most timeout seconds (default is one interval) for a first frame (see get_ticker).
+        """
+        interval = pd.Timedelta(interval).total_seconds()
+        now = time.time()
+        time.sleep(interval - now % interval)
+        return self.get_ticker(timeout=interval if timeout is None else timeout)
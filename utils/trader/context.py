@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# File:        utils/trader/context.py
+# By:          Samuel Duclos
+# For          Myself
+# Description: Trader startup state, built with its independent steps running concurrently.
+
+# Library imports.
+from typing import Dict, List, Optional, Tuple
+from binance.client import Client
+from concurrent.futures import Future, ThreadPoolExecutor
+from os.path import exists, join
+from ..authentication import Cryptocurrency_authenticator
+from ..exchange import Cryptocurrency_exchange
+from ..conversion import Batch_price_converter, precompute_shortest_paths
+from ..conversion_table import get_conversion_table
+from ..signals import Signal_subscriber
+from ..snapshot import Startup_snapshot
+from ..symbol_index import Symbol_index
+from ..timezone import get_timezone_offset_in_seconds
+from .ssh import Ssh
+from .wallet import select_asset_with_biggest_wallet
+import time
+import pandas as pd
+
+# Class definition.
+class Trader_context:
+    def __init__(self, 
+                 input_log: Optional[str] = None, 
+                 output_log_screened: Optional[str] = None, 
+                 keys_file: str = 'server_keys.txt', 
+                 directory: str = 'crypto_logs', 
+                 use_snapshot: bool = True, 
+                 signal_port: Optional[int] = None):
+        """
+        Everything crypto_trader.py needs before its first decision. Authentication,
+        exchange information and paths, timezone offset and SSH session don't depend on
+        each other, so they are started at the same time.
+
+        :param input_log: server log of the input tickers (see Ssh).
+        :param output_log_screened: server log of the screened assets (see Ssh).
+        :param keys_file: server credentials (see Ssh).
+        :param directory: where exchange information, paths and their snapshot are kept.
+        :param use_snapshot: map exchange_info and shortest_paths from a Startup_snapshot.
+        :param signal_port: port the server publishes screened sets on (None means polling them over SSH).
+        """
+        self.input_log = input_log
+        self.output_log_screened = output_log_screened
+        self.keys_file = keys_file
+        self.directory = directory
+        self.use_snapshot = use_snapshot
+        self.signal_port = signal_port
+        self.exchange_info_path = join(directory, 'crypto_exchange_info.txt')
+        self.shortest_paths_path = join(directory, 'shortest_paths.pkl')
+        self.snapshot = Startup_snapshot(directory=join(directory, 'snapshot'), 
+                                         exchange_info_path=self.exchange_info_path, 
+                                         shortest_paths_path=self.shortest_paths_path)
+        self.timings = {}
+        self.client = None
+        self.exchange_info = None
+        self.shortest_paths = None
+        self.symbol_index = None
+        self.price_converter = None
+        self.offset_s = None
+        self.ssh = None
+        self.signals = None
+        self.conversion_table = None
+        self.from_asset = None
+        self.converted_quantity = None
+        self.quantity = None
+        self.priority = None
+
+    def time_step(self, name: str, function, *args, **kwargs):
+        start_time = time.time()
+        result = function(*args, **kwargs)
+        self.timings[name] = time.time() - start_time
+        return result
+
+    def authenticate(self) -> Client:
+        authenticator = Cryptocurrency_authenticator(use_keys=True, testnet=False)
+        return authenticator.spot_client
+
+    def load_exchange(self, client: Future) \
+            -> Tuple[pd.DataFrame, Dict[str, Dict[str, Dict[str, List[Tuple[str, str]]]]], Symbol_index]:
+        """exchange_info (from the snapshot if up to date), shortest_paths and the symbol index."""
+        if self.use_snapshot:
+            state = self.snapshot.load()
+            if state is not None:
+                (exchange_info, shortest_paths) = state
+                return exchange_info, shortest_paths, Symbol_index(exchange_info)
+        # The client is only waited for when exchange information was never saved.
+        exchange = Cryptocurrency_exchange(
+            client=None if exists(self.exchange_info_path) else client.result(), 
+            directory=self.directory)
+        exchange_info = exchange.info
+        shortest_paths = precompute_shortest_paths(exchange_info, priority=None, 
+                                                   shortest_paths_file=self.shortest_paths_path)
+        if self.use_snapshot:
+            self.snapshot.save(exchange_info, shortest_paths)
+        return exchange_info, shortest_paths, exchange.symbol_index
+
+    def connect_ssh(self) -> Ssh:
+        return Ssh(input_log=self.input_log, output_log_screened=self.output_log_screened, 
+                   keys_file=self.keys_file)
+
+    def start(self) -> 'Trader_context':
+        """Run the startup steps, concurrently when they are independent."""
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            client = executor.submit(self.time_step, 'authentication', self.authenticate)
+            exchange = executor.submit(self.time_step, 'exchange', self.load_exchange, client)
+            offset_s = executor.submit(self.time_step, 'timezone', get_timezone_offset_in_seconds)
+            ssh = executor.submit(self.time_step, 'ssh', self.connect_ssh)
+            self.client = client.result()
+            (self.exchange_info, self.shortest_paths, self.symbol_index) = exchange.result()
+            # Kept for the whole session so that its compiled paths are reused.
+            self.price_converter = Batch_price_converter(
+                self.exchange_info, priority='accuracy', shortest_paths=self.shortest_paths, 
+                symbol_index=self.symbol_index)
+            self.offset_s = offset_s.result()
+            self.conversion_table = self.time_step(
+                'conversion_table', get_conversion_table, client=self.client, 
+                exchange_info=self.exchange_info, offset_s=self.offset_s, dump_raw=False, 
+                as_pair=True, minimal=False, extra_minimal=False, super_extra_minimal=False, 
+                convert_to_USDT=False, shortest_paths=self.shortest_paths, 
+                symbol_index=self.symbol_index, price_converter=self.price_converter)
+            (self.from_asset, self.converted_quantity, self.quantity, self.priority) = \
+                self.time_step('wallet', select_asset_with_biggest_wallet, 
+                               client=self.client, conversion_table=self.conversion_table, 
+                               exchange_info=self.exchange_info, 
+                               shortest_paths=self.shortest_paths, 
+                               price_converter=self.price_converter)
+            self.ssh = ssh.result()
+        if self.signal_port is not None:
+            self.signals = Signal_subscriber(
+                url='tcp://{}:{}'.format(self.ssh.ip_address, self.signal_port))
+        self.timings['total'] = time.time() - start_time
+        return self
@@ -9,8 +9,10 @@
 # Library imports.
 from typing import Optional, Tuple
 from os.path import exists
+from ..publication import get_manifest_path, get_version
 import time
 import sys
+import json
 import pandas as pd
 import paramiko
 
@@ -28,12 +30,30 @@ class Ssh:
     def __init__(self, 
                  input_log: Optional[str] = None, 
                  output_log_screened: Optional[str] = None, 
-                 keys_file: str = 'server_keys.txt') -> None:
+                 keys_file: str = 'server_keys.txt', 
+                 incremental: bool = True, 
+                 ssh: Optional[paramiko.SSHClient] = None) -> None:
+        """
+        :param input_log: server log of the input tickers.
+        :param output_log_screened: server log of the screened assets.
+        :param keys_file: server credentials (ip_address:password).
+        :param incremental: fetch logs over one persistent SFTP session, only transferring what changed.
+        :param ssh: already connected client (or stand-in) to use instead of connecting.
+        """
         if input_log is not None:
             self.input_log = input_log
         if output_log_screened is not None:
             self.output_log_screened = output_log_screened
+        self.incremental = incremental
+        self.sftp = None
+        self.logs = {}
+        self.transferred = 0
+        if ssh is not None:
+            self.ip_address = None
+            self.ssh = ssh
+            return
         ip_address, password = self.init_credentials(keys_file=keys_file)
+        self.ip_address = ip_address
         self.ssh = self.init_ssh(ip_address=ip_address, username='sam', 
                                  port=22, password=password)
 
@@ -51,15 +71,98 @@ class Ssh:
         ssh.connect(ip_address, username='sam', port=22, password=password)
         return ssh
 
+    def get_sftp(self) -> paramiko.SFTPClient:
+        """SFTP session opened once and kept for every later fetch."""
+        if self.sftp is None:
+            self.sftp = self.ssh.open_sftp()
+        return self.sftp
+
+    def get_remote_path(self, server_log: str) -> str:
+        # SFTP doesn't expand ~, but relative paths start from the home directory.
+        return server_log[2:] if server_log.startswith('~/') else server_log
+
+    def read_version(self, path: str) -> Optional[Tuple[int, float]]:
+        """Version of the log at path if it is published with a manifest, else None."""
+        try:
+            with self.get_sftp().open(get_manifest_path(path), 'rb') as f:
+                data = f.read()
+        except IOError:
+            return None
+        self.transferred += len(data)
+        try:
+            return get_version(json.loads(data.decode('utf-8')))
+        except (ValueError, KeyError):
+            return None
+
+    def read_log(self, server_log: str) -> Tuple[Optional[bytes], bool]:
+        """
+        Content of server_log and whether it changed since the last call. Only the size and
+        modification time are transferred while they stay the same, then only the manifest of
+        logs published with utils/publication.py while their version stays the same, only the
+        appended bytes when the file grew past an unchanged end, and the whole file otherwise.
+        """
+        sftp = self.get_sftp()
+        path = self.get_remote_path(server_log)
+        cache = self.logs.get(server_log, None)
+        try:
+            stat_time = time.time()
+            attributes = sftp.stat(path)
+            # Modification times are in seconds: a rewrite within the same second as the
+            # last read keeps both, so they are only trusted a second after it.
+            if cache is not None and attributes.st_size == cache['size'] and \
+                    attributes.st_mtime == cache['mtime'] and stat_time - cache['read'] > 1:
+                return cache['data'], False
+            version = self.read_version(path)
+            if cache is not None and version is not None and version == cache['version']:
+                return cache['data'], False
+            with sftp.open(path, 'rb') as f:
+                # Published logs are replaced as a whole, never appended to.
+                if cache is not None and version is None and 0 < cache['size'] < attributes.st_size:
+                    tail_size = min(cache['size'], 64)
+                    f.seek(cache['size'] - tail_size)
+                    data = f.read()
+                    self.transferred += len(data)
+                    if data[:tail_size] == cache['data'][-tail_size:]:
+                        data = cache['data'] + data[tail_size:]
+                    else:
+                        f.seek(0)
+                        data = None
+                else:
+                    data = None
+                if data is None:
+                    data = f.read()
+                    self.transferred += len(data)
+        except IOError:
+            self.logs.pop(server_log, None)
+            return None, True
+        if cache is not None and data == cache['data']:
+            cache['mtime'] = attributes.st_mtime
+            cache['version'] = version
+            return data, False
+        # The size read is kept rather than the one stated in case the file was being rewritten.
+        self.logs[server_log] = {'size': len(data), 'mtime': attributes.st_mtime, 
+                                 'version': version, 'read': time.time(), 'data': data, 'df': None}
+        return data, True
+
     def get_logs_from_server(self, server_log: str = output_log_screened) -> Optional[pd.DataFrame]:
-        ssh_stdin, ssh_stdout, ssh_stderr = \
-            self.ssh.exec_command('cat {}'.format(server_log))
-        df = StringIO(str(ssh_stdout.read().decode('utf-8')))
+        if not self.incremental:
+            ssh_stdin, ssh_stdout, ssh_stderr = \
+                self.ssh.exec_command('cat {}'.format(server_log))
+            data = ssh_stdout.read()
+            self.transferred += len(data)
+        else:
+            (data, changed) = self.read_log(server_log)
+            if not changed:
+                return self.logs[server_log]['df']
+            data = b'' if data is None else data
+        df = StringIO(str(data.decode('utf-8')))
         try:
             df = pd.read_csv(df)
             if df.shape[0] < 1:
                 df = None
         except (IndexError, pd.errors.EmptyDataError):
+            # Published logs are renamed into place whole, so this is a log with no rows yet.
             df = None
-            time.sleep(0.5)
+        if self.incremental and server_log in self.logs:
+            self.logs[server_log]['df'] = df
         return df
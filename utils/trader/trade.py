@@ -9,10 +9,13 @@
 # Library imports.
 from typing import Dict, List, Optional, Tuple
 from binance.client import Client
-from ..conversion import make_tradable_quantity, convert_price
+from ..conversion import Batch_price_converter, make_tradable_quantity, convert_price
+from ..conversion import get_base_asset_from_pair
 from ..conversion import get_shortest_pair_path_between_assets
 from ..conversion import select_pair_with_highest_quote_volume_from_base_asset
 from ..conversion_table import get_conversion_table
+from ..signals import Signal_subscriber
+from ..symbol_index import Symbol_index
 from .order_book import get_order_book_trigger
 from .wallet import select_asset_with_biggest_wallet
 from binance.exceptions import BinanceAPIException
@@ -32,13 +35,15 @@ def trade_assets(client: Client,
                  priority: str = 'accuracy', 
                  verbose: bool = False, 
                  shortest_paths: Optional[Dict[str, Dict[str, Dict[str, List[Tuple[
-                                 str, str]]]]]] = None) -> Dict[str, float]:
+                                 str, str]]]]]] = None, 
+                 symbol_index: Optional[Symbol_index] = None) -> Dict[str, float]:
     pair = base_asset + quote_asset
     side = 'BUY' if from_asset != base_asset else 'SELL'
     if side == 'SELL':
         quantity = convert_price(float(quantity), from_asset=from_asset, to_asset=to_asset, 
                                  conversion_table=conversion_table, exchange_info=exchange_info, 
-                                 key='close', priority=priority, shortest_path=shortest_paths)
+                                 key='close', priority=priority, shortest_path=shortest_paths, 
+                                 symbol_index=symbol_index)
     ticks = 0
     while True:
         try:
@@ -46,7 +51,8 @@ def trade_assets(client: Client,
                 print(quantity)
             while True:
                 quantity = make_tradable_quantity(pair, float(quantity), 
-                                                  subtract=ticks, exchange_info=exchange_info)
+                                                  subtract=ticks, exchange_info=exchange_info, 
+                                                  symbol_index=symbol_index)
                 qty = float(quantity)
                 if qty <= 0:
                     ticks = (qty // 2) + (qty // 4)
@@ -75,11 +81,14 @@ def trade(client: Client,
           priority: str = 'accuracy', 
           verbose: bool = True, 
           shortest_paths: Optional[Dict[str, Dict[str, Dict[str, List[Tuple[
-                          str, str]]]]]] = None) -> Dict[str, float]:
+                          str, str]]]]]] = None, 
+          symbol_index: Optional[Symbol_index] = None, 
+          price_converter: Optional[Batch_price_converter] = None) -> Dict[str, float]:
     from_asset, converted_quantity, quantity, priority = \
         select_asset_with_biggest_wallet(
             client=client, conversion_table=conversion_table, 
-            exchange_info=exchange_info, shortest_paths=shortest_paths)
+            exchange_info=exchange_info, shortest_paths=shortest_paths, 
+            price_converter=price_converter)
     if shortest_paths is None:
         shortest_path = \
             get_shortest_pair_path_between_assets(
@@ -106,11 +115,12 @@ def trade(client: Client,
                 to_asset=to_asset, base_asset=base_asset, 
                 quote_asset=quote_asset, conversion_table=conversion_table, 
                 exchange_info=exchange_info, priority=priority, verbose=False, 
-                shortest_paths=shortest_paths)
+                shortest_paths=shortest_paths, symbol_index=symbol_index)
             if request is None:
                 return trade(client=client, to_asset=to_asset, 
                              conversion_table=conversion_table, 
-                             exchange_info=exchange_info)
+                             exchange_info=exchange_info, symbol_index=symbol_index, 
+                             price_converter=price_converter)
             quantity = request['cummulativeQuoteQty']
             from_asset = to_asset
             sleep(0.01)
@@ -124,8 +134,10 @@ def add_entry_to_blacklist(blacklist: pd.DataFrame,
                            pair: str, 
                            conversion_table: pd.DataFrame, 
                            exchange_info: pd.DataFrame, 
-                           reason: str = 'stop_loss') -> pd.DataFrame:
-    base_asset_from_pair = exchange_info[exchange_info['symbol'] == pair]['base_asset'].iat[0]
+                           reason: str = 'stop_loss', 
+                           symbol_index: Optional[Symbol_index] = None) -> pd.DataFrame:
+    base_asset_from_pair = get_base_asset_from_pair(pair, exchange_info=exchange_info, 
+                                                    symbol_index=symbol_index)
     if base_asset_from_pair not in blacklist['base_asset'].tolist():
         new_blacklist_entry = conversion_table[conversion_table['symbol'] == pair][['symbol', 'close']].copy()
         new_blacklist_entry['base_asset'] = base_asset_from_pair
@@ -173,8 +185,10 @@ def check_if_asset_from_pair_is_buyable(blacklist: pd.DataFrame,
                                         take_profit_count: int = 2, 
                                         stop_loss_count: int = 1, 
                                         profit_count: int = 2, 
-                                        loss_count: int = 1) -> bool:
-    base_asset_from_pair = exchange_info[exchange_info['symbol'] == pair]['base_asset'].iat[0]
+                                        loss_count: int = 1, 
+                                        symbol_index: Optional[Symbol_index] = None) -> bool:
+    base_asset_from_pair = get_base_asset_from_pair(pair, exchange_info=exchange_info, 
+                                                    symbol_index=symbol_index)
     is_buyable = True
     if base_asset_from_pair in blacklist['base_asset'].tolist():
         pair = blacklist[blacklist['base_asset'] == base_asset_from_pair]['symbol'].iat[0]
@@ -199,7 +213,8 @@ def check_take_profit_and_stop_loss(blacklist: pd.DataFrame,
                                     exchange_info: pd.DataFrame, 
                                     latest_asset: str, 
                                     take_profit: Optional[float] = None, 
-                                    stop_loss: Optional[float] = None) -> Tuple[pd.DataFrame, str]:
+                                    stop_loss: Optional[float] = None, 
+                                    symbol_index: Optional[Symbol_index] = None) -> Tuple[pd.DataFrame, str]:
     if from_asset in blacklist['base_asset'].tolist():
         pair = blacklist[blacklist['base_asset'] == from_asset]['symbol'].iat[0]
         purchased_price = blacklist[blacklist['base_asset'] == from_asset]['close'].iat[0]
@@ -209,12 +224,14 @@ def check_take_profit_and_stop_loss(blacklist: pd.DataFrame,
             if percent_gain >= take_profit:
                 to_asset = latest_asset
                 blacklist = add_entry_to_blacklist(
-                    blacklist, pair, conversion_table, exchange_info, reason='take_profit')
+                    blacklist, pair, conversion_table, exchange_info, reason='take_profit', 
+                    symbol_index=symbol_index)
         if stop_loss is not None:
             if percent_gain <= -stop_loss:
                 to_asset = latest_asset
                 blacklist = add_entry_to_blacklist(
-                    blacklist, pair, conversion_table, exchange_info, reason='stop_loss')
+                    blacklist, pair, conversion_table, exchange_info, reason='stop_loss', 
+                    symbol_index=symbol_index)
     return blacklist, to_asset
 
 def check_profit_and_loss(blacklist: pd.DataFrame, 
@@ -224,7 +241,8 @@ def check_profit_and_loss(blacklist: pd.DataFrame,
                           exchange_info: pd.DataFrame, 
                           latest_asset: str, 
                           profit: Optional[float] = None, 
-                          loss: Optional[float] = None) -> Tuple[pd.DataFrame, str]:
+                          loss: Optional[float] = None, 
+                          symbol_index: Optional[Symbol_index] = None) -> Tuple[pd.DataFrame, str]:
     if from_asset in blacklist['base_asset'].tolist():
         pair = blacklist[blacklist['base_asset'] == from_asset]['symbol'].iat[0]
         purchased_price = blacklist[blacklist['base_asset'] == from_asset]['close'].iat[0]
@@ -234,12 +252,14 @@ def check_profit_and_loss(blacklist: pd.DataFrame,
             if is_gain:
                 to_asset = latest_asset
                 blacklist = add_entry_to_blacklist(
-                    blacklist, pair, conversion_table, exchange_info, reason='profit')
+                    blacklist, pair, conversion_table, exchange_info, reason='profit', 
+                    symbol_index=symbol_index)
         if loss is not None:
             if not is_gain:
                 to_asset = latest_asset
                 blacklist = add_entry_to_blacklist(
-                    blacklist, pair, conversion_table, exchange_info, reason='loss')
+                    blacklist, pair, conversion_table, exchange_info, reason='loss', 
+                    symbol_index=symbol_index)
     return blacklist, to_asset
 
 def remove_older_entries_in_blacklist(blacklist: pd.DataFrame, frequency: str = '15min') -> pd.DataFrame:
@@ -262,9 +282,17 @@ def choose_to_asset(ssh: paramiko.SSHClient,
                     loss_count: int, 
                     conversion_table: pd.DataFrame, 
                     exchange_info: pd.DataFrame, 
-                    output_log_screened: str = 'output_log_screened.txt') -> Tuple[str, str]:
-    tradable_pairs = ssh.get_logs_from_server(
-        server_log=ssh.output_log_screened)
+                    output_log_screened: str = 'output_log_screened.txt', 
+                    signals: Optional[Signal_subscriber] = None, 
+                    symbol_index: Optional[Symbol_index] = None) -> Tuple[str, str]:
+    tradable_pairs = None
+    if signals is not None:
+        # Pushed by the logger: waits at most a second for a new screened set.
+        tradable_pairs = signals.receive(timeout=1.0)
+    if signals is None or (tradable_pairs is None and signals.is_silent()):
+        # Nothing pushed for max_age seconds (closed port, logger down...): poll over SSH.
+        tradable_pairs = ssh.get_logs_from_server(
+            server_log=ssh.output_log_screened)
     if tradable_pairs is None:
         to_asset = sell_asset
     else:
@@ -286,7 +314,8 @@ def choose_to_asset(ssh: paramiko.SSHClient,
                 if check_if_asset_from_pair_is_buyable(
                     blacklist, test_pair, exchange_info, take_profit, 
                     stop_loss, profit, loss, take_profit_count, 
-                    stop_loss_count, profit_count, loss_count):
+                    stop_loss_count, profit_count, loss_count, 
+                    symbol_index=symbol_index):
                     #if get_order_book_trigger(
                     #    client=client, symbol=test_pair, threshold=10000):
                     latest_asset = test_asset
@@ -306,28 +335,34 @@ def trade_conditionally(ssh: paramiko.SSHClient,
                         loss: Optional[float], 
                         offset_s: float, 
                         shortest_paths: Optional[Dict[str, Dict[str, Dict[
-                                        str, List[Tuple[str, str]]]]]] = None):
+                                        str, List[Tuple[str, str]]]]]] = None, 
+                        symbol_index: Optional[Symbol_index] = None, 
+                        price_converter: Optional[Batch_price_converter] = None):
     #conversion_table = ssh.get_logs_from_server(server_log=ssh.input_log)
     conversion_table = get_conversion_table(
         client=client, exchange_info=exchange_info, offset_s=offset_s, 
         dump_raw=False, as_pair=True, minimal=False, extra_minimal=False, 
         super_extra_minimal=False, convert_to_USDT=False, 
-        shortest_paths=shortest_paths)
+        shortest_paths=shortest_paths, symbol_index=symbol_index, 
+        price_converter=price_converter)
     from_asset, converted_quantity, quantity, priority = \
         select_asset_with_biggest_wallet(
             client=client, conversion_table=conversion_table, 
-            exchange_info=exchange_info, shortest_paths=shortest_paths)
+            exchange_info=exchange_info, shortest_paths=shortest_paths, 
+            price_converter=price_converter)
     request = trade(
         client=client, to_asset=to_asset, conversion_table=conversion_table, 
-        exchange_info=exchange_info, priority=priority)
+        exchange_info=exchange_info, priority=priority, symbol_index=symbol_index, 
+        price_converter=price_converter)
     if request is not None:
         if to_asset != sell_asset:
             pair = select_pair_with_highest_quote_volume_from_base_asset(
                 to_asset, conversion_table, exchange_info)
             blacklist = add_entry_to_blacklist(
-                blacklist, pair, conversion_table, exchange_info, reason=None)
-            base_asset_from_pair = exchange_info[
-                exchange_info['symbol'] == pair]['base_asset'].iat[0]
+                blacklist, pair, conversion_table, exchange_info, reason=None, 
+                symbol_index=symbol_index)
+            base_asset_from_pair = get_base_asset_from_pair(
+                pair, exchange_info=exchange_info, symbol_index=symbol_index)
             pair = blacklist[blacklist['base_asset'] == base_asset_from_pair][
                 'symbol'].iat[0]
             blacklist.loc[blacklist['symbol'] == pair,'symbol'] = \
@@ -336,6 +371,7 @@ def trade_conditionally(ssh: paramiko.SSHClient,
                 float(request['fills'][0]['price'])
             blacklist, to_asset, check_profit_and_loss(
                 blacklist, from_asset, to_asset, conversion_table, 
-                exchange_info, latest_asset, profit=profit, loss=loss)
+                exchange_info, latest_asset, profit=profit, loss=loss, 
+                symbol_index=symbol_index)
         from_asset = to_asset
     return blacklist, from_asset, to_asset
@@ -9,7 +9,7 @@
 # Library imports.
 from typing import Dict, List, Tuple, Optional, Union
 from binance.client import Client
-from utils.conversion import convert_price
+from utils.conversion import Batch_price_converter, get_price_converter
 import pandas as pd
 
 # Function definitions.
@@ -17,7 +17,8 @@ def select_asset_with_biggest_wallet(
     client: Client, conversion_table: pd.DataFrame, 
     exchange_info: pd.DataFrame, 
     shortest_paths: Optional[Dict[str, Dict[str, Dict[str, List[Tuple[
-                    str, str]]]]]] = None) \
+                    str, str]]]]]] = None, 
+    price_converter: Optional[Batch_price_converter] = None) \
         -> Tuple[str, Union[str, float], Union[str, float], str]:
     def get_account_balances() -> pd.DataFrame:
         balances = pd.DataFrame(client.get_account()['balances'])[[
@@ -26,15 +27,12 @@ def select_asset_with_biggest_wallet(
         balances = balances[balances['free'] > 0]
         return balances.sort_values(by=['free'], ascending=False).T
     account_balances = get_account_balances()
-    ls = []
-    for (asset, quantity) in account_balances.items():
-        quantity = quantity.iat[0]
-        converted_quantity = convert_price(
-            size=quantity, from_asset=asset, to_asset='USDT', 
-            conversion_table=conversion_table, 
-            exchange_info=exchange_info, key='close', 
-            priority='accuracy', shortest_path=shortest_paths)
-        ls.append((asset, converted_quantity, quantity))
+    assets = account_balances.columns.tolist()
+    quantities = account_balances.iloc[0].tolist()
+    converter = get_price_converter(exchange_info, priority='accuracy', shortest_paths=shortest_paths, 
+                                    converter=price_converter)
+    converted_quantities = converter.convert(quantities, assets, 'USDT', conversion_table, key='close')
+    ls = list(zip(assets, converted_quantities, quantities))
     from_asset, converted_quantity, quantity = \
         sorted(ls, key=lambda x: float(x[1]), reverse=True)[0]
     priority = 'fees' if float(converted_quantity) > 10.0 else 'wallet'